@@ -7,8 +7,11 @@ import datetime
 import sys
 
 from aliquotmaf.logger import Logger
+from aliquotmaf.subcommands.aliquot_pipeline.__main__ import AliquotPipeline
 from aliquotmaf.subcommands.mask_merged_aliquot.__main__ import MaskMergedAliquotMaf
 from aliquotmaf.subcommands.merge_aliquot.__main__ import MergeAliquotMafs
+from aliquotmaf.subcommands.reannotate_aliquot.__main__ import ReannotateAliquotMaf
+from aliquotmaf.subcommands.serve.__main__ import Client, Serve
 from aliquotmaf.subcommands.vcf_to_aliquot.__main__ import VcfToAliquotMaf
 
 try:
@@ -17,6 +20,25 @@ except ImportError:
     __version__ = "0.0.0"
 
 
+def get_parser():
+    """
+    Returns the argument parser of aliquot-maf-tools.
+    """
+    p = argparse.ArgumentParser("GDC Aliquot MAF Tools")
+    p.add_argument("--version", action="version", version=__version__)
+    subparsers = p.add_subparsers(dest="subcommand")
+    subparsers.required = True
+
+    VcfToAliquotMaf.add(subparsers=subparsers)
+    MergeAliquotMafs.add(subparsers=subparsers)
+    MaskMergedAliquotMaf.add(subparsers=subparsers)
+    ReannotateAliquotMaf.add(subparsers=subparsers)
+    AliquotPipeline.add(subparsers=subparsers)
+    Serve.add(subparsers=subparsers)
+    Client.add(subparsers=subparsers)
+    return p
+
+
 def main(args=None):
     """
     The main method for aliquot-maf-tools.
@@ -34,16 +56,7 @@ def main(args=None):
     logger.info("-" * 75)
 
     # Get args
-    p = argparse.ArgumentParser("GDC Aliquot MAF Tools")
-    p.add_argument("--version", action="version", version=__version__)
-    subparsers = p.add_subparsers(dest="subcommand")
-    subparsers.required = True
-
-    VcfToAliquotMaf.add(subparsers=subparsers)
-    MergeAliquotMafs.add(subparsers=subparsers)
-    MaskMergedAliquotMaf.add(subparsers=subparsers)
-
-    options = p.parse_args(args)
+    options = get_parser().parse_args(args)
 
     # Run
     cls = options.func(options)
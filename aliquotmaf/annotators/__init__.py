@@ -8,6 +8,7 @@ from .hotspot import Hotspot
 from .mutation_status import MutationStatus
 from .nontcga_exac import NonTcgaExac
 from .reference_context import ReferenceContext
+from .scheduler import AnnotatorScheduler
 
 __all__ = [
     DbSnpValidation,
@@ -18,4 +19,5 @@ __all__ = [
     Hotspot,
     Entrez,
     GnomAD_VCF,
+    AnnotatorScheduler,
 ]
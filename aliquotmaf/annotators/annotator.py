@@ -8,6 +8,14 @@ from aliquotmaf.logger import Logger
 
 
 class Annotator(metaclass=ABCMeta):
+    # The MAF columns read and set by `annotate`, ``None`` when undeclared.
+    # See `aliquotmaf.annotators.scheduler`
+    reads = None
+    writes = None
+    # Whether the annotator mostly waits on lookups of its source, and can run
+    # on a thread alongside the other annotators
+    io_bound = False
+
     def __init__(self, name=None, source=None, scheme=None):
         self.name = None
         self.source = source
@@ -27,6 +35,23 @@ class Annotator(metaclass=ABCMeta):
         Performs the annotation.
         """
 
+    def annotate_batch(self, maf_records, *args, **kwargs):
+        """
+        Performs the annotation of a batch of records. Annotators that can
+        share work between the records of a batch override this, the default
+        calls `annotate` for each record.
+
+        :param maf_records: ``list`` of `maflib.record.MafRecord` to annotate
+        :param args: sequences of the per-record positional arguments of
+                     `annotate`, e.g. the VCF records
+        :param kwargs: keyword arguments of `annotate` for every record
+        :returns: ``list`` of the annotated records
+        """
+        return [
+            self.annotate(maf_record, *record_args, **kwargs)
+            for maf_record, *record_args in zip(maf_records, *args)
+        ]
+
     @abstractmethod
     def shutdown(self):
         """
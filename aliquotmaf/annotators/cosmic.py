@@ -4,14 +4,24 @@ Annotates the COSMIC ID and mutates the dbSNP_RS if necessary.
 
 from __future__ import absolute_import
 
+from collections import defaultdict
+
 import pysam
 
 from aliquotmaf.converters.builder import get_builder
+from aliquotmaf.regions import Region, cluster_regions
 
 from .annotator import Annotator
 
 
 class CosmicID(Annotator):
+    reads = ("dbSNP_RS",)
+    writes = ("COSMIC", "dbSNP_RS")
+    io_bound = True
+
+    # Records of a batch closer than this share one query of the COSMIC VCF
+    max_gap = 100
+
     def __init__(self, scheme, source):
         super().__init__(name="CosmicID", source=source, scheme=scheme)
         self.f = None
@@ -23,23 +33,47 @@ class CosmicID(Annotator):
         return curr
 
     def annotate(self, maf_record, vcf_record, var_allele_idx=1):
-        region = "{0}:{1}-{2}".format(
-            vcf_record.chrom, vcf_record.pos, vcf_record.pos + 1
-        )
-        alt = vcf_record.alleles[var_allele_idx]
-        cosmic_ids = []
-        for record in self.f.fetch(region=region):
-            try:
-                if (
-                    vcf_record.pos == record.pos
-                    and vcf_record.ref == record.ref
-                    and alt == record.alts[0]
-                ):
-                    cosmic_ids.append(record.id)
-            except TypeError:
-                # Weirdly formatted COSMIC variants
-                pass
+        return self.annotate_batch([maf_record], [vcf_record], [var_allele_idx])[0]
+
+    def annotate_batch(self, maf_records, vcf_records, var_allele_idxs=None):
+        """
+        Annotates a batch of records, with one query of the COSMIC VCF per
+        cluster of neighbouring records.
+        """
+        if var_allele_idxs is None:
+            var_allele_idxs = [1] * len(maf_records)
+
+        cosmic_ids = [[] for _ in maf_records]
+        regions = [Region(i.chrom, i.pos - 1, i.pos + 1) for i in vcf_records]
+        for cluster, indices in cluster_regions(regions, self.max_gap):
+            by_pos = defaultdict(list)
+            for i in indices:
+                by_pos[vcf_records[i].pos].append(i)
+
+            for record in self.f.fetch(cluster.contig, cluster.start, cluster.end):
+                for i in by_pos.get(record.pos, ()):
+                    vcf_record = vcf_records[i]
+                    try:
+                        if (
+                            vcf_record.ref == record.ref
+                            and vcf_record.alleles[var_allele_idxs[i]]
+                            == record.alts[0]
+                        ):
+                            cosmic_ids[i].append(record.id)
+                    except TypeError:
+                        # Weirdly formatted COSMIC variants
+                        pass
+
+        return [
+            self.set_cosmic_ids(maf_record, ids)
+            for maf_record, ids in zip(maf_records, cosmic_ids)
+        ]
 
+    def set_cosmic_ids(self, maf_record, cosmic_ids):
+        """
+        Sets the COSMIC column, and clears the novel dbSNP_RS of COSMIC
+        variants.
+        """
         if cosmic_ids:
             if maf_record["dbSNP_RS"].value == ["novel"]:
                 maf_record["dbSNP_RS"] = get_builder(
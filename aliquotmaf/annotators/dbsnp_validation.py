@@ -12,6 +12,10 @@ from .annotator import Annotator
 
 
 class DbSnpValidation(Annotator):
+    # The sqlite connection can only be used by the thread that created it
+    reads = ("dbSNP_RS",)
+    writes = ("dbSNP_Val_Status",)
+
     def __init__(self, scheme, source):
         super().__init__(name="DbSnpValidation", source=source, scheme=scheme)
         self.conn = None
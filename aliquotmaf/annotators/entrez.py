@@ -9,6 +9,7 @@ from json import load
 from maflib.schemes import MafScheme
 
 from aliquotmaf.converters.builder import get_builder
+from aliquotmaf.shared_tables import load_table
 
 from .annotator import Annotator
 
@@ -17,27 +18,44 @@ MAF_FEATURE: str = "Feature"
 
 
 class Entrez(Annotator):
+    reads = (MAF_SYMBOL, MAF_FEATURE)
+    writes = ("Entrez_Gene_Id",)
+
     def __init__(self, scheme, source):
         super().__init__(name="Entrez", source=source, scheme=scheme)
         self.gencode: dict
         self.ncbi: dict
 
     @classmethod
-    def setup(cls, scheme: MafScheme, source: str) -> "Entrez":
+    def setup(cls, scheme: MafScheme, source: str, shared: bool = False) -> "Entrez":
         """
-        Load annotation data
+        Load annotation data, into shared memory tables if `shared`
         """
         curr = cls(scheme, source)
-        with open(curr.source, "r") as fh:
-            tmp = load(fh)
-        curr.gencode = tmp["GENCODE"]
-        curr.ncbi = tmp["NCBI"]
+        curr.gencode = load_table(
+            curr.source, "entrez_gencode", cls.load_mapping("GENCODE"), shared=shared
+        )
+        curr.ncbi = load_table(
+            curr.source, "entrez_ncbi", cls.load_mapping("NCBI"), shared=shared
+        )
         curr.logger.info(
             "Loaded {} GENCODE to ENTREZ mappings".format(len(curr.gencode))
         )
         curr.logger.info("Loaded {} NCBI to ENTREZ mappings".format(len(curr.gencode)))
         return curr
 
+    @staticmethod
+    def load_mapping(key):
+        """
+        Returns a function loading the `key` mapping of an Entrez JSON.
+        """
+
+        def _load(source):
+            with open(source, "r") as fh:
+                return load(fh)[key]
+
+        return _load
+
     def annotate(self, maf_record):
         """
         Annotate provided record with Entrez gene ID if possible
@@ -4,11 +4,12 @@ Implements the gnomAD annotation using the gnomAD VCF.
 
 from __future__ import absolute_import
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 import pysam
 
 from aliquotmaf.converters.builder import get_builder
+from aliquotmaf.regions import Region, cluster_regions
 
 from .annotator import Annotator
 
@@ -32,6 +33,13 @@ GNOMAD_MAF_COLUMNS = GNOMAD_SRC_TO_MAF.values()
 
 
 class GnomAD_VCF(Annotator):
+    reads = ()
+    writes = tuple(GNOMAD_MAF_COLUMNS)
+    io_bound = True
+
+    # Records of a batch closer than this share one query of the gnomAD VCF
+    max_gap = 100
+
     def __init__(self, scheme, source):
         super().__init__(name="GnomAD", scheme=scheme, source=source)
         self.f = None
@@ -49,35 +57,58 @@ class GnomAD_VCF(Annotator):
         """
         Annotate each variant with AF records from GnomAD
         """
-        region = "{0}:{1}-{2}".format(vcf_record.chrom, vcf_record.pos, vcf_record.stop)
-        alt = vcf_record.alleles[var_allele_idx]
-        found = False
-
-        for record in self.f.fetch(region=region):
-            if (
-                vcf_record.pos == record.pos
-                and vcf_record.ref == record.ref
-                and alt in record.alts
-            ):
-                found = True
-                for source_col, maf_col in GNOMAD_SRC_TO_MAF.items():
-                    value = record.info.get(source_col)
-                    default = ""
-
-                    if source_col == "POP_MAX_non_cancer_adj" and value is not None:
-                        value = list(value)
-                        default = []
-
-                    elif isinstance(value, tuple):
-                        value = value[0]
-
-                    maf_record[maf_col] = get_builder(
-                        maf_col, self.scheme, value=value, default=default
-                    )
-
-                break
-
-        if found:
+        return self.annotate_batch([maf_record], [vcf_record], [var_allele_idx])[0]
+
+    def annotate_batch(self, maf_records, vcf_records, var_allele_idxs=None):
+        """
+        Annotates a batch of records, with one query of the gnomAD VCF per
+        cluster of neighbouring records.
+        """
+        if var_allele_idxs is None:
+            var_allele_idxs = [1] * len(maf_records)
+
+        matches = [None] * len(maf_records)
+        regions = [Region(i.chrom, i.pos - 1, i.stop) for i in vcf_records]
+        for cluster, indices in cluster_regions(regions, self.max_gap):
+            by_pos = defaultdict(list)
+            for i in indices:
+                by_pos[vcf_records[i].pos].append(i)
+
+            for record in self.f.fetch(cluster.contig, cluster.start, cluster.end):
+                for i in by_pos.get(record.pos, ()):
+                    vcf_record = vcf_records[i]
+                    if (
+                        matches[i] is None
+                        and vcf_record.ref == record.ref
+                        and vcf_record.alleles[var_allele_idxs[i]] in record.alts
+                    ):
+                        matches[i] = record
+
+        return [
+            self.set_frequencies(maf_record, record)
+            for maf_record, record in zip(maf_records, matches)
+        ]
+
+    def set_frequencies(self, maf_record, record=None):
+        """
+        Sets the gnomAD columns from the matching gnomAD record, or to their
+        defaults without a match.
+        """
+        if record is not None:
+            for source_col, maf_col in GNOMAD_SRC_TO_MAF.items():
+                value = record.info.get(source_col)
+                default = ""
+
+                if source_col == "POP_MAX_non_cancer_adj" and value is not None:
+                    value = list(value)
+                    default = []
+
+                elif isinstance(value, tuple):
+                    value = value[0]
+
+                maf_record[maf_col] = get_builder(
+                    maf_col, self.scheme, value=value, default=default
+                )
             return maf_record
         else:
             for source_col, maf_col in GNOMAD_SRC_TO_MAF.items():
@@ -5,22 +5,35 @@ Implements the hotspots annotation.
 from __future__ import absolute_import
 
 from aliquotmaf.converters.builder import get_builder
+from aliquotmaf.shared_tables import load_table
 
 from .annotator import Annotator
 
 
 class Hotspot(Annotator):
+    reads = ("Hugo_Symbol", "HGVSp_Short")
+    writes = ("hotspot",)
+
     def __init__(self, source, scheme, data):
         super().__init__(name="Hotspot", source=source, scheme=scheme)
         self.data = data
 
     @classmethod
-    def setup(cls, scheme, source):
-        # load the hotspots
+    def setup(cls, scheme, source, shared=False):
+        # load the hotspots, into a shared memory table if shared
+        data = load_table(source, "hotspots", cls.load_hotspots, shared=shared)
+        curr = cls(source, scheme, data)
+        # Counting the hotspots would decode every gene of a shared table
+        curr.logger.info("Loaded the hotspots of {0} genes".format(len(data)))
+        return curr
 
+    @classmethod
+    def load_hotspots(cls, source):
+        """
+        Loads the hotspot TSV as a ``dict`` of gene to change to type.
+        """
         hsdic = {}
         head = []
-        count = 0
         with open(source, "rt") as fh:
             for line in fh:
                 if not head:
@@ -33,10 +46,7 @@ class Hotspot(Annotator):
                     if dat["hugo_symbol"] not in hsdic:
                         hsdic[dat["hugo_symbol"]] = {}
                     hsdic[dat["hugo_symbol"]][dat["change"]] = dat["type"]
-                    count += 1
-        curr = cls(source, scheme, hsdic)
-        curr.logger.info("Loaded {0} hotspots".format(count))
-        return curr
+        return hsdic
 
     def annotate(self, maf_record):
         gene = maf_record["Hugo_Symbol"].value
@@ -11,6 +11,9 @@ from .annotator import Annotator
 
 
 class MutationStatus(Annotator):
+    reads = ()
+    writes = ("Mutation_Status",)
+
     def __init__(self, scheme, caller):
         super().__init__(name="MutationStatus", scheme=scheme)
         self.caller = caller
@@ -28,6 +31,8 @@ class MutationStatus(Annotator):
             variant_callers.SVABA_SOMATIC.GDC_ENUM: self._always_somatic,
             variant_callers.STRELKA_SOMATIC.GDC_ENUM: self._always_somatic,  # needs validation
         }
+        # Bind the status function of the caller once instead of per record
+        self.get_status = self.mapper.get(caller, self._unknown_caller)
 
     @classmethod
     def setup(cls, scheme, caller):
@@ -38,10 +43,14 @@ class MutationStatus(Annotator):
         maf_record["Mutation_Status"] = get_builder(
             "Mutation_Status",
             self.scheme,
-            value=self.mapper[self.caller](vcf_record, tumor_sample),
+            value=self.get_status(vcf_record, tumor_sample),
         )
         return maf_record
 
+    def _unknown_caller(self, record, tumor_sample):
+        """No status function for the caller"""
+        raise KeyError(self.caller)
+
     def _always_somatic(self, record, tumor_sample):
         """Always somatic for MuTect2"""
         return "Somatic"
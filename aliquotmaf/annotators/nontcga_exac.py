@@ -12,6 +12,13 @@ from .annotator import Annotator
 
 
 class NonTcgaExac(Annotator):
+    reads = ()
+    writes = ("nontcga_ExAC_AF", "nontcga_ExAC_AF_Adj") + tuple(
+        "nontcga_ExAC_AF_{0}".format(p)
+        for p in ["AFR", "AMR", "EAS", "FIN", "NFE", "OTH", "SAS"]
+    )
+    io_bound = True
+
     def __init__(self, scheme, source):
         super().__init__(name="NonTcgaExac", source=source, scheme=scheme)
         self.f = None
@@ -7,11 +7,19 @@ from __future__ import absolute_import
 import pysam
 
 from aliquotmaf.converters.builder import get_builder
+from aliquotmaf.regions import Region, cluster_regions
 
 from .annotator import Annotator
 
 
 class ReferenceContext(Annotator):
+    reads = ()
+    writes = ("CONTEXT",)
+    io_bound = True
+
+    # Records of a batch closer than this share one fetch of the reference
+    max_gap = 1000
+
     def __init__(self, source, scheme, context_size=5):
         super().__init__(name="ReferenceContext", source=source, scheme=scheme)
         self.fa = None
@@ -25,24 +33,35 @@ class ReferenceContext(Annotator):
 
     def annotate(self, maf_record, vcf_record, strip_chr=False):
         # Add reference context
-        if strip_chr:
-            region = "{0}:{1}-{2}".format(
-                vcf_record.chrom.replace("chr", "")
-                if vcf_record.chrom != "chrM"
-                else "MT",
-                max(1, vcf_record.pos - self.context_size),
-                vcf_record.stop + self.context_size,
-            )
-        else:
-            region = "{0}:{1}-{2}".format(
-                vcf_record.chrom,
-                max(1, vcf_record.pos - self.context_size),
-                vcf_record.stop + self.context_size,
+        return self.annotate_batch([maf_record], [vcf_record], strip_chr=strip_chr)[0]
+
+    def annotate_batch(self, maf_records, vcf_records, strip_chr=False):
+        """
+        Annotates a batch of records, fetching the reference sequence once
+        per cluster of neighbouring records.
+        """
+        regions = []
+        for vcf_record in vcf_records:
+            contig = vcf_record.chrom
+            if strip_chr:
+                contig = contig.replace("chr", "") if contig != "chrM" else "MT"
+            regions.append(
+                Region(
+                    contig,
+                    max(1, vcf_record.pos - self.context_size) - 1,
+                    vcf_record.stop + self.context_size,
+                )
             )
-        maf_record["CONTEXT"] = get_builder(
-            "CONTEXT", self.scheme, value=self.fa.fetch(region=region)
-        )
-        return maf_record
+
+        for cluster, indices in cluster_regions(regions, self.max_gap):
+            seq = self.fa.fetch(cluster.contig, cluster.start, cluster.end)
+            for i in indices:
+                start = regions[i].start - cluster.start
+                context = seq[start : start + regions[i].end - regions[i].start]
+                maf_records[i]["CONTEXT"] = get_builder(
+                    "CONTEXT", self.scheme, value=context
+                )
+        return maf_records
 
     def shutdown(self):
         self.fa.close()
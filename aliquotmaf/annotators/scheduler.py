@@ -0,0 +1,226 @@
+"""
+Runs the annotators of a batch of records, concurrently where the columns they
+declare allow it.
+
+Each annotator declares the MAF columns it `reads` and `writes`. An annotator
+depends on the earlier annotators writing a column it reads or writes, or
+reading a column it writes. The scheduler groups the annotators into waves of
+annotators that don't depend on each other, and runs the `io_bound` ones of a
+wave, e.g. those doing tabix and FASTA lookups, on a thread pool while the
+others run on the calling thread. Annotators without declarations run in a
+wave of their own.
+
+The annotators of a wave write into a `RecordView` of each record. The columns
+they set are copied to the records in the annotator order at the end of the
+wave, so the records end up as with sequential annotation.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aliquotmaf.logger import Logger
+
+
+class RecordView:
+    """
+    A view of a MAF record keeping the columns set by an annotator apart from
+    the record.
+
+    :param record: the `maflib.record.MafRecord`
+    """
+
+    __slots__ = ("record", "columns")
+
+    def __init__(self, record):
+        self.record = record
+        self.columns = {}
+
+    def __getitem__(self, key):
+        if key in self.columns:
+            return self.columns[key]
+        return self.record[key]
+
+    def __setitem__(self, key, value):
+        self.columns[key] = value
+
+    def __contains__(self, key):
+        return key in self.columns or key in self.record
+
+
+def depends_on(annotator, other):
+    """
+    Checks whether `annotator` must run after the earlier annotator `other`.
+    """
+    if annotator.reads is None or annotator.writes is None:
+        return True
+    if other.reads is None or other.writes is None:
+        return True
+    return bool(
+        set(annotator.reads) & set(other.writes)
+        or set(annotator.writes) & (set(other.reads) | set(other.writes))
+    )
+
+
+class AnnotatorScheduler:
+    """
+    Runs the annotators of batches of records, and measures the speedup of
+    the concurrent runs. With threads, one batch in `sample_interval` runs
+    sequentially, and the speedup is the time per record of these sampled
+    batches over the time per record of the concurrent batches.
+
+    :param threads: the number of threads running the I/O bound annotators.
+        With 0, the annotators run one after the other on the calling thread
+    """
+
+    # One batch in this many runs sequentially to measure the speedup
+    sample_interval = 20
+
+    def __init__(self, threads=0):
+        self.logger = Logger.get_logger(self.__class__.__name__)
+        self.threads = threads
+        self._executor = None
+        self._plans = {}
+        self.reset()
+
+    def reset(self):
+        """Resets the run time measures."""
+        self.batches = 0
+        self.annotator_seconds = 0.0
+        self.elapsed_seconds = 0.0
+        # Elapsed seconds and records of the sequential and concurrent batches
+        self.sequential = [0.0, 0]
+        self.concurrent = [0.0, 0]
+
+    @staticmethod
+    def plan(annotators):
+        """
+        Groups the annotators into waves of annotators not depending on each
+        other, each after the waves of the annotators it depends on.
+
+        :param annotators: the annotators, in the sequential order
+        :return: ``list`` of the ``list`` of the annotator indices of each wave
+        """
+        waves = []
+        wave_of = []
+        for i, annotator in enumerate(annotators):
+            wave = 0
+            for j in range(i):
+                if depends_on(annotator, annotators[j]):
+                    wave = max(wave, wave_of[j] + 1)
+            wave_of.append(wave)
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(i)
+        return waves
+
+    def annotate(self, maf_records, calls):
+        """
+        Annotates a batch of records.
+
+        :param maf_records: ``list`` of the MAF records
+        :param calls: ``list`` of ``(annotator, args, kwargs)`` tuples of the
+            annotators, in the sequential order, and the other arguments of
+            their ``annotate_batch``
+        :return: ``list`` of the annotated records
+        """
+        start = time.perf_counter()
+        n_records = len(maf_records)
+        sequential = not self.threads or (self.batches + 1) % self.sample_interval == 0
+        if sequential:
+            for call in calls:
+                maf_records, seconds = self._run(call, maf_records)
+                self.annotator_seconds += seconds
+        else:
+            for wave in self._get_plan([annotator for annotator, _, _ in calls]):
+                if len(wave) == 1:
+                    maf_records, seconds = self._run(calls[wave[0]], maf_records)
+                    self.annotator_seconds += seconds
+                else:
+                    self._run_wave([calls[i] for i in wave], maf_records)
+
+        elapsed = time.perf_counter() - start
+        measure = self.sequential if sequential else self.concurrent
+        measure[0] += elapsed
+        measure[1] += n_records
+        self.batches += 1
+        self.elapsed_seconds += elapsed
+        return maf_records
+
+    def _get_plan(self, annotators):
+        # The plan only depends on the declarations of the annotators
+        key = tuple((annotator.reads, annotator.writes) for annotator in annotators)
+        if key not in self._plans:
+            self._plans[key] = self.plan(annotators)
+            self.logger.info(
+                "Annotator waves: {0}".format(
+                    [
+                        [annotators[i].__class__.__name__ for i in wave]
+                        for wave in self._plans[key]
+                    ]
+                )
+            )
+        return self._plans[key]
+
+    def _run(self, call, maf_records):
+        annotator, args, kwargs = call
+        start = time.perf_counter()
+        maf_records = annotator.annotate_batch(maf_records, *args, **kwargs)
+        return maf_records, time.perf_counter() - start
+
+    def _run_wave(self, calls, maf_records):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.threads, thread_name_prefix="annotate"
+            )
+
+        views = [[RecordView(record) for record in maf_records] for _ in calls]
+        futures = {}
+        seconds = {}
+        for i, call in enumerate(calls):
+            if call[0].io_bound:
+                futures[i] = self._executor.submit(self._run, call, views[i])
+        for i, call in enumerate(calls):
+            if i not in futures:
+                _, seconds[i] = self._run(call, views[i])
+        for i, future in futures.items():
+            _, seconds[i] = future.result()
+
+        for i, (annotator, _, _) in enumerate(calls):
+            self.annotator_seconds += seconds[i]
+            for view in views[i]:
+                undeclared = set(view.columns) - set(annotator.writes)
+                if undeclared:
+                    raise ValueError(
+                        "{0} set undeclared columns {1}".format(
+                            annotator.__class__.__name__, sorted(undeclared)
+                        )
+                    )
+                for key, value in view.columns.items():
+                    view.record[key] = value
+
+    def stats(self):
+        """
+        Returns the run time measures and the speedup, ``None`` until both a
+        sequential and a concurrent batch ran.
+        """
+        speedup = None
+        seq_seconds, seq_records = self.sequential
+        con_seconds, con_records = self.concurrent
+        if seq_seconds and seq_records and con_seconds and con_records:
+            speedup = round(
+                (seq_seconds / seq_records) / (con_seconds / con_records), 2
+            )
+        return {
+            "threads": self.threads,
+            "batches": self.batches,
+            "sampled_records": seq_records if self.threads else 0,
+            "annotator_seconds": round(self.annotator_seconds, 3),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "speedup": speedup,
+        }
+
+    def shutdown(self):
+        """Shuts down the thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
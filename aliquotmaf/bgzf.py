@@ -0,0 +1,248 @@
+"""
+Blocked GNU Zip Format (BGZF) file handles with multithreaded block
+compression and decompression.
+
+BGZF files are a series of independent gzip members of at most 64KB, so they
+are still readable by any gzip reader while also being seekable by tools such
+as tabix. Every block is (de)compressed on a thread pool; ``zlib`` releases
+the GIL, so this scales with the number of threads.
+
+* BgzfWriter   Writes BGZF files
+* BgzfReader   Reads BGZF files
+* open         Opens a ``.gz`` file for reading or writing
+"""
+
+import builtins
+import gzip
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum amount of uncompressed data per block, the same as htslib
+BLOCK_SIZE = 0xFF00
+
+# The empty block that terminates a BGZF file
+EOF_BLOCK = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+_HEADER = struct.Struct("<4BI2BH2BHH")
+_TRAILER = struct.Struct("<II")
+
+
+def compress_block(data, level=6):
+    """Compresses up to `BLOCK_SIZE` bytes into a single BGZF block."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+    bsize = _HEADER.size + len(cdata) + _TRAILER.size
+    header = _HEADER.pack(
+        0x1F, 0x8B, 8, 4, 0, 0, 0xFF, 6, ord("B"), ord("C"), 2, bsize - 1
+    )
+    return header + cdata + _TRAILER.pack(zlib.crc32(data), len(data))
+
+
+def _decompress_block(block):
+    """
+    Decompresses a block read by `_read_block`, checking the CRC32 and size of
+    the data against the trailer of the block.
+    """
+    cdata, crc, isize = block
+    data = zlib.decompress(cdata, -15)
+    if len(data) != isize or zlib.crc32(data) != crc:
+        raise ValueError("BGZF block fails the CRC32 or size check")
+    return data
+
+
+def _read_block(handle):
+    """
+    Reads the next block from the handle.
+
+    :return: ``tuple`` of the compressed data and the CRC32 and size of the
+        uncompressed data, or ``None`` at the end of the file
+    """
+    header = handle.read(12)
+    if not header:
+        return None
+    if len(header) < 12 or header[:2] != b"\x1f\x8b" or not header[3] & 4:
+        raise ValueError("Not a BGZF block")
+    (xlen,) = struct.unpack("<H", header[10:12])
+    extra = handle.read(xlen)
+    bsize = None
+    i = 0
+    while i < xlen:
+        slen = struct.unpack("<H", extra[i + 2 : i + 4])[0]
+        if extra[i : i + 2] == b"BC":
+            bsize = struct.unpack("<H", extra[i + 4 : i + 6])[0] + 1
+        i += 4 + slen
+    if bsize is None:
+        raise ValueError("Not a BGZF block")
+    data = handle.read(bsize - 12 - xlen)
+    if len(data) != bsize - 12 - xlen or len(data) < _TRAILER.size:
+        raise ValueError("Truncated BGZF block")
+    crc, isize = _TRAILER.unpack(data[-_TRAILER.size :])
+    return data[: -_TRAILER.size], crc, isize
+
+
+def is_bgzf(path):
+    """Checks whether the file at the path starts with a BGZF block."""
+    with builtins.open(path, "rb") as handle:
+        try:
+            return _read_block(handle) is not None
+        except (ValueError, struct.error):
+            return False
+
+
+class BgzfWriter:
+    """
+    Writes a BGZF file. Full blocks are compressed on a pool of `threads`
+    threads and written in order.
+
+    :param path: the output path
+    :param mode: ``"wt"`` for text or ``"wb"`` for bytes
+    :param threads: number of compression threads
+    :param level: zlib compression level
+    :param on_close: optional function called with the path once the file is
+        closed
+    """
+
+    def __init__(self, path, mode="wt", threads=1, level=6, on_close=None):
+        self.path = path
+        self._handle = builtins.open(path, "wb")
+        self._on_close = on_close
+        self._text = "b" not in mode
+        self._level = level
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._max_pending = max(threads, 1) * 4
+        self._executor = ThreadPoolExecutor(threads) if threads > 1 else None
+
+    def write(self, data):
+        self._buffer += data.encode("utf-8") if self._text else data
+        while len(self._buffer) >= BLOCK_SIZE:
+            self._submit(bytes(self._buffer[:BLOCK_SIZE]))
+            del self._buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def _submit(self, data):
+        if self._executor is None:
+            self._handle.write(compress_block(data, self._level))
+            return
+        self._pending.append(self._executor.submit(compress_block, data, self._level))
+        while len(self._pending) > self._max_pending:
+            self._handle.write(self._pending.popleft().result())
+
+    def flush(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._handle.write(self._pending.popleft().result())
+        self._handle.flush()
+
+    def close(self):
+        if self._handle.closed:
+            return
+        try:
+            self.flush()
+            self._handle.write(EOF_BLOCK)
+        finally:
+            self._handle.close()
+            if self._executor is not None:
+                self._executor.shutdown()
+        if self._on_close is not None:
+            self._on_close(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class BgzfReader:
+    """
+    Reads a BGZF file line by line. Blocks are decompressed ahead of the
+    reader on a pool of `threads` threads.
+
+    :param path: the input path
+    :param mode: ``"rt"`` for text or ``"rb"`` for bytes
+    :param threads: number of decompression threads
+    """
+
+    def __init__(self, path, mode="rt", threads=1):
+        self._handle = builtins.open(path, "rb")
+        self._text = "b" not in mode
+        self._threads = threads
+        self._executor = ThreadPoolExecutor(threads) if threads > 1 else None
+        self._lines = self._iter_lines()
+
+    def _iter_blocks(self):
+        if self._executor is None:
+            while True:
+                block = _read_block(self._handle)
+                if block is None:
+                    return
+                yield _decompress_block(block)
+
+        pending = deque()
+        while True:
+            while len(pending) < self._threads * 4:
+                block = _read_block(self._handle)
+                if block is None:
+                    break
+                pending.append(self._executor.submit(_decompress_block, block))
+            if not pending:
+                return
+            yield pending.popleft().result()
+
+    def _iter_lines(self):
+        remainder = b""
+        for data in self._iter_blocks():
+            if not data:
+                continue
+            lines = (remainder + data).split(b"\n")
+            remainder = lines.pop()
+            for line in lines:
+                line += b"\n"
+                yield line.decode("utf-8") if self._text else line
+        if remainder:
+            yield remainder.decode("utf-8") if self._text else remainder
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._lines)
+
+    def readline(self):
+        return next(self._lines, "" if self._text else b"")
+
+    def read(self):
+        return ("" if self._text else b"").join(self._lines)
+
+    def close(self):
+        self._handle.close()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    @property
+    def closed(self):
+        return self._handle.closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open(path, mode="rt", threads=1, **kwargs):
+    """
+    Opens a ``.gz`` file. Files are always written as BGZF, and gzip files
+    that aren't BGZF are read with ``gzip.open``. Extra keyword arguments are
+    passed to `BgzfWriter`.
+    """
+    if mode.startswith("w"):
+        return BgzfWriter(path, mode=mode, threads=threads, **kwargs)
+    if is_bgzf(path):
+        return BgzfReader(path, mode=mode, threads=threads)
+    return gzip.open(path, mode)
@@ -17,7 +17,7 @@ class VariantCallerName:
         return self.GDC_ENUM
 
     def __eq__(self, other):
-        return self.__repr__() == other
+        return self.GDC_ENUM == other
 
 
 @dataclass(frozen=True)
@@ -35,7 +35,9 @@ class InputCollection:
 
     def transform(self, scheme):
         for i in self._from_data:
-            i.__build__(scheme)
+            # Prebuilt data is shared between collections and never rebuilt
+            if i.state != "TRANSFORMED":
+                i.__build__(scheme)
 
     def __iter__(self):
         for i in self._from_data:
@@ -63,6 +65,17 @@ class InputData:
     def __repr__(self):
         return str(self)
 
+    @classmethod
+    def prebuilt(cls, value, column, scheme, default=None):
+        """
+        Creates an already transformed instance. Used for columns that are
+        identical for every record in a run so they are built only once. The
+        transformed column is shared by reference and must not be mutated.
+        """
+        curr = cls(value, column, default=default)
+        curr.__build__(scheme)
+        return curr
+
     def __build__(self, scheme):
         self.transformed = get_builder(
             self.column, scheme, value=self.value, default=self.default
@@ -84,6 +84,12 @@ def format_all_effects(all_effects):
 def format_vcf_columns(vcf_record, vep_key, tumor_idx, normal_idx=None):
     """
     Formats the VCF columns that are stored in the MAF record.
+
+    The annotation INFO keys are removed from a copy of the record before it is
+    serialized, so the often multi-kilobyte CSQ payload is never re-encoded.
+    Every other column is still written by htslib and is byte-identical to the
+    original line. Records from the text engine provide the same columns
+    through ``to_fields``.
     """
     dic = {
         "vcf_region": None,
@@ -92,8 +98,19 @@ def format_vcf_columns(vcf_record, vep_key, tumor_idx, normal_idx=None):
         "vcf_tumor_gt": None,
         "FILTER": None,
     }
-    # Convert pysam object to string representation
-    cols = str(vcf_record).rstrip("\r\n").split("\t")
+    # Drop the annotation keys before converting the pysam object to a string
+    drop_keys = [i for i in {vep_key, "ANN", "CSQ"} if i in vcf_record.info]
+    if hasattr(vcf_record, "to_fields"):
+        # Text engine records format their own columns
+        cols = vcf_record.to_fields(drop_keys)
+    else:
+        if drop_keys:
+            stripped = vcf_record.copy()
+            for key in drop_keys:
+                del stripped.info[key]
+        else:
+            stripped = vcf_record
+        cols = str(stripped).rstrip("\r\n").split("\t")
     dic["vcf_region"] = "{0}:{1}:{2}:{3}:{4}".format(
         vcf_record.chrom,
         vcf_record.pos,
@@ -102,15 +119,9 @@ def format_vcf_columns(vcf_record, vep_key, tumor_idx, normal_idx=None):
         ",".join(list(vcf_record.alts)),
     )
 
-    dic["vcf_info"] = ";".join(
-        [
-            i
-            for i in cols[7].split(";")
-            if not i.startswith(vep_key + "=")
-            and not i.startswith("ANN=")
-            and not i.startswith("CSQ=")
-        ]
-    )
+    # htslib writes an empty INFO as '.', but stripping the annotation keys
+    # from the original column left an empty string
+    dic["vcf_info"] = "" if drop_keys and cols[7] == "." else cols[7]
 
     dic["vcf_format"] = cols[8]
     dic["vcf_tumor_gt"] = cols[tumor_idx]
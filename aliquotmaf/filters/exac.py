@@ -8,9 +8,10 @@ from .filter_base import Filter
 
 
 class ExAC(Filter):
+    tags = ["common_in_exac"]
+
     def __init__(self, cutoff):
         super().__init__(name="CommonInExAC")
-        self.tags = ["common_in_exac"]
         self.cutoff = cutoff
         self.subpops = [
             "nontcga_ExAC_AF_Adj",
@@ -30,14 +31,26 @@ class ExAC(Filter):
         curr = cls(cutoff)
         return curr
 
-    def filter(self, maf_record):
-        flag = False
+    def filter(self, maf_record, locus=None):
+        return self.filter_batch([maf_record])[0]
+
+    def filter_batch(self, maf_records, loci=None):
+        # Test one subpopulation column at a time, on the records that aren't
+        # flagged yet
+        flags = [False] * len(maf_records)
+        pending = list(range(len(maf_records)))
         for subpop in self.subpops:
-            freq = maf_record[subpop].value
-            if freq is not None and freq > self.cutoff:
-                flag = True
+            if not pending:
                 break
-        return flag
+            remaining = []
+            for i in pending:
+                freq = maf_records[i][subpop].value
+                if freq is not None and freq > self.cutoff:
+                    flags[i] = True
+                else:
+                    remaining.append(i)
+            pending = remaining
+        return flags
 
     def shutdown(self):
         pass
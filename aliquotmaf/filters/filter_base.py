@@ -7,12 +7,23 @@ from abc import ABCMeta, abstractmethod
 from aliquotmaf.logger import Logger
 
 
+def column_values(maf_records, key):
+    """
+    Returns the ``list`` of the values of a column of the records.
+    """
+    return [maf_record[key].value for maf_record in maf_records]
+
+
 class Filter(metaclass=ABCMeta):
+    # The GDC_FILTER tags of the filtered records. Filters with tags that
+    # depend on the record set them in `filter`.
+    tags = []
+
     def __init__(self, name=None, source=None):
         self.name = None
         self.source = source
         self.logger = Logger.get_logger(self.__class__.__name__)
-        self.tags = []
+        self.tags = list(self.tags)
 
     @classmethod
     @abstractmethod
@@ -22,10 +33,32 @@ class Filter(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def filter(self, **kwargs):
+    def filter(self, maf_record, locus=None):
         """
         Performs the filter.
+
+        :param maf_record: the `maflib.record.MafRecord` to test
+        :param locus: optional `aliquotmaf.locus.Locus` of the record. Filters
+                      that need coordinates parse ``vcf_region`` when absent.
+        """
+
+    def filter_batch(self, maf_records, loci=None):
+        """
+        Performs the filter on a batch of records. Filters that can share work
+        between the records of a batch override this, the default calls
+        `filter` for each record.
+
+        :param maf_records: ``list`` of `maflib.record.MafRecord` to test
+        :param loci: optional ``list`` of the `aliquotmaf.locus.Locus` of the
+                     records
+        :returns: ``list`` of ``bool``, ``True`` for the filtered records
         """
+        if loci is None:
+            loci = [None] * len(maf_records)
+        return [
+            self.filter(maf_record, locus=locus)
+            for maf_record, locus in zip(maf_records, loci)
+        ]
 
     @abstractmethod
     def shutdown(self):
@@ -6,6 +6,8 @@ from __future__ import absolute_import
 
 import gzip
 
+from aliquotmaf.shared_tables import load_table
+
 from .filter_base import Filter
 
 
@@ -17,8 +19,17 @@ class GdcBlacklist(Filter):
         self.logger.info("Using GDC Blacklist {0}".format(source))
 
     @classmethod
-    def setup(cls, source):
-        # Load blacklist
+    def setup(cls, source, shared=False):
+        # Load blacklist, into a shared memory table if shared
+        data = load_table(source, "gdc_blacklist", cls.load_blacklist, shared=shared)
+        curr = cls(source, data)
+        return curr
+
+    @classmethod
+    def load_blacklist(cls, source):
+        """
+        Loads the blacklist as a ``dict`` of tumor aliquot to tags.
+        """
         data = {}
         head = []
         reader = gzip.open if source.endswith(".gz") else open
@@ -29,12 +40,12 @@ class GdcBlacklist(Filter):
                 head = line.rstrip().lower().split("\t")
                 assert "tumor_aliquot_id" in head, (
                     'Required column "tumor_aliquot_id" missing from blacklist file {0}'.format(
-                        cls.source
+                        source
                     )
                 )
                 assert "tag" in head, (
                     'Required column "tag" missing from blacklist file {0}'.format(
-                        cls.source
+                        source
                     )
                 )
             else:
@@ -50,18 +61,19 @@ class GdcBlacklist(Filter):
                 # Set dict tumor_aliquot_id -> tag
                 if tags:
                     data[aliquot] = tags
+        return data
 
-        curr = cls(source, data)
-        return curr
+    def tags_for(self, tumor_aliquot):
+        """
+        Returns the blacklist tags for a tumor aliquot. The aliquot never
+        changes within a run, so runners can call this once at setup instead
+        of filtering every record.
+        """
+        return list(self.data.get(str(tumor_aliquot), []))
 
-    def filter(self, maf_record):
-        self.tags = []
-        flag = False
-        tumor_aliquot = str(maf_record["Tumor_Sample_UUID"].value)
-        if tumor_aliquot in self.data:
-            self.tags = self.data[tumor_aliquot]
-            flag = True
-        return flag
+    def filter(self, maf_record, locus=None):
+        self.tags = self.tags_for(maf_record["Tumor_Sample_UUID"].value)
+        return bool(self.tags)
 
     def shutdown(self):
         pass
@@ -6,13 +6,20 @@ from __future__ import absolute_import
 
 from pysam import VariantFile
 
+from aliquotmaf.locus import Locus
+from aliquotmaf.regions import Region, cluster_regions
+
 from .filter_base import Filter
 
 
 class GdcPon(Filter):
+    tags = ["gdc_pon"]
+
+    # Records of a batch closer than this share one query of the PON VCF
+    max_gap = 100
+
     def __init__(self, source):
         super().__init__(name="GDCPON", source=source)
-        self.tags = ["gdc_pon"]
         self.f = None
         self.logger.info("Using panel of normal VCF {0}".format(source))
 
@@ -22,14 +29,28 @@ class GdcPon(Filter):
         curr.f = VariantFile(curr.source)
         return curr
 
-    def filter(self, maf_record):
-        vcf_region = maf_record["vcf_region"].value.split(":")
-        pos = int(vcf_region[1])
-        region = "{0}:{1}-{2}".format(vcf_region[0], pos, pos + 1)
-        for record in self.f.fetch(region=region):
-            if record.pos == pos:
-                return True
-        return False
+    def filter(self, maf_record, locus=None):
+        return self.filter_batch([maf_record], None if locus is None else [locus])[0]
+
+    def filter_batch(self, maf_records, loci=None):
+        if loci is None:
+            loci = [
+                Locus.from_vcf_region(maf_record["vcf_region"].value)
+                for maf_record in maf_records
+            ]
+
+        flags = [False] * len(loci)
+        regions = [Region(locus.contig, locus.pos - 1, locus.pos + 1) for locus in loci]
+        for cluster, indices in cluster_regions(regions, self.max_gap):
+            positions = {loci[i].pos for i in indices}
+            found = {
+                record.pos
+                for record in self.f.fetch(cluster.contig, cluster.start, cluster.end)
+                if record.pos in positions
+            }
+            for i in indices:
+                flags[i] = loci[i].pos in found
+        return flags
 
     def shutdown(self):
         self.f.close()
@@ -4,13 +4,14 @@ Applies the "common in non-cancer" gnomAD filter.
 
 from __future__ import absolute_import
 
-from .filter_base import Filter
+from .filter_base import Filter, column_values
 
 
 class FilterGnomAD(Filter):
+    tags = ["common_in_gnomAD"]
+
     def __init__(self, cutoff):
         super().__init__(name="CommonInGnomAD")
-        self.tags = ["common_in_gnomAD"]
         self.cutoff = cutoff
         self.maxAF_field = "gnomAD_non_cancer_MAX_AF_adj"
         self.logger.info(
@@ -22,11 +23,15 @@ class FilterGnomAD(Filter):
         curr = cls(cutoff)
         return curr
 
-    def filter(self, maf_record):
-        freq = maf_record[self.maxAF_field].value
-        if freq is not None and freq > self.cutoff:
-            return True
-        return False
+    def filter(self, maf_record, locus=None):
+        return self.filter_batch([maf_record])[0]
+
+    def filter_batch(self, maf_records, loci=None):
+        cutoff = self.cutoff
+        return [
+            freq is not None and freq > cutoff
+            for freq in column_values(maf_records, self.maxAF_field)
+        ]
 
     def shutdown(self) -> None:
         pass
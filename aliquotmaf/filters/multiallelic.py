@@ -4,13 +4,16 @@ Applies the multiallelic filter.
 
 from __future__ import absolute_import
 
-from .filter_base import Filter
+from aliquotmaf.locus import Locus
+
+from .filter_base import Filter, column_values
 
 
 class Multiallelic(Filter):
+    tags = ["multiallelic"]
+
     def __init__(self):
         super().__init__(name="Multiallelic")
-        self.tags = ["multiallelic"]
         self.logger.info("Loading Multialellic filter")
 
     @classmethod
@@ -18,10 +21,16 @@ class Multiallelic(Filter):
         curr = cls()
         return curr
 
-    def filter(self, maf_record):
-        vcf_region = maf_record["vcf_region"].value.split(":")
-        alleles = set(vcf_region[3].split(",") + vcf_region[4].split(","))
-        return len(alleles) > 2
+    def filter(self, maf_record, locus=None):
+        return self.filter_batch([maf_record], None if locus is None else [locus])[0]
+
+    def filter_batch(self, maf_records, loci=None):
+        if loci is None:
+            loci = [
+                Locus.from_vcf_region(vcf_region)
+                for vcf_region in column_values(maf_records, "vcf_region")
+            ]
+        return [len(set(locus.alleles)) > 2 for locus in loci]
 
     def shutdown(self):
         pass
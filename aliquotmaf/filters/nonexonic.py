@@ -6,13 +6,16 @@ from __future__ import absolute_import
 
 from pysam import TabixFile, asBed
 
+from aliquotmaf.locus import Locus
+
 from .filter_base import Filter
 
 
 class NonExonic(Filter):
+    tags = ["NonExonic"]
+
     def __init__(self, source):
         super().__init__(name="NonExonic", source=source)
-        self.tags = ["NonExonic"]
         self.f = None
         self.logger.info("Using genode exon interval file {0}".format(source))
 
@@ -22,13 +25,13 @@ class NonExonic(Filter):
         curr.f = TabixFile(curr.source, parser=asBed())
         return curr
 
-    def filter(self, maf_record):
+    def filter(self, maf_record, locus=None):
         flag = True
-        vcf_region = maf_record["vcf_region"].value.split(":")
-        pos = int(vcf_region[1])
-        region = "{0}:{1}-{2}".format(vcf_region[0], pos, maf_record["End_Position"])
+        if locus is None:
+            locus = Locus.from_vcf_region(maf_record["vcf_region"].value)
+        end = maf_record["End_Position"].value
         try:
-            for record in self.f.fetch(region=region):
+            for record in self.f.fetch(locus.contig, locus.pos - 1, end):
                 flag = False
                 break
         except ValueError:
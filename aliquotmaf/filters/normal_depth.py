@@ -4,13 +4,14 @@ Applies the normal depth filter
 
 from __future__ import absolute_import
 
-from .filter_base import Filter
+from .filter_base import Filter, column_values
 
 
 class NormalDepth(Filter):
+    tags = ["ndp"]
+
     def __init__(self, cutoff):
         super().__init__(name="NormalDepth")
-        self.tags = ["ndp"]
         self.cutoff = cutoff
         if cutoff is not None:
             self.logger.info("Using normal depth cutoff of {0}".format(cutoff))
@@ -22,11 +23,17 @@ class NormalDepth(Filter):
         curr = cls(cutoff)
         return curr
 
-    def filter(self, maf_record):
+    def filter(self, maf_record, locus=None):
+        return self.filter_batch([maf_record])[0]
+
+    def filter_batch(self, maf_records, loci=None):
         if self.cutoff is None:
-            return False
-        ndp = maf_record["n_depth"].value
-        return ndp is not None and ndp <= self.cutoff
+            return [False] * len(maf_records)
+        cutoff = self.cutoff
+        return [
+            ndp is not None and ndp <= cutoff
+            for ndp in column_values(maf_records, "n_depth")
+        ]
 
     def shutdown(self):
         pass
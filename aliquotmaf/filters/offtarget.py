@@ -6,13 +6,16 @@ from __future__ import absolute_import
 
 from pysam import TabixFile, asBed
 
+from aliquotmaf.locus import Locus
+
 from .filter_base import Filter
 
 
 class OffTarget(Filter):
+    tags = ["off_target"]
+
     def __init__(self, source):
         super().__init__(name="OffTarget", source=source)
-        self.tags = ["off_target"]
         self.fs = []
         self.logger.info("Using interval files {0}".format(", ".join(source)))
 
@@ -22,14 +25,14 @@ class OffTarget(Filter):
         curr.fs = [TabixFile(i, parser=asBed()) for i in curr.source]
         return curr
 
-    def filter(self, maf_record):
+    def filter(self, maf_record, locus=None):
         flag = True
-        vcf_region = maf_record["vcf_region"].value.split(":")
-        pos = int(vcf_region[1])
-        region = "{0}:{1}-{2}".format(vcf_region[0], pos, maf_record["End_Position"])
+        if locus is None:
+            locus = Locus.from_vcf_region(maf_record["vcf_region"].value)
+        end = maf_record["End_Position"].value
         for source in self.fs:
             try:
-                for record in source.fetch(region=region):
+                for record in source.fetch(locus.contig, locus.pos - 1, end):
                     return False
             except ValueError:
                 pass
@@ -0,0 +1,94 @@
+"""
+Immutable locus context shared by the per-record annotation and filtering steps.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# The vcf_region MAF column, with the shortest contig followed by a position,
+# an ID and a REF allele
+_VCF_REGION = re.compile(
+    r"^(?P<contig>.+?):(?P<pos>\d+):[^:]*:(?P<ref>[ACGTNacgtn]+):(?P<alts>.*)$"
+)
+
+
+@dataclass(frozen=True)
+class Locus:
+    """
+    The VCF coordinates of a record, parsed once and handed to filters so they
+    don't need to re-parse the ``vcf_region`` column.
+
+    :param contig: the contig name
+    :param contig_index: the index of the contig in the VCF header, if known
+    :param pos: the 1-based VCF position
+    :param end: the 1-based inclusive end position of the reference allele
+    :param ref: the reference allele
+    :param alts: ``tuple`` of the alternate alleles
+    """
+
+    contig: str
+    contig_index: Optional[int]
+    pos: int
+    end: int
+    ref: str
+    alts: Tuple[str, ...]
+
+    @property
+    def alleles(self) -> Tuple[str, ...]:
+        return (self.ref,) + self.alts
+
+    @property
+    def chrom(self) -> str:
+        """Alias of `contig`, so a locus can stand in for a VCF record."""
+        return self.contig
+
+    @property
+    def stop(self) -> int:
+        """Alias of `end`, so a locus can stand in for a VCF record."""
+        return self.end
+
+    @classmethod
+    def from_vcf_record(cls, vcf_record) -> "Locus":
+        """
+        Creates a locus from a ``~pysam.VariantRecord`` or any object with the
+        same attributes.
+        """
+        return cls(
+            contig=vcf_record.chrom,
+            contig_index=getattr(vcf_record, "rid", None),
+            pos=vcf_record.pos,
+            end=vcf_record.pos + len(vcf_record.ref) - 1,
+            ref=vcf_record.ref,
+            alts=tuple(vcf_record.alts) if vcf_record.alts else (),
+        )
+
+    @classmethod
+    def from_vcf_region(cls, vcf_region, contig_index=None, contig=None) -> "Locus":
+        """
+        Creates a locus from the ``vcf_region`` MAF column formatted as
+        ``chrom:pos:id:ref:alts``.
+
+        :param vcf_region: the ``vcf_region`` value
+        :param contig_index: the index of the contig in the VCF header, if known
+        :param contig: the contig of the record, e.g. the Chromosome column, if
+            known
+        """
+        # Contig names (e.g. HLA) and breakend ALTs can both contain ':', so
+        # the contig is taken from the left up to the position and REF
+        if contig is not None and vcf_region.startswith(contig + ":"):
+            pos, _, ref, alts = vcf_region[len(contig) + 1 :].split(":", 3)
+        else:
+            match = _VCF_REGION.match(vcf_region)
+            if match is None:
+                raise ValueError("Invalid vcf_region {0}".format(vcf_region))
+            contig, pos, ref, alts = match.group("contig", "pos", "ref", "alts")
+        pos = int(pos)
+        return cls(
+            contig=contig,
+            contig_index=contig_index,
+            pos=pos,
+            end=pos + len(ref) - 1,
+            ref=ref,
+            alts=tuple(alts.split(",")),
+        )
@@ -0,0 +1,114 @@
+"""
+Overlap iterator that clusters the per-caller MAF records of a contig at once
+with a sweep over their coordinates, instead of comparing records one by one.
+It yields the same clusters as ``maflib.overlap_iter.LocatableOverlapIterator``
+and can be used in its place.
+"""
+
+from array import array
+from itertools import accumulate
+
+
+class SweepOverlapIterator:
+    """
+    Iterates over clusters of overlapping records of coordinate sorted
+    per-caller MAFs. Each item is a ``list`` with a ``list`` of the records of
+    each input, in input order.
+
+    The records of each contig are loaded into arrays of contig index, start,
+    end and position in the caller's stream. The arrays are sorted by start and
+    the clusters are delimited where a start is past the cumulative maximum
+    end of the preceding records. Only one contig is held in memory at a time.
+
+    :param iters: the per-caller record iterators, e.g. ``MafReader`` instances
+    :param contigs: the ``list`` of contigs in sort order
+    :param peekable_iterator_class: class wrapping each input, e.g.
+        `~aliquotmaf.merging.filtering_iterator.FilteringPeekableIterator`
+    """
+
+    def __init__(self, iters, contigs, peekable_iterator_class=iter):
+        self._iters = [iter(peekable_iterator_class(i)) for i in iters]
+        self._contig_idx = {contig: i for i, contig in enumerate(contigs)}
+        self._heads = [self._next_row(i) for i in range(len(self._iters))]
+        self._clusters = iter(())
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            cluster = next(self._clusters, None)
+            if cluster is not None:
+                return cluster
+            if all(head is None for head in self._heads):
+                raise StopIteration
+            self._clusters = self._load_contig()
+
+    def _next_row(self, caller):
+        """
+        Returns a ``tuple`` of the contig index, start, end and record of the
+        next record of the caller, or ``None`` when the caller is exhausted.
+        """
+        record = next(self._iters[caller], None)
+        if record is None:
+            return None
+        contig = record["Chromosome"].value
+        try:
+            contig_idx = self._contig_idx[contig]
+        except KeyError:
+            raise ValueError("Contig {0} is not in the contig list".format(contig))
+        return (
+            contig_idx,
+            record["Start_Position"].value,
+            record["End_Position"].value,
+            record,
+        )
+
+    def _load_contig(self):
+        """
+        Loads the records of the next contig from all callers and returns an
+        iterator over its clusters.
+        """
+        contig_idx = min(head[0] for head in self._heads if head is not None)
+
+        callers = array("i")
+        starts = array("q")
+        ends = array("q")
+        records = []
+        for caller, head in enumerate(self._heads):
+            last_start = None
+            while head is not None and head[0] == contig_idx:
+                if last_start is not None and head[1] < last_start:
+                    raise ValueError(
+                        "Input {0} is not coordinate sorted".format(caller)
+                    )
+                last_start = head[1]
+                callers.append(caller)
+                starts.append(head[1])
+                ends.append(head[2])
+                records.append(head[3])
+                head = self._next_row(caller)
+            if head is not None and head[0] < contig_idx:
+                raise ValueError("Input {0} is not coordinate sorted".format(caller))
+            self._heads[caller] = head
+
+        return self._iter_clusters(callers, starts, ends, records)
+
+    def _iter_clusters(self, callers, starts, ends, records):
+        """
+        Yields the clusters of the rows of a contig. Rows are stored caller by
+        caller in stream order, so sorted row indices keep the stream order of
+        each caller.
+        """
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        max_ends = list(accumulate((ends[i] for i in order), max))
+
+        begin = 0
+        for k in range(1, len(order) + 1):
+            if k < len(order) and starts[order[k]] <= max_ends[k - 1]:
+                continue
+            cluster = [[] for _ in self._iters]
+            for row in sorted(order[begin:k]):
+                cluster[callers[row]].append(records[row])
+            yield cluster
+            begin = k
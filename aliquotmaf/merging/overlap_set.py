@@ -43,6 +43,12 @@ class OverlapSet:
         """
         return self._data[key]
 
+    def __len__(self):
+        """
+        Returns the total number of records of all callers.
+        """
+        return sum(len(records) for records in self._data.values())
+
     def is_singleton(self):
         """
         Returns ``True`` if only a single variant from a single caller is
@@ -138,3 +144,52 @@ class OverlapSet:
             if len(self[caller]) > 1:
                 return False
         return True
+
+    def split_by_locus(self):
+        """
+        Splits the overlaps into one `OverlapSet` per locus allele key (see
+        `locus_allele_map`), ordered by position. Used to bound the work on very
+        large sets.
+
+        :return: a ``list`` of `OverlapSet` instances
+        """
+        maf_keys = list(self._data)
+        subsets = []
+        for key, records in self.locus_allele_map.items():
+            start, end, _ = key.split(":", 2)
+            result = [records.get(caller, []) for caller in maf_keys]
+            subsets.append(((int(start), int(end), key), OverlapSet(result, maf_keys)))
+        return [subset for _, subset in sorted(subsets, key=lambda x: x[0])]
+
+
+class OverlapSizeHistogram:
+    """
+    Histogram of the number of records in overlap sets with power of two
+    bins: 1, 2, 3-4, 5-8, ...
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self.max_size = 0
+
+    def add(self, size):
+        """Counts an overlap set of `size` records."""
+        upper = 1
+        while upper < size:
+            upper *= 2
+        self._counts[upper] = self._counts.get(upper, 0) + 1
+        self.max_size = max(self.max_size, size)
+
+    def bins(self):
+        """
+        :return: a ``list`` of ``tuples`` of the bin label and count
+        """
+        lst = []
+        for upper in sorted(self._counts):
+            lower = upper // 2 + 1
+            label = str(upper) if lower >= upper else "{0}-{1}".format(lower, upper)
+            lst.append((label, self._counts[upper]))
+        return lst
+
+    def __str__(self):
+        return ", ".join("{0}: {1}".format(label, ct) for label, ct in self.bins())
@@ -0,0 +1,80 @@
+"""
+Partitioning of per-caller MAFs by contig, so that each contig can be merged
+independently. Loci on different contigs never overlap.
+
+* indexed_contigs  The contigs of a tabix indexed MAF
+* split_by_contig  Splits a MAF into one MAF per contig in a single pass
+"""
+
+import os
+
+import pysam
+
+from aliquotmaf.subcommands.utils import get_open_function
+
+
+def indexed_contigs(path):
+    """
+    Returns the contigs with records in the tabix index of the MAF, or
+    ``None`` when the MAF isn't tabix indexed.
+    """
+    if not path.endswith(".gz") or not os.path.exists(path + ".tbi"):
+        return None
+    with pysam.TabixFile(path) as tbx:
+        return list(tbx.contigs)
+
+
+def split_by_contig(path, directory, prefix, contigs, threads=1):
+    """
+    Splits the records of a MAF into one uncompressed MAF per contig, each
+    with the header of the input. The lines are copied as-is, without parsing
+    the records.
+
+    :param path: the input MAF
+    :param directory: the output directory
+    :param prefix: the prefix of the output files
+    :param contigs: the ``list`` of contigs of the MAF header
+    :param threads: number of decompression threads for ``.gz`` inputs
+    :return: a ``tuple`` of a ``dict`` of contig to the path of its MAF, for the
+        contigs with records, and the path of a MAF with only the header
+    """
+    contig_idx = {contig: i for i, contig in enumerate(contigs)}
+
+    header = []
+    handles = {}
+    shards = {}
+    try:
+        with get_open_function(path, threads)(path, "rt") as fh:
+            for line in fh:
+                header.append(line)
+                if not line.startswith("#"):
+                    break
+            chrom_idx = header[-1].rstrip("\r\n").split("\t").index("Chromosome")
+
+            for line in fh:
+                if not line.strip():
+                    continue
+                contig = line.split("\t", chrom_idx + 1)[chrom_idx]
+                handle = handles.get(contig)
+                if handle is None:
+                    if contig not in contig_idx:
+                        raise ValueError(
+                            "Contig {0} of {1} is not in the MAF header".format(
+                                contig, path
+                            )
+                        )
+                    shards[contig] = os.path.join(
+                        directory, "{0}.{1}.maf".format(prefix, contig_idx[contig])
+                    )
+                    handle = open(shards[contig], "wt")
+                    handle.writelines(header)
+                    handles[contig] = handle
+                handle.write(line if line.endswith("\n") else line + "\n")
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    empty = os.path.join(directory, "{0}.header.maf".format(prefix))
+    with open(empty, "wt") as handle:
+        handle.writelines(header)
+    return shards, empty
@@ -19,6 +19,9 @@ class BaseMafRecordMerger(metaclass=ABCMeta):
         self.logger = Logger.get_logger(self.__class__.__name__)
         self.scheme = scheme
         self.columns = scheme.column_names()
+        self.column_indices = [
+            (column, scheme.column_index(name=column)) for column in self.columns
+        ]
 
         self.logger.info("Loading MAF record merger...")
 
@@ -2,6 +2,8 @@
 Maf recorder merger implementation v1.0
 """
 
+import copy
+
 from aliquotmaf.constants import variant_callers
 from aliquotmaf.converters.builder import get_builder
 from aliquotmaf.converters.utils import init_empty_maf_record
@@ -15,6 +17,12 @@ from aliquotmaf.merging.record_merger.mixins import (
 class MafRecordMerger_1_0_0(
     BaseMafRecordMerger, MafMergingAverageColumnsMixin, MafMergingCombineColumnsMixin
 ):
+    def __init__(self, scheme):
+        super(MafRecordMerger_1_0_0, self).__init__(scheme)
+
+        # Per tumor_only, the columns of records merged from a single record
+        self._single_record_plans = {}
+
     def average_columns(self, tumor_only=False):
         """
         :return: a ``tuple`` of column names that should be averaged.
@@ -120,23 +128,12 @@ class MafRecordMerger_1_0_0(
         """
         maf_records = []
 
-        if results.is_singleton():
-            # Simple just extract first element from results for the caller and write
-            maf_records = [
-                self.maf_from_first_element(
-                    results, results.callers, tumor_only=tumor_only
-                )
-            ]
-
-        elif len(results.callers) == 1:
-            # Simply will split the results for the single caller into separate maf records
+        if len(results.callers) == 1:
+            # Singletons and single caller sets: format and write each record
             caller = results.callers[0]
             for variant in results[caller]:
-                dic = {caller: [variant]}
                 maf_records.append(
-                    self.maf_from_first_element(
-                        dic, results.callers, tumor_only=tumor_only
-                    )
+                    self.maf_from_single_record(variant, caller, tumor_only=tumor_only)
                 )
 
         elif len(results.locus_allele_map) == 1:
@@ -242,6 +239,70 @@ class MafRecordMerger_1_0_0(
             maf_dic, callers, star_callers=star_callers, tumor_only=tumor_only
         )
 
+    def single_record_plan(self, tumor_only=False):
+        """
+        Splits the columns by how `maf_from_first_element` fills them when
+        there is a single record.
+
+        :return: a ``tuple`` of the columns copied from the record, the
+            averaged columns, the combined columns and a ``dict`` of the RNA
+            placeholder columns
+        """
+        plan = self._single_record_plans.get(tumor_only)
+        if plan is None:
+            average_columns = self.average_columns(tumor_only=tumor_only)
+            combine_columns = self.combine_columns()
+            copied, averaged, combined, placeholders = [], [], [], {}
+            for column in self.columns:
+                if column in self.allele_columns() or column == "callers":
+                    continue
+                elif column in average_columns:
+                    averaged.append(column)
+                elif column in combine_columns:
+                    combined.append(column)
+                elif column == "RNA_Support":
+                    placeholders[column] = get_builder(
+                        column, self.scheme, value="Unknown"
+                    )
+                elif column in ("RNA_ref_count", "RNA_alt_count", "RNA_depth"):
+                    placeholders[column] = get_builder(column, self.scheme, value=None)
+                else:
+                    copied.append(column)
+            plan = (copied, averaged, combined, placeholders)
+            self._single_record_plans[tumor_only] = plan
+        return plan
+
+    def maf_from_single_record(self, record, caller, tumor_only=False):
+        """
+        Creates a MAF record from a single record, the same as
+        `maf_from_first_element` does for a single caller with a single
+        record. The columns of the record are reused and only the columns that
+        change are rebuilt.
+        """
+        copied, averaged, combined, placeholders = self.single_record_plan(
+            tumor_only=tumor_only
+        )
+
+        maf_dic = {column: record[column] for column in copied}
+        maf_dic.update(placeholders)
+
+        # The mean of a single value is the value itself
+        for column in averaged:
+            col = record[column]
+            value = self.do_mean_to_int([col.value])
+            if value != col.value:
+                col = get_builder(column, self.scheme, value=value)
+            maf_dic[column] = col
+
+        for column in combined:
+            col = record[column]
+            value = self.do_uniq_list([record], column)
+            if value != col.value:
+                col = get_builder(column, self.scheme, value=value)
+            maf_dic[column] = col
+
+        return self.format_dic_to_record(maf_dic, [caller], tumor_only=tumor_only)
+
     def collapse_by_caller_type(self, results, tumor_only=False):
         """
         Use the caller type list to select.
@@ -342,9 +403,11 @@ class MafRecordMerger_1_0_0(
 
         # Create MafRecord
         maf_record = init_empty_maf_record()
-        for column in self.columns:
-            idx = self.scheme.column_index(name=column)
+        for column, idx in self.column_indices:
             col = maf_dic[column]
-            col.column_index = idx
+            if col.column_index != idx:
+                # Columns may be shared with the source record, so copy on write
+                col = copy.copy(col)
+                col.column_index = idx
             maf_record[column] = col
         return maf_record
@@ -0,0 +1,81 @@
+"""
+Bounded reorder window for writing merged records in coordinate order as they
+are produced.
+
+The overlap iterator yields clusters in coordinate order, so merged records
+are only out of order within a cluster. The window holds the most recent
+records and writes the smallest one once it is full, checking that the
+output stays sorted.
+"""
+
+import heapq
+
+
+class ReorderWindowError(ValueError):
+    """Raised when a record arrives after a greater record was written."""
+
+
+class ReorderWindow:
+    """
+    Writes records in coordinate order through a window of at most
+    `max_records` records.
+
+    :param write: function called with each record in order
+    :param contigs: the ``list`` of contigs in sort order
+    :param max_records: the size of the window
+    """
+
+    def __init__(self, write, contigs, max_records=10000):
+        self._write = write
+        self._contig_idx = {contig: i for i, contig in enumerate(contigs)}
+        self._max_records = max_records
+        self._heap = []
+        self._counter = 0
+        self._last_key = None
+        self.written = 0
+
+    def key(self, record):
+        """Returns the sort key of the record."""
+        return (
+            self._contig_idx[record["Chromosome"].value],
+            record["Start_Position"].value,
+            record["End_Position"].value,
+        )
+
+    def add(self, record):
+        """
+        Adds a record, writing the smallest record once the window is full.
+
+        :raises ReorderWindowError: if the record sorts before a record that
+            was already written
+        """
+        key = self.key(record)
+        if self._last_key is not None and key < self._last_key:
+            raise ReorderWindowError(
+                "Record at {0}:{1} sorts before a written record, the reorder "
+                "window of {2} records is too small".format(
+                    record["Chromosome"].value,
+                    record["Start_Position"].value,
+                    self._max_records,
+                )
+            )
+        # The counter keeps records with equal keys in insertion order
+        heapq.heappush(self._heap, (key, self._counter, record))
+        self._counter += 1
+        if len(self._heap) > self._max_records:
+            self._pop()
+
+    def _pop(self):
+        key, _, record = heapq.heappop(self._heap)
+        self._last_key = key
+        self._write(record)
+        self.written += 1
+
+    def flush(self):
+        """Writes all the records in the window."""
+        while self._heap:
+            self._pop()
+
+    def __iadd__(self, record):
+        self.add(record)
+        return self
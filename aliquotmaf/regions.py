@@ -0,0 +1,247 @@
+"""
+Genomic regions used to restrict a run to a subset of loci.
+
+A record is selected by a region when its start position lies in the region,
+so records are never returned twice by overlapping or adjacent regions. All the
+subcommands select on the MAF Start_Position, so a VCF deletion is selected on
+POS + 1 rather than on the position of its padding base.
+"""
+
+import os
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+import pysam
+
+from aliquotmaf import bgzf
+
+# End coordinate used for regions that cover a whole contig
+MAX_END = 2**31 - 1
+
+
+class Region(NamedTuple):
+    """
+    A genomic region with a 0-based start and an exclusive end, as in BED.
+    """
+
+    contig: str
+    start: int
+    end: int
+
+    def contains(self, pos: int) -> bool:
+        """Checks whether the 1-based position lies in the region."""
+        return self.start < pos <= self.end
+
+
+def parse_region(value: str) -> Region:
+    """
+    Parses a samtools-style ``chr``, ``chr:pos`` or ``chr:start-end`` region
+    with 1-based inclusive coordinates.
+    """
+    contig, sep, span = value.strip().rpartition(":")
+    if not sep:
+        return Region(span, 0, MAX_END)
+    start, _, end = span.replace(",", "").partition("-")
+    start = int(start)
+    end = int(end) if end else start
+    if start < 1 or end < start:
+        raise ValueError("Invalid region {0}".format(value))
+    return Region(contig, start - 1, end)
+
+
+def load_bed(path: str) -> List[Region]:
+    """Loads the regions in a BED file."""
+    regions = []
+    open_function = bgzf.open if path.endswith(".gz") else open
+    with open_function(path, "rt") as fh:
+        for line in fh:
+            if not line.strip() or line.startswith(("#", "track", "browser")):
+                continue
+            cols = line.rstrip("\r\n").split("\t")
+            regions.append(Region(cols[0], int(cols[1]), int(cols[2])))
+    return regions
+
+
+def parse_regions(value: Optional[str]) -> List[Region]:
+    """
+    Parses the ``--regions`` option, either a BED file or comma-separated
+    ``chr:start-end`` regions. Returns an empty list when the option is unset.
+
+    :raises ValueError: when the value looks like a path, i.e. contains a
+        ``/`` or has a ``.bed`` or ``.bed.gz`` extension, but isn't a file
+    """
+    if not value:
+        return []
+    if os.path.isfile(value):
+        return load_bed(value)
+    if "/" in value or value.endswith((".bed", ".bed.gz")):
+        raise ValueError("--regions file {0} does not exist".format(value))
+    return [parse_region(i) for i in value.split(",") if i.strip()]
+
+
+def merge_regions(
+    regions: Iterable[Region], contigs: Optional[List[str]] = None
+) -> List[Region]:
+    """
+    Sorts and merges overlapping regions. When `contigs` is given the regions
+    are sorted in that contig order, and regions on other contigs are dropped.
+    """
+    if contigs is not None:
+        order = {contig: i for i, contig in enumerate(contigs)}
+        regions = [i for i in regions if i.contig in order]
+        key = lambda i: (order[i.contig], i.start)
+    else:
+        key = lambda i: (i.contig, i.start)
+
+    merged = []
+    for region in sorted(regions, key=key):
+        last = merged[-1] if merged else None
+        if last and last.contig == region.contig and region.start <= last.end:
+            merged[-1] = last._replace(end=max(last.end, region.end))
+        else:
+            merged.append(region)
+    return merged
+
+
+def cluster_regions(
+    regions: List[Region], max_gap: int = 0
+) -> List[Tuple[Region, List[int]]]:
+    """
+    Groups the regions into clusters of regions less than `max_gap` bp apart,
+    so the records of a batch can be looked up with one query per cluster.
+
+    :param regions: the regions, e.g. one per record of a batch
+    :param max_gap: maximum distance between a region and the end of the
+        cluster it joins
+    :return: ``list`` of ``(cluster, indices)`` tuples of the region spanning
+        a cluster and the indices of its regions
+    """
+    clusters = []
+    for i in sorted(range(len(regions)), key=lambda i: regions[i][:2]):
+        region = regions[i]
+        if clusters:
+            cluster, indices = clusters[-1]
+            if (
+                region.contig == cluster.contig
+                and region.start <= cluster.end + max_gap
+            ):
+                clusters[-1] = (
+                    cluster._replace(end=max(cluster.end, region.end)),
+                    indices,
+                )
+                indices.append(i)
+                continue
+        clusters.append((region, [i]))
+    return clusters
+
+
+def fetch_vcf_records(
+    vcf_object,
+    regions: Optional[List[Region]] = None,
+    start_position: Optional[Callable] = None,
+):
+    """
+    Yields the records of an indexed VCF that start in the regions, or all
+    records when no regions are given.
+
+    :param vcf_object: the indexed VCF
+    :param regions: the regions
+    :param start_position: function returning the 1-based start of a record,
+        e.g. the Start_Position of its MAF record. Defaults to the VCF POS. The
+        start must lie within the REF allele of the record.
+    :raises ValueError: when a region is on a contig missing from the header
+    """
+    if not regions:
+        yield from vcf_object.fetch()
+        return
+
+    if start_position is None:
+        start_position = lambda record: record.pos
+
+    contigs = list(vcf_object.header.contigs)
+    unknown = sorted(set(i.contig for i in regions).difference(contigs))
+    if unknown:
+        raise ValueError(
+            "--regions contigs {0} are not in the VCF header".format(", ".join(unknown))
+        )
+
+    for region in merge_regions(regions, contigs):
+        try:
+            # Records overlapping the region, so those starting before it are
+            # found when their start position lies in it
+            records = vcf_object.fetch(region.contig, region.start, region.end)
+        except ValueError:
+            # The contig has no records in the index
+            continue
+        for record in records:
+            if region.contains(start_position(record)):
+                yield record
+
+
+class MafRegionLines:
+    """
+    Iterates the header lines and then the records that start in the regions
+    of a BGZF compressed and tabix indexed MAF. This is used as the ``lines``
+    of a ``~maflib.reader.MafReader``.
+    """
+
+    def __init__(self, path: str, regions: List[Region], threads: int = 1):
+        try:
+            self._tabix = pysam.TabixFile(path, threads=threads)
+        except OSError as e:
+            raise ValueError(
+                "--regions requires a tabix index for {0}".format(path)
+            ) from e
+        self._header = []
+        with bgzf.open(path, "rt") as fh:
+            for line in fh:
+                self._header.append(line)
+                if not line.startswith("#"):
+                    break
+        columns = self._header[-1].rstrip("\r\n").split("\t")
+        self._start_idx = columns.index("Start_Position")
+        self._regions = merge_regions(regions, list(self._tabix.contigs))
+        self._lines = self._iter_lines()
+
+    def _iter_lines(self):
+        yield from self._header
+        for region in self._regions:
+            for line in self._tabix.fetch(region.contig, region.start, region.end):
+                cols = line.split("\t", self._start_idx + 1)
+                if region.contains(int(cols[self._start_idx])):
+                    yield line + "\n"
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._lines)
+
+    def close(self):
+        self._tabix.close()
+
+
+def index_maf(path: str):
+    """
+    Builds a tabix index on the Chromosome, Start_Position and End_Position
+    columns of a coordinate sorted, BGZF compressed MAF.
+    """
+    line_skip = 0
+    with bgzf.open(path, "rt") as fh:
+        for line in fh:
+            line_skip += 1
+            if not line.startswith("#"):
+                columns = line.rstrip("\r\n").split("\t")
+                break
+        else:
+            return
+
+    pysam.tabix_index(
+        path,
+        force=True,
+        seq_col=columns.index("Chromosome"),
+        start_col=columns.index("Start_Position"),
+        end_col=columns.index("End_Position"),
+        meta_char="#",
+        line_skip=line_skip,
+        zerobased=False,
+    )
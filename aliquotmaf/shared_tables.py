@@ -0,0 +1,308 @@
+"""
+Read-only lookup tables of resource files shared between processes through
+memory mapped files.
+
+The first process loading a resource builds its table in a file of the shared
+memory filesystem (``/dev/shm`` where available). Concurrent and later
+processes using the same resource file map that file read-only and look keys
+up in place, so the node holds a single copy of the table in the page cache
+instead of a private copy per process. Tables are named after the path, size
+and modification time of the resource file, so a modified resource gets a new
+table, and building it removes the tables of the older versions of the file.
+
+Tables are never removed otherwise, so they keep using shared memory until the
+node reboots, even once no process maps them. Remove the
+``aliquotmaf_*.tbl`` files of the table directory, e.g. at the end of a batch
+of jobs, to free that memory. Processes still mapping a removed table keep
+their mapping.
+
+* SharedTable   A ``Mapping`` of ``str`` keys to JSON values in a mapped file
+* load_table    Loads a resource table, shared or private
+* memory_usage  The resident memory of the current process
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Mapping
+
+from aliquotmaf.logger import Logger
+
+
+def default_directory():
+    """Returns the directory of the shared table files."""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+# Cached value of the keys missing from a table
+_MISSING = object()
+
+
+class SharedTable(Mapping):
+    """
+    A read-only ``Mapping`` of ``str`` keys to JSON-serializable values stored
+    in a memory mapped table file.
+
+    The file holds a header, an open addressing hash table of slots and the
+    entries. Each slot is the CRC32 of the key and the offset of its entry, each
+    entry the lengths of the key and JSON value followed by their UTF-8 bytes.
+    Membership tests only compare key bytes, values are decoded on access.
+    Decoded values and missing keys are cached, up to `cache_size` keys, so
+    repeated lookups of a key cost a ``dict`` lookup.
+
+    :param path: the table file, see `create`
+    """
+
+    MAGIC = b"AMTSHT01"
+    HEADER = struct.Struct("<8sQQ")
+    SLOT = struct.Struct("<QQ")
+    ENTRY = struct.Struct("<II")
+
+    # Maximum number of cached lookups per table
+    cache_size = 65536
+
+    logger = Logger.get_logger("SharedTable")
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._n_slots, self._n_items = self.HEADER.unpack_from(self._buf, 0)
+        if magic != self.MAGIC:
+            raise ValueError("{0} is not a shared table".format(path))
+        self._mask = self._n_slots - 1
+        self._cache = {}
+
+    @staticmethod
+    def table_name(source, kind):
+        """
+        Returns the file name of a table of a resource file,
+        ``aliquotmaf_<kind>_<path digest>_<version digest>.tbl``. The version
+        digest changes when the file is modified.
+        """
+        stat = os.stat(source)
+        path_key = "\0".join([kind, os.path.abspath(source)])
+        version_key = "\0".join([str(stat.st_mtime_ns), str(stat.st_size)])
+        return "aliquotmaf_{0}_{1}_{2}.tbl".format(
+            kind,
+            hashlib.blake2b(path_key.encode("utf-8"), digest_size=8).hexdigest(),
+            hashlib.blake2b(version_key.encode("utf-8"), digest_size=4).hexdigest(),
+        )
+
+    @classmethod
+    def remove_stale(cls, path):
+        """
+        Removes the tables of the other versions of the resource file of a
+        table file. Processes still mapping a removed table keep their mapping.
+
+        :param path: the current table file, see `table_name`
+        """
+        directory, name = os.path.split(path)
+        prefix = name.rsplit("_", 1)[0] + "_"
+        for other in os.listdir(directory):
+            if other.startswith(prefix) and other.endswith(".tbl") and other != name:
+                try:
+                    os.unlink(os.path.join(directory, other))
+                except FileNotFoundError:
+                    continue
+                cls.logger.info("Removed stale shared table {0}".format(other))
+
+    @classmethod
+    def create(cls, path, data):
+        """
+        Writes the table of the data to the path. The file is written under a
+        temporary name and renamed, so processes never map a partial table.
+
+        :param path: the table file
+        :param data: a ``Mapping`` of ``str`` keys to JSON-serializable values,
+            or an iterable of ``str`` keys, e.g. a ``set``, mapped to ``None``
+        """
+        if not isinstance(data, Mapping):
+            data = dict.fromkeys(data)
+
+        entries = [
+            (key.encode("utf-8"), json.dumps(value, separators=(",", ":")).encode())
+            for key, value in data.items()
+        ]
+        n_slots = 8
+        while n_slots < 2 * len(entries):
+            n_slots *= 2
+
+        entries_start = cls.HEADER.size + n_slots * cls.SLOT.size
+        buf = bytearray(
+            entries_start
+            + sum(cls.ENTRY.size + len(key) + len(value) for key, value in entries)
+        )
+        cls.HEADER.pack_into(buf, 0, cls.MAGIC, n_slots, len(entries))
+
+        offset = entries_start
+        mask = n_slots - 1
+        for key, value in entries:
+            key_hash = zlib.crc32(key)
+            i = key_hash & mask
+            while cls.SLOT.unpack_from(buf, cls.HEADER.size + i * cls.SLOT.size)[1]:
+                i = (i + 1) & mask
+            slot = cls.HEADER.size + i * cls.SLOT.size
+            cls.SLOT.pack_into(buf, slot, key_hash, offset)
+
+            cls.ENTRY.pack_into(buf, offset, len(key), len(value))
+            offset += cls.ENTRY.size
+            buf[offset : offset + len(key)] = key
+            offset += len(key)
+            buf[offset : offset + len(value)] = value
+            offset += len(value)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(buf)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return cls(path)
+
+    @classmethod
+    def from_source(cls, source, kind, build, directory=None):
+        """
+        Maps the shared table of a resource file, building it first if needed.
+
+        :param source: the resource file
+        :param kind: the kind of table, for resource files with several tables
+        :param build: function returning the data of the table, see `create`
+        :param directory: the directory of the table files, see
+            `default_directory`
+        """
+        path = os.path.join(
+            directory or default_directory(), cls.table_name(source, kind)
+        )
+        try:
+            table = cls(path)
+            action = "Mapped"
+        except FileNotFoundError:
+            table = cls.create(path, build())
+            cls.remove_stale(path)
+            action = "Created"
+        cls.logger.info(
+            "{0} shared {1} table {2} of {3} items".format(
+                action, kind, path, len(table)
+            )
+        )
+        return table
+
+    def _find(self, key):
+        """Returns the offset of the entry of the key, or -1."""
+        if not isinstance(key, str):
+            return -1
+        key = key.encode("utf-8")
+        key_hash = zlib.crc32(key)
+        i = key_hash & self._mask
+        while True:
+            slot_hash, offset = self.SLOT.unpack_from(
+                self._buf, self.HEADER.size + i * self.SLOT.size
+            )
+            if not offset:
+                return -1
+            if slot_hash == key_hash:
+                key_len, _ = self.ENTRY.unpack_from(self._buf, offset)
+                start = offset + self.ENTRY.size
+                if key_len == len(key) and self._buf[start : start + key_len] == key:
+                    return offset
+            i = (i + 1) & self._mask
+
+    def _lookup(self, key):
+        """Returns the decoded value of the key, or `_MISSING`."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return _MISSING
+
+        offset = self._find(key)
+        if offset < 0:
+            value = _MISSING
+        else:
+            key_len, value_len = self.ENTRY.unpack_from(self._buf, offset)
+            start = offset + self.ENTRY.size + key_len
+            value = json.loads(self._buf[start : start + value_len])
+        if len(self._cache) < self.cache_size:
+            self._cache[key] = value
+        return value
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def __iter__(self):
+        for i in range(self._n_slots):
+            _, offset = self.SLOT.unpack_from(
+                self._buf, self.HEADER.size + i * self.SLOT.size
+            )
+            if offset:
+                key_len, _ = self.ENTRY.unpack_from(self._buf, offset)
+                start = offset + self.ENTRY.size
+                yield self._buf[start : start + key_len].decode("utf-8")
+
+    def __len__(self):
+        return self._n_items
+
+    def __reduce__(self):
+        # Processes receiving a table map the same file
+        return (self.__class__, (self.path,))
+
+
+def load_table(source, kind, load, shared=False):
+    """
+    Loads a read-only table of a resource file.
+
+    :param source: the resource file
+    :param kind: the kind of table
+    :param load: function loading the table from the file, returning a
+        ``dict`` or ``set`` of ``str`` keys
+    :param shared: map a `SharedTable` instead of loading a private copy
+    """
+    if not shared:
+        return load(source)
+    return SharedTable.from_source(source, kind, lambda: load(source))
+
+
+def memory_usage():
+    """
+    Returns a ``dict`` of the resident memory of the current process in kB:
+    the total ``rss`` and its ``anon`` private, ``file`` backed and ``shmem``
+    shared memory parts. Shared tables count as ``shmem``. Empty where
+    ``/proc`` isn't available.
+    """
+    fields = {
+        "VmRSS": "rss",
+        "RssAnon": "anon",
+        "RssFile": "file",
+        "RssShmem": "shmem",
+    }
+    usage = {}
+    try:
+        with open("/proc/self/status", "rt") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
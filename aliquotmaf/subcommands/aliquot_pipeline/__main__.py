@@ -0,0 +1,68 @@
+"""
+Subcommand for converting the caller VCFs of an aliquot to merged and masked
+MAFs in one process.
+"""
+
+from aliquotmaf.subcommands.aliquot_pipeline.runners import (
+    GDC_2_0_0_Aliquot_Pipeline,
+)
+from aliquotmaf.subcommands.base import Subcommand
+from aliquotmaf.subcommands.utils import add_io_arguments
+
+
+class AliquotPipeline(Subcommand):
+    @classmethod
+    def __add_arguments__(cls, parser):
+        """Add the arguments to the parser"""
+        # Input group
+        p_input = parser.add_argument_group(title="Input/Output Options")
+        p_input.add_argument(
+            "--merged_output_maf",
+            default=None,
+            help="Path to output merged MAF file",
+        )
+        p_input.add_argument(
+            "--masked_output_maf",
+            default=None,
+            help="Path to output merged and masked MAF file",
+        )
+        p_input.add_argument(
+            "--raw_output_dir",
+            default=None,
+            help="Optional directory to also write the raw aliquot MAF of each "
+            "caller to, for debugging",
+        )
+        add_io_arguments(p_input, "indexed VCFs")
+
+        # subparsers
+        subparsers = parser.add_subparsers(dest="subcommand")
+        subparsers.required = True
+
+        GDC_2_0_0_Aliquot_Pipeline.add(subparsers=subparsers)
+
+    @classmethod
+    def __get_description__(cls):
+        """
+        Optionally returns description
+        """
+        return (
+            "Convert the caller VCFs of an aliquot to merged and masked MAFs "
+            "in one process"
+        )
+
+    @classmethod
+    def __tool_name__(cls):
+        """
+        Tool name to use for the subparser
+        """
+        return cls.__name__
+
+    @classmethod
+    def add(cls, subparsers):
+        """Adds the given subcommand to the subparsers."""
+        subparser = subparsers.add_parser(
+            name=cls.__tool_name__(), description=cls.__get_description__()
+        )
+
+        cls.__add_arguments__(subparser)
+        return subparser
@@ -0,0 +1,238 @@
+"""
+Main logic for converting all the caller VCFs of an aliquot to merged and
+masked MAFs for spec gdc-2.0.0-aliquot-merged(-masked) in one process.
+
+Each caller VCF is converted to a sorted stream of raw aliquot MAF records that
+is fed directly into the overlap and merge engine, and every merged record is
+masked in flight. Only the requested outputs are written. If the reorder
+window overflows, the VCFs are converted again and the merged records sorted.
+"""
+
+import os
+
+from maflib.sort_order import BarcodesAndCoordinate
+from maflib.sorter import MafSorter
+from maflib.validation import ValidationStringency
+
+from aliquotmaf.constants import VariantCallerName, variant_callers
+from aliquotmaf.merging.reorder_window import ReorderWindow, ReorderWindowError
+from aliquotmaf.subcommands.aliquot_pipeline.runners import BaseRunner
+from aliquotmaf.subcommands.mask_merged_aliquot.runners import (
+    GDC_2_0_0_Aliquot_Merged_Masked,
+)
+from aliquotmaf.subcommands.merge_aliquot.runners import GDC_2_0_0_Aliquot_Merged
+from aliquotmaf.subcommands.utils import maf_writer_from
+from aliquotmaf.subcommands.vcf_to_aliquot.runners import GDC_2_0_0_Aliquot
+
+
+class GDC_2_0_0_Aliquot_Pipeline(BaseRunner):
+    @classmethod
+    def __validate_options__(cls, options):
+        """Validates the caller VCFs, outputs and tumor only stuff"""
+        if not options.merged_output_maf and not options.masked_output_maf:
+            raise ValueError(
+                "At least one of --merged_output_maf and --masked_output_maf "
+                "is required"
+            )
+
+        seen = set()
+        for caller_id, _, _ in options.caller_vcf:
+            if caller_id not in variant_callers.astuple():
+                raise ValueError("Unknown variant caller {0}".format(caller_id))
+            if caller_id in [variant_callers.STRELKA_SOMATIC, variant_callers.VARDICT]:
+                raise ValueError("Variant caller {0} not implemented".format(caller_id))
+            if caller_id in seen:
+                raise ValueError("Variant caller {0} given twice".format(caller_id))
+            seen.add(caller_id)
+
+        GDC_2_0_0_Aliquot.validate_sample_options(options)
+
+    @classmethod
+    def __add_arguments__(cls, parser):
+        """Add the arguments to the parser"""
+        vcf = GDC_2_0_0_Aliquot.add_vcf_arguments(parser)
+        vcf.add_argument(
+            "--caller_vcf",
+            nargs=3,
+            action="append",
+            required=True,
+            metavar=("CALLER_ID", "SRC_VCF_UUID", "VCF"),
+            help="A caller VCF of the aliquot, with the name of the caller and "
+            + "the UUID of the VCF. Use once per caller.",
+        )
+
+        GDC_2_0_0_Aliquot.add_sample_arguments(parser)
+        GDC_2_0_0_Aliquot.add_annotation_arguments(parser)
+        GDC_2_0_0_Aliquot.add_filter_arguments(parser)
+
+        merge = parser.add_argument_group(title="Merging Options")
+        GDC_2_0_0_Aliquot_Merged.add_merging_arguments(merge)
+
+        mask = parser.add_argument_group(title="Masking Options")
+        GDC_2_0_0_Aliquot_Merged_Masked.add_masking_arguments(mask)
+
+    def do_work(self):
+        """Main wrapper function for running the aliquot pipeline"""
+        window_size = self.options.get("reorder_window", 0)
+        raw_dir = self.options.get("raw_output_dir")
+
+        converters = self.get_converters()
+        try:
+            raw_mafs = [
+                os.path.join(raw_dir, "{0}.raw.maf.gz".format(caller))
+                if raw_dir
+                else None
+                for caller, _ in converters
+            ]
+            try:
+                self.convert_and_run(converters, raw_mafs, window_size)
+                return
+            except ReorderWindowError as e:
+                self.logger.warning(e)
+                self.logger.warning(
+                    "Falling back to converting the VCFs again and sorting the "
+                    "merged records"
+                )
+
+            # The window only overflows in rare clusters of records, so the
+            # VCFs are converted again rather than keeping the raw records of
+            # every run
+            self.convert_and_run(converters, raw_mafs, 0)
+
+        finally:
+            self.shutdown_converters(converters)
+
+    def convert_and_run(self, converters, raw_mafs, window_size):
+        """
+        Converts the caller VCFs and merges and masks their sorted records,
+        see `run`.
+
+        :param converters: the converters, see `get_converters`
+        :param raw_mafs: the raw aliquot MAF to write for each converter, or
+            ``None``
+        :param window_size: the size of the reorder window
+        """
+        streams = []
+        try:
+            for (caller, converter), raw_maf in zip(converters, raw_mafs):
+                self.logger.info(
+                    "{0} VCF {1}".format(caller, converter.options["input_vcf"])
+                )
+                streams.append(converter.iter_sorted_records(output_maf=raw_maf))
+            self.run(converters, streams, window_size)
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def get_converters(self):
+        """
+        Creates a VCF converter per caller VCF. The annotators and filters only
+        depend on the shared options, except for the caller of the mutation
+        status, so the converters share one set of them as the jobs of a batch
+        do.
+
+        :return: a ``list`` of ``tuples`` of the caller and the converter
+        """
+        converters = []
+        for caller_id, src_vcf_uuid, path in self.options["caller_vcf"]:
+            options = dict(
+                self.options,
+                input_vcf=path,
+                caller_id=caller_id,
+                src_vcf_uuid=src_vcf_uuid,
+                checkpoint_dir=None,
+            )
+            converters.append(
+                (VariantCallerName(caller_id).snake(), GDC_2_0_0_Aliquot(options))
+            )
+
+        shared = converters[0][1]
+        shared.load_resources()
+        for _, converter in converters[1:]:
+            converter.annotators = dict(shared.annotators)
+            converter.filters = dict(shared.filters)
+            converter._resources_loaded = True
+        return converters
+
+    def shutdown_converters(self, converters):
+        """
+        Shuts down the shared annotators and the caller annotators of the
+        converters.
+        """
+        shared = converters[0][1]
+        for _, converter in converters[1:]:
+            for key, annotator in converter.annotators.items():
+                if annotator and annotator is not shared.annotators.get(key):
+                    annotator.shutdown()
+            converter.annotator_scheduler.shutdown()
+        shared.shutdown_annotators()
+
+    def run(self, converters, inputs, window_size):
+        """
+        Merges and masks the sorted raw aliquot MAF records of each caller.
+        The merged records go through a reorder window of `window_size`
+        records, or a ``MafSorter`` when it is 0.
+
+        :param converters: the converters, see `get_converters`
+        :param inputs: the iterators of the sorted records of each converter
+        :param window_size: the size of the reorder window
+        """
+        # Merger, fed directly by the converted records. It also masks the
+        # merged records for --masked_output_maf
+        converters[0][1].setup_maf_header()
+        merger = GDC_2_0_0_Aliquot_Merged(dict(self.options))
+        merger.maf_readers = inputs
+        merger.callers = [caller for caller, _ in converters]
+        merger.setup_maf_header(source_header=converters[0][1].maf_header)
+
+        sorter = None
+        try:
+            # Writers
+            if self.options["merged_output_maf"]:
+                merger.maf_writer = maf_writer_from(
+                    path=self.options["merged_output_maf"],
+                    threads=self.options.get("io_threads", 1),
+                    header=merger.maf_header,
+                    validation_stringency=ValidationStringency.Strict,
+                )
+            merger.setup_masker()
+
+            counter = 0
+            if window_size:
+                window = ReorderWindow(
+                    merger.write_record,
+                    merger.maf_header.contigs(),
+                    max_records=window_size,
+                )
+                for maf_record in merger.iter_merged_records():
+                    window += maf_record
+                window.flush()
+                counter = window.written
+            else:
+                sorter = MafSorter(
+                    max_objects_in_ram=100000,
+                    sort_order_name=BarcodesAndCoordinate.name(),
+                    scheme=merger.maf_header.scheme(),
+                    contigs=merger.maf_header.contigs(),
+                )
+                for maf_record in merger.iter_merged_records():
+                    sorter += maf_record
+                for maf_record in sorter:
+                    merger.write_record(maf_record)
+                    counter += 1
+
+            self.logger.info("Finished writing {0} merged records.".format(counter))
+
+        finally:
+            if sorter:
+                sorter.close()
+
+            if merger.maf_writer:
+                merger.maf_writer.close()
+            merger.close_masker()
+
+        merger.report_masking()
+
+    @classmethod
+    def __tool_name__(cls):
+        return "gdc-2.0.0-aliquot-pipeline"
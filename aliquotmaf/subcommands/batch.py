@@ -0,0 +1,191 @@
+"""
+Batch mode for running many jobs of a runner in one process, or in a pool of
+processes, so that the resources of the runner are loaded once per process
+instead of once per job.
+
+* add_batch_arguments  Adds the --manifest options of a subcommand
+* read_manifest  Reads the jobs of a manifest TSV
+* run_jobs       Runs the jobs in the current process or in a process pool
+* write_status   Writes the per-job status report
+* run_batch      Runs the jobs of the --manifest of a runner and reports them
+
+A runner supporting batch mode implements ``run_job(job)``, which runs a job
+given as a ``dict`` of options and returns a ``dict`` of job results.
+"""
+
+import json
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# The runner of a pool worker process, set up once by `init_worker`
+_worker = None
+
+
+def add_batch_arguments(parser, manifest_help, job_name):
+    """
+    Adds the ``--manifest``, ``--processes`` and ``--status_json`` options of
+    the subcommands supporting batch mode.
+
+    :param parser: the parser of the subcommand
+    :param manifest_help: the help of ``--manifest``
+    :param job_name: what a job of the manifest is, e.g. ``"VCF"``
+    """
+    p_batch = parser.add_argument_group(title="Batch Options")
+    p_batch.add_argument("--manifest", default=None, help=manifest_help)
+    p_batch.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of processes running the {0}s of the manifest [1]".format(
+            job_name
+        ),
+    )
+    p_batch.add_argument(
+        "--status_json",
+        default=None,
+        help="Path to the per-{0} status report of the manifest. Printed "
+        "when not given".format(job_name),
+    )
+
+
+def read_manifest(path, columns, required):
+    """
+    Reads the jobs of a tab-separated manifest with a header line. Empty cells
+    are left out of the jobs, so they fall back to the command line options.
+
+    :param path: the manifest TSV
+    :param columns: the allowed columns
+    :param required: the columns that must be set for every job
+    :return: a ``list`` of ``dict`` of column to value, one per job
+    :raises ValueError: for unknown or missing columns, and missing values
+    """
+    jobs = []
+    with open(path, "rt") as fh:
+        header = fh.readline().rstrip("\r\n").split("\t")
+        unknown = [i for i in header if i not in columns]
+        if unknown:
+            raise ValueError(
+                "Unknown manifest columns {0}, expected {1}".format(
+                    ", ".join(unknown), ", ".join(columns)
+                )
+            )
+        missing = [i for i in required if i not in header]
+        if missing:
+            raise ValueError(
+                "Missing manifest columns {0}".format(", ".join(missing))
+            )
+
+        for line_number, line in enumerate(fh, start=2):
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            values = line.split("\t")
+            if len(values) != len(header):
+                raise ValueError(
+                    "Line {0} of the manifest has {1} columns, expected {2}".format(
+                        line_number, len(values), len(header)
+                    )
+                )
+            job = {key: value for key, value in zip(header, values) if value}
+            for key in required:
+                if key not in job:
+                    raise ValueError(
+                        "Line {0} of the manifest has no {1}".format(line_number, key)
+                    )
+            jobs.append(job)
+    return jobs
+
+
+def init_worker(runner_class, options):
+    """Sets up the runner of a pool worker process."""
+    global _worker
+    _worker = runner_class(options)
+
+
+def run_job(job, runner=None):
+    """
+    Runs a job with the runner, or the runner of the worker process.
+
+    :return: a ``dict`` of the job, its status, run time and results. The
+        status is ``"failed"``, with the error, if the job raised an exception
+    """
+    runner = runner or _worker
+    start = time.monotonic()
+    status = dict(job)
+    try:
+        status.update(runner.run_job(job))
+        status.setdefault("status", "ok")
+    except Exception as e:
+        runner.logger.error(traceback.format_exc())
+        status["status"] = "failed"
+        status["error"] = "{0}: {1}".format(e.__class__.__name__, e)
+    status["seconds"] = round(time.monotonic() - start, 3)
+    return status
+
+
+def run_jobs(runner, jobs, processes=1):
+    """
+    Runs the jobs with the runner, or with `processes` worker processes each
+    set up once with the options of the runner.
+
+    :return: the ``list`` of job statuses, in job order
+    """
+    if processes <= 1:
+        return [run_job(job, runner) for job in jobs]
+
+    # Options such as the argparse entry point can't be pickled
+    options = {k: v for k, v in runner.options.items() if k != "func"}
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=init_worker,
+        initargs=(runner.__class__, options),
+    ) as pool:
+        return list(pool.map(run_job, jobs))
+
+
+def write_status(path, statuses, **extra):
+    """
+    Writes the status report of the jobs as JSON, or prints it when no path is
+    given.
+
+    :param path: optional output JSON
+    :param statuses: the ``list`` of job statuses returned by `run_jobs`
+    :param extra: additional top-level items of the report
+    :return: the number of failed jobs
+    """
+    failed = sum(1 for i in statuses if i["status"] == "failed")
+    report = dict(extra, jobs=statuses, total=len(statuses), failed=failed)
+    if path:
+        with open(path, "wt") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    return failed
+
+
+def run_batch(runner, columns, required):
+    """
+    Runs the jobs of the ``manifest`` option of the runner with ``processes``
+    processes and writes the status report to the ``status_json`` option.
+
+    :param runner: the runner, see `run_jobs`
+    :param columns: the allowed manifest columns
+    :param required: the manifest columns that must be set for every job
+    :return: the ``list`` of job statuses
+    :raises ValueError: if any job failed
+    """
+    jobs = read_manifest(runner.options["manifest"], columns, required)
+    processes = runner.options.get("processes", 1)
+    runner.logger.info(
+        "Running {0} jobs with {1} processes...".format(len(jobs), processes)
+    )
+
+    statuses = run_jobs(runner, jobs, processes=processes)
+
+    failed = write_status(runner.options.get("status_json"), statuses)
+    if failed:
+        raise ValueError(
+            "{0} of {1} jobs failed, see the status report".format(failed, len(jobs))
+        )
+    return statuses
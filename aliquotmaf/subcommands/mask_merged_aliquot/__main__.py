@@ -3,10 +3,12 @@ Subcommand for masking/filtering a merged aliquot MAF.
 """
 
 from aliquotmaf.subcommands.base import Subcommand
+from aliquotmaf.subcommands.batch import add_batch_arguments
 from aliquotmaf.subcommands.mask_merged_aliquot.runners import (
     GDC_1_0_0_Aliquot_Merged_Masked,
     GDC_2_0_0_Aliquot_Merged_Masked,
 )
+from aliquotmaf.subcommands.utils import add_io_arguments
 
 
 class MaskMergedAliquotMaf(Subcommand):
@@ -16,10 +18,21 @@ class MaskMergedAliquotMaf(Subcommand):
         # Input group
         p_input = parser.add_argument_group(title="Input/Output Options")
         p_input.add_argument(
-            "--input_maf", required=True, help="Path to input protected MAF file"
+            "--input_maf",
+            help="Path to input protected MAF file. Required without --manifest",
         )
         p_input.add_argument(
-            "--output_maf", required=True, help="Path to output public MAF file"
+            "--output_maf",
+            help="Path to output public MAF file. Required without --manifest",
+        )
+        add_io_arguments(p_input, "a tabix indexed MAF")
+
+        # Batch group
+        add_batch_arguments(
+            parser,
+            "Mask the merged MAFs listed in this TSV in one run. The "
+            "header line names the input_maf and output_maf columns",
+            "aliquot",
         )
 
         # subparsers
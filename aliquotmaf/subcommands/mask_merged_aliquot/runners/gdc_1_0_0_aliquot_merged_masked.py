@@ -6,17 +6,29 @@ gdc-1.0.0-aliquot-merged-masked.
 import json
 
 from maflib.header import MafHeader
-from maflib.reader import MafReader
 from maflib.sort_order import BarcodesAndCoordinate
 from maflib.validation import ValidationStringency
-from maflib.writer import MafWriter
 
 from aliquotmaf.converters.builder import get_builder
 from aliquotmaf.converters.utils import get_columns_from_header, init_empty_maf_record
+from aliquotmaf.metrics.metrics_collection import MafMetricsCollection
+from aliquotmaf.regions import parse_regions
+from aliquotmaf.subcommands.batch import read_manifest, run_batch
 from aliquotmaf.subcommands.mask_merged_aliquot.runners import BaseRunner
+from aliquotmaf.subcommands.utils import maf_reader_from, maf_writer_from
 
 
 class GDC_1_0_0_Aliquot_Merged_Masked(BaseRunner):
+    # GDC_FILTER tags allowed on hotspots
+    hotspot_gdc_filters = frozenset(["gdc_pon", "common_in_exac"])
+
+    # Options set per aliquot in the --manifest
+    manifest_columns = ("input_maf", "output_maf")
+
+    # Masking loads no resources, so no option needs a runner of its own on a
+    # job server
+    resource_options = ()
+
     def __init__(self, options=dict()):
         super(GDC_1_0_0_Aliquot_Merged_Masked, self).__init__(options)
 
@@ -24,6 +36,18 @@ class GDC_1_0_0_Aliquot_Merged_Masked(BaseRunner):
         self.options["version"] = "gdc-1.0.0"
         self.options["annotation"] = "gdc-1.0.0-aliquot-merged-masked"
 
+    @classmethod
+    def __validate_options__(cls, options):
+        """Validates the input/output or the manifest"""
+        if options.manifest:
+            read_manifest(options.manifest, cls.manifest_columns, cls.manifest_columns)
+            return
+
+        if options.input_maf is None:
+            raise ValueError("--input_maf is required")
+        if options.output_maf is None:
+            raise ValueError("--output_maf is required")
+
     @classmethod
     def __add_arguments__(cls, parser):
         """Add the arguments to the parser"""
@@ -35,6 +59,11 @@ class GDC_1_0_0_Aliquot_Merged_Masked(BaseRunner):
             required=False,
             help="Path to the reference fasta fai file if the input MAF is not sorted",
         )
+        cls.add_masking_arguments(parser)
+
+    @classmethod
+    def add_masking_arguments(cls, parser):
+        """Adds the options of the masking rules."""
         parser.add_argument(
             "--min_callers",
             default=2,
@@ -42,14 +71,17 @@ class GDC_1_0_0_Aliquot_Merged_Masked(BaseRunner):
             help="Minimum number of callers required [2]",
         )
 
-    def setup_maf_header(self):
+    def setup_maf_header(self, source_header=None):
         """
         Sets up the maf header.
+
+        :param source_header: the header of the merged MAF, read from the input
+            MAF when not given
         """
         # Reader header
-        _hdr = MafHeader.from_reader(reader=self.maf_reader)
+        _hdr = source_header or MafHeader.from_reader(reader=self.maf_reader)
 
-        if not self.options["reference_fasta_index"]:
+        if not self.options.get("reference_fasta_index"):
             self.maf_header = MafHeader.from_defaults(
                 version=self.options["version"],
                 annotation=self.options["annotation"],
@@ -78,15 +110,50 @@ class GDC_1_0_0_Aliquot_Merged_Masked(BaseRunner):
         tkey = _hdr["tumor.aliquot"]
         self.maf_header["tumor.aliquot"] = tkey
 
+        self._scheme = self.maf_header.scheme()
+        self._columns = get_columns_from_header(self.maf_header)
+        self._colset = set(self._columns)
+
     def do_work(self):
         """Main wrapper function for running public MAF filter"""
+        if self.options.get("manifest"):
+            run_batch(self, self.manifest_columns, self.manifest_columns)
+            return
+
+        self.mask_maf()
+        print(json.dumps(self.metrics.to_json(), indent=2, sort_keys=True))
+
+    def run_job(self, job):
+        """
+        Masks the merged MAF of a manifest job.
+
+        :param job: ``dict`` of the manifest options of the job
+        :return: ``dict`` of the job results and metrics
+        """
+        self.options.update(job)
+        self.metrics = MafMetricsCollection()
+
+        return {
+            "records": self.mask_maf(),
+            "masked_records": self.metrics.output_records,
+            "metrics": self.metrics.to_json(),
+        }
+
+    def mask_maf(self):
+        """
+        Writes the records of the input MAF that pass the masking rules.
+
+        :return: the number of input records
+        """
         self.logger.info(
             "Processing input maf {0}...".format(self.options["input_maf"])
         )
 
         # Reader
-        self.maf_reader = MafReader.reader_from(
+        self.maf_reader = maf_reader_from(
             path=self.options["input_maf"],
+            threads=self.options.get("io_threads", 1),
+            regions=parse_regions(self.options.get("regions")),
             validation_stringency=ValidationStringency.Strict,
         )
 
@@ -94,52 +161,55 @@ class GDC_1_0_0_Aliquot_Merged_Masked(BaseRunner):
         self.setup_maf_header()
 
         # Writer
-        self.maf_writer = MafWriter.from_path(
+        self.maf_writer = maf_writer_from(
             path=self.options["output_maf"],
+            threads=self.options.get("io_threads", 1),
             header=self.maf_header,
             validation_stringency=ValidationStringency.Strict,
         )
 
-        self._scheme = self.maf_header.scheme()
-        self._columns = get_columns_from_header(self.maf_header)
-        self._colset = set(self._columns)
-
         # Counts
         processed = 0
-        hotspot_gdc_set = set(["gdc_pon", "common_in_exac"])
 
         try:
             for record in self.maf_reader:
                 if processed > 0 and processed % 1000 == 0:
                     self.logger.info("Processed {0} records...".format(processed))
 
-                callers = record["callers"].value
-                if (
-                    len(callers) >= self.options["min_callers"]
-                    and record["Mutation_Status"].value.value == "Somatic"
-                ):
-                    self.metrics.add_sample_swap_metric(record)
-
-                    gdc_filters = record["GDC_FILTER"].value
-                    gfset = set(gdc_filters)
-
-                    if self.is_hotspot(record):
-                        if len(gfset - hotspot_gdc_set) == 0:
-                            self.write_record(record)
-
-                    elif not gfset:
-                        self.write_record(record)
+                if self.keep_record(record):
+                    self.write_record(record)
 
                 processed += 1
                 self.metrics.input_records += 1
 
             self.logger.info("Processed {0} records.".format(processed))
-            print(json.dumps(self.metrics.to_json(), indent=2, sort_keys=True))
 
         finally:
             self.maf_reader.close()
             self.maf_writer.close()
 
+        return processed
+
+    def keep_record(self, record):
+        """
+        Returns ``True`` if the merged record passes the masking rules. The
+        sample swap metrics are collected for the somatic records called by at
+        least `min_callers` callers.
+        """
+        callers = record["callers"].value
+        if (
+            len(callers) < self.options["min_callers"]
+            or record["Mutation_Status"].value.value != "Somatic"
+        ):
+            return False
+
+        self.metrics.add_sample_swap_metric(record)
+
+        gfset = set(record["GDC_FILTER"].value)
+        if self.is_hotspot(record):
+            return len(gfset - self.hotspot_gdc_filters) == 0
+        return not gfset
+
     def is_hotspot(self, record):
         """
         Helper function to test if the record is marked as a hotspot.
@@ -3,10 +3,12 @@ Subcommand for merging single caller raw aliquot MAFs to merged raw MAFs.
 """
 
 from aliquotmaf.subcommands.base import Subcommand
+from aliquotmaf.subcommands.batch import add_batch_arguments
 from aliquotmaf.subcommands.merge_aliquot.runners import (
     GDC_1_0_0_Aliquot_Merged,
     GDC_2_0_0_Aliquot_Merged,
 )
+from aliquotmaf.subcommands.utils import add_io_arguments
 
 
 class MergeAliquotMafs(Subcommand):
@@ -16,7 +18,26 @@ class MergeAliquotMafs(Subcommand):
         # Input group
         p_input = parser.add_argument_group(title="Input/Output Options")
         p_input.add_argument(
-            "--output_maf", required=True, help="Path to output public MAF file"
+            "--output_maf",
+            help="Path to output public MAF file. Required without --manifest",
+        )
+        p_input.add_argument(
+            "--masked_output_maf",
+            default=None,
+            help="Optional path to also write the merged records that pass the "
+            "masking rules to, as with MaskMergedAliquotMaf",
+        )
+        add_io_arguments(p_input, "tabix indexed MAFs")
+
+        # Batch group
+        add_batch_arguments(
+            parser,
+            "Merge the aliquots listed in this TSV in one run, reusing the "
+            "merger across aliquots. The header line names the columns: "
+            "output_maf is required, masked_output_maf and the caller MAF "
+            "options such as mutect2 or muse are optional; empty cells use the "
+            "command line value",
+            "aliquot",
         )
 
         # subparsers
@@ -17,6 +17,8 @@ class BaseRunner(metaclass=ABCMeta):
 
         self.maf_readers = []
         self.callers = []
+        self._inputs = None
+        self._regions = None
         self.maf_writer = None
         self._scheme = None
         self._columns = None
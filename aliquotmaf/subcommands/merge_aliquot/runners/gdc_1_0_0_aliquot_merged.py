@@ -2,32 +2,90 @@
 Main logic for merging raw aliquot MAFs on schema gdc-1.0.0-aliquot-merged.
 """
 
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 from maflib.header import MafHeader
 from maflib.overlap_iter import LocatableOverlapIterator
-from maflib.reader import MafReader
 from maflib.sort_order import BarcodesAndCoordinate
 from maflib.sorter import MafSorter
 from maflib.validation import ValidationStringency
-from maflib.writer import MafWriter
 
 import aliquotmaf.filters as Filters
 from aliquotmaf.constants import variant_callers
 from aliquotmaf.converters.builder import get_builder
 from aliquotmaf.converters.utils import get_columns_from_header
 from aliquotmaf.merging.filtering_iterator import FilteringPeekableIterator
-from aliquotmaf.merging.overlap_set import OverlapSet
+from aliquotmaf.merging.overlap_iterator import SweepOverlapIterator
+from aliquotmaf.merging.overlap_set import OverlapSet, OverlapSizeHistogram
+from aliquotmaf.merging.partition import indexed_contigs, split_by_contig
 from aliquotmaf.merging.record_merger.impl.v1_0 import MafRecordMerger_1_0_0
+from aliquotmaf.merging.reorder_window import ReorderWindow, ReorderWindowError
+from aliquotmaf.regions import MAX_END, Region, parse_regions
+from aliquotmaf.subcommands.batch import read_manifest, run_batch
+from aliquotmaf.subcommands.mask_merged_aliquot.runners import (
+    GDC_1_0_0_Aliquot_Merged_Masked,
+)
 from aliquotmaf.subcommands.merge_aliquot.runners import BaseRunner
+from aliquotmaf.subcommands.utils import maf_reader_from, maf_writer_from
 
 
 class GDC_1_0_0_Aliquot_Merged(BaseRunner):
+    # Runner whose masking rules are applied for --masked_output_maf
+    masked_runner_class = GDC_1_0_0_Aliquot_Merged_Masked
+
+    # Options of the input MAFs, in merging order
+    input_maf_keys = (
+        variant_callers.MUTECT2.snake(),
+        variant_callers.MUSE.snake(),
+        variant_callers.VARDICT.snake(),
+        variant_callers.VARSCAN2.snake(),
+        variant_callers.SOMATIC_SNIPER.snake(),
+        variant_callers.PINDEL.snake(),
+        variant_callers.CAVEMAN.snake(),
+        variant_callers.SANGER_PINDEL.snake(),
+        variant_callers.GATK4_MUTECT2_PAIR.snake(),
+        variant_callers.GATK4_MUTECT2.snake(),
+        variant_callers.SVABA_SOMATIC.snake(),
+        variant_callers.STRELKA_SOMATIC.snake(),
+    )
+
+    # Options that can be set per aliquot in the --manifest
+    manifest_columns = input_maf_keys + ("output_maf", "masked_output_maf")
+
+    # The merger only depends on the MAF scheme, so no option needs a runner of
+    # its own on a job server
+    resource_options = ()
+
     def __init__(self, options=dict()):
         super(GDC_1_0_0_Aliquot_Merged, self).__init__(options)
 
+        self._masker = None
+
+        # The jobs of a batch reset the manifest options to these defaults
+        self._default_job_options = {
+            key: self.options.get(key) for key in self.manifest_columns
+        }
+
         # Schema
         self.options["version"] = "gdc-1.0.0"
         self.options["annotation"] = "gdc-1.0.0-aliquot-merged"
 
+    @classmethod
+    def __validate_options__(cls, options):
+        """Validates the output or the manifest"""
+        if not options.manifest:
+            if options.output_maf is None:
+                raise ValueError("--output_maf is required")
+            return
+
+        if options.threads > 1:
+            raise ValueError("--threads is not supported with --manifest")
+        read_manifest(options.manifest, cls.manifest_columns, ("output_maf",))
+
     @classmethod
     def __add_arguments__(cls, parser):
         """Add the arguments to the parser"""
@@ -81,43 +139,94 @@ class GDC_1_0_0_Aliquot_Merged(BaseRunner):
             variant_callers.GATK4_MUTECT2.option(),
             help="Path to input protected GATK4 MuTect2 MAF file",
         )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Number of processes used to merge contigs in parallel. Tabix "
+            + "indexed input MAFs are read per contig, other inputs are first "
+            + "split by contig [1]",
+        )
+        cls.add_merging_arguments(parser)
+
+        mask = parser.add_argument_group(
+            title="Masking Options",
+            description="Used with --masked_output_maf",
+        )
+        cls.masked_runner_class.add_masking_arguments(mask)
+
+    @classmethod
+    def add_merging_arguments(cls, parser):
+        """Adds the options of the overlap and merge engine."""
+        parser.add_argument(
+            "--overlap_engine",
+            choices=["maflib", "sweep"],
+            default="maflib",
+            help="Engine used to find overlapping records. 'sweep' clusters "
+            + "the records of each contig at once with a sweep over their "
+            + "coordinates [maflib]",
+        )
+        parser.add_argument(
+            "--reorder_window",
+            type=int,
+            default=10000,
+            help="Write merged records as they are produced, reordering them "
+            + "within a window of INT records. The records are sorted before "
+            + "writing instead if they don't fit the window or INT is 0 [10000]",
+        )
+        parser.add_argument(
+            "--max_overlap_size",
+            type=int,
+            default=0,
+            help="Overlap sets with more than INT records are split into one "
+            + "set per Start_Position, End_Position and Allele before merging. "
+            + "Splitting changes the merged records of the split sets, as "
+            + "overlapping variants of different loci are no longer merged "
+            + "together. 0 disables splitting [0]",
+        )
 
-    def load_readers(self):
+    def get_inputs(self):
         """
-        Loads the array of MafReaders and sets the callers list.
+        Returns a ``list`` of ``tuples`` of the caller and path of the input
+        MAFs.
         """
-        maf_keys = [
-            variant_callers.MUTECT2.snake(),
-            variant_callers.MUSE.snake(),
-            variant_callers.VARDICT.snake(),
-            variant_callers.VARSCAN2.snake(),
-            variant_callers.SOMATIC_SNIPER.snake(),
-            variant_callers.PINDEL.snake(),
-            variant_callers.CAVEMAN.snake(),
-            variant_callers.SANGER_PINDEL.snake(),
-            variant_callers.GATK4_MUTECT2_PAIR.snake(),
-            variant_callers.GATK4_MUTECT2.snake(),
-            variant_callers.SVABA_SOMATIC.snake(),
-            variant_callers.STRELKA_SOMATIC.snake(),
+        return [
+            (maf_key, self.options[maf_key])
+            for maf_key in self.input_maf_keys
+            if self.options.get(maf_key)
         ]
 
-        for maf_key in maf_keys:
-            if self.options[maf_key]:
-                self.logger.info("{0} MAF {1}".format(maf_key, self.options[maf_key]))
-                self.maf_readers.append(
-                    MafReader.reader_from(
-                        path=self.options[maf_key],
-                        validation_stringency=ValidationStringency.Strict,
-                    )
+    def load_readers(self, inputs, regions=None):
+        """
+        Loads the array of MafReaders and sets the callers list.
+
+        :param inputs: ``list`` of ``tuples`` of the caller and path of the
+            input MAFs, see `get_inputs`
+        :param regions: optional ``list`` of regions to read
+        """
+        self._inputs = inputs
+        self._regions = regions
+        for maf_key, path in inputs:
+            self.logger.info("{0} MAF {1}".format(maf_key, path))
+            self.maf_readers.append(
+                maf_reader_from(
+                    path=path,
+                    threads=self.options.get("io_threads", 1),
+                    regions=regions,
+                    validation_stringency=ValidationStringency.Strict,
                 )
-                self.callers.append(maf_key)
+            )
+            self.callers.append(maf_key)
 
-    def setup_maf_header(self):
+    def setup_maf_header(self, source_header=None):
         """
         Sets up the maf header.
+
+        :param source_header: the header of the raw aliquot MAFs, read from the
+            first input MAF when not given
         """
         # Reader header
-        _hdr = MafHeader.from_reader(reader=self.maf_readers[0])
+        _hdr = source_header or MafHeader.from_reader(reader=self.maf_readers[0])
 
         self.maf_header = MafHeader.from_defaults(
             version=self.options["version"],
@@ -136,31 +245,211 @@ class GDC_1_0_0_Aliquot_Merged(BaseRunner):
         tkey = _hdr["tumor.aliquot"]
         self.maf_header["tumor.aliquot"] = tkey
 
+        self._scheme = self.maf_header.scheme()
+        self._columns = get_columns_from_header(self.maf_header)
+
     def do_work(self):
         """Main wrapper function for running protect MAF merging"""
+        if self.options.get("manifest"):
+            run_batch(self, self.manifest_columns, ("output_maf",))
+            return
+
+        if self.options.get("threads", 1) > 1:
+            self.do_work_parallel()
+            return
 
         # Reader
-        self.load_readers()
+        self.load_readers(
+            self.get_inputs(), regions=parse_regions(self.options.get("regions"))
+        )
 
         # Header
         self.setup_maf_header()
 
-        self._scheme = self.maf_header.scheme()
-        self._columns = get_columns_from_header(self.maf_header)
+        self.write_merged(self.options["output_maf"])
+        self.report_masking()
 
-        # Sorter
-        sorter = MafSorter(
-            max_objects_in_ram=100000,
-            sort_order_name=BarcodesAndCoordinate.name(),
-            scheme=self.maf_header.scheme(),
-            contigs=self.maf_header.contigs(),
+    def run_job(self, job):
+        """
+        Merges the MAFs of a manifest job. The merger, with its scheme and
+        merge plans, is kept across the jobs of a batch.
+
+        :param job: ``dict`` of the manifest options of the job
+        :return: ``dict`` of the job results
+        """
+        self.options.update(self._default_job_options)
+        self.options.update(job)
+        self.maf_readers = []
+        self.callers = []
+        self.maf_writer = None
+        self._masker = None
+
+        inputs = self.get_inputs()
+        if not inputs:
+            raise ValueError("No input MAFs")
+        self.load_readers(inputs, regions=parse_regions(self.options.get("regions")))
+        self.setup_maf_header()
+
+        result = {"records": self.write_merged(self.options["output_maf"])}
+        if self._masker:
+            result["masked_records"] = self._masker.metrics.output_records
+            result["metrics"] = self._masker.metrics.to_json()
+        return result
+
+    def do_work_parallel(self):
+        """
+        Merges each contig in a worker process and concatenates the merged
+        records in the order of the header contigs. Tabix indexed inputs are
+        read per contig directly, other inputs are first split by contig.
+        """
+        inputs = self.get_inputs()
+        regions = parse_regions(self.options.get("regions"))
+
+        # Header
+        self.load_readers(inputs, regions=regions)
+        self.setup_maf_header()
+        for reader in self.maf_readers:
+            reader.close()
+
+        # Workers only merge, the merged records are masked here
+        options = {
+            k: v
+            for k, v in self.options.items()
+            if k not in ("func", "masked_output_maf")
+        }
+        contigs = self.maf_header.contigs()
+        tmp_dir = tempfile.mkdtemp(
+            prefix="merge_aliquot_",
+            dir=os.path.dirname(os.path.abspath(self.options["output_maf"])),
         )
+        pool = ProcessPoolExecutor(max_workers=self.options["threads"])
+        try:
+            jobs = self.get_contig_jobs(inputs, regions, contigs, tmp_dir)
+            self.logger.info(
+                "Merging {0} contigs with {1} processes...".format(
+                    len(jobs), self.options["threads"]
+                )
+            )
+            futures = [
+                (
+                    contig,
+                    pool.submit(
+                        merge_contig,
+                        self.__class__,
+                        options,
+                        contig_inputs,
+                        contig_regions,
+                        os.path.join(tmp_dir, "merged.{0}.maf".format(i)),
+                    ),
+                )
+                for i, (contig, contig_inputs, contig_regions) in enumerate(jobs)
+            ]
+
+            # Writer
+            self.maf_writer = maf_writer_from(
+                path=self.options["output_maf"],
+                threads=self.options.get("io_threads", 1),
+                header=self.maf_header,
+                validation_stringency=ValidationStringency.Strict,
+            )
+            self.setup_masker()
+
+            counter = 0
+            for contig, future in futures:
+                part_path = future.result()
+                reader = maf_reader_from(
+                    path=part_path, validation_stringency=ValidationStringency.Strict
+                )
+                try:
+                    for record in reader:
+                        self.write_record(record)
+                        counter += 1
+                finally:
+                    reader.close()
+                os.remove(part_path)
+                self.logger.info(
+                    "Wrote merged records of {0}, {1} in total".format(contig, counter)
+                )
+
+            self.logger.info(
+                "Finished writing {0} sorted, merged records.".format(counter)
+            )
+
+        finally:
+            pool.shutdown(cancel_futures=True)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
-        # Merger
-        self._merger = MafRecordMerger_1_0_0(self._scheme)
+            if self.maf_writer:
+                self.maf_writer.close()
+            self.close_masker()
+
+        self.report_masking()
+
+    def get_contig_jobs(self, inputs, regions, contigs, tmp_dir):
+        """
+        Partitions the inputs by contig.
+
+        :return: a ``list`` of ``tuples`` of the contig, the inputs of the
+            contig and the regions to read from them, in the order of the
+            header contigs. Contigs without records are left out.
+        """
+        indexed = [indexed_contigs(path) for _, path in inputs]
+        if all(i is not None for i in indexed):
+            present = set().union(*indexed)
+            jobs = []
+            for contig in contigs:
+                if contig not in present:
+                    continue
+                if regions:
+                    contig_regions = [i for i in regions if i.contig == contig]
+                    if not contig_regions:
+                        continue
+                else:
+                    contig_regions = [Region(contig, 0, MAX_END)]
+                jobs.append((contig, inputs, contig_regions))
+            return jobs
+
+        # --regions already requires indexed inputs to read the header
+        self.logger.info("Splitting input MAFs by contig...")
+        split = [
+            split_by_contig(
+                path,
+                tmp_dir,
+                maf_key,
+                contigs,
+                threads=self.options.get("io_threads", 1),
+            )
+            for maf_key, path in inputs
+        ]
+        present = set().union(*(shards for shards, _ in split))
+        return [
+            (
+                contig,
+                [
+                    (maf_key, shards.get(contig, empty))
+                    for (maf_key, _), (shards, empty) in zip(inputs, split)
+                ],
+                None,
+            )
+            for contig in contigs
+            if contig in present
+        ]
+
+    def iter_merged_records(self):
+        """
+        Yields the merged records of the overlapping records of all callers,
+        with the normal depth filter rechecked.
+        """
+        # Merger, kept across the jobs of a batch
+        if self._merger is None:
+            self._merger = MafRecordMerger_1_0_0(self._scheme)
 
         # Overlap iterator
-        o_iter = LocatableOverlapIterator(
+        if self.options.get("overlap_engine") == "sweep":
+            overlap_iterator_class = SweepOverlapIterator
+        else:
+            overlap_iterator_class = LocatableOverlapIterator
+        o_iter = overlap_iterator_class(
             self.maf_readers,
             contigs=self.maf_header.contigs(),
             peekable_iterator_class=FilteringPeekableIterator,
@@ -175,18 +464,33 @@ class GDC_1_0_0_Aliquot_Merged(BaseRunner):
 
         # Counts
         processed = 0
-        try:
-            for record in o_iter:
-                # progress update
-                if processed > 0 and processed % 1000 == 0:
-                    self.logger.info(
-                        "Processed {0} overlapping intervals...".format(processed)
-                    )
+        split = 0
+        histogram = OverlapSizeHistogram()
+        max_size = self.options.get("max_overlap_size", 0)
+        for record in o_iter:
+            # progress update
+            if processed > 0 and processed % 1000 == 0:
+                self.logger.info(
+                    "Processed {0} overlapping intervals...".format(processed)
+                )
+
+            result = OverlapSet(record, self.callers)
+            size = len(result)
+            histogram.add(size)
 
-                result = OverlapSet(record, self.callers)
+            if max_size and size > max_size:
+                subsets = result.split_by_locus()
+                split += 1
+                self.logger.warning(
+                    "Split an overlap set of {0} records into {1} sets "
+                    "by locus".format(size, len(subsets))
+                )
+            else:
+                subsets = [result]
 
+            for subset in subsets:
                 for maf_record in self._merger.merge_records(
-                    result, tumor_only=self.options["tumor_only"]
+                    subset, tumor_only=self.options["tumor_only"]
                 ):
                     if maf_record is not None:
                         # Recheck normal depth
@@ -207,27 +511,172 @@ class GDC_1_0_0_Aliquot_Merged(BaseRunner):
                                 "GDC_FILTER", self._scheme, value=sorted(gdc_filters)
                             )
 
-                        # Add to sorter
-                        sorter += maf_record
+                        yield maf_record
+
+            processed += 1
+
+        self.logger.info("Processed {0} overlapping intervals.".format(processed))
+        self.logger.info("Overlap set sizes: {0}".format(histogram))
+        if split:
+            self.logger.info(
+                "Split {0} overlap sets larger than {1} records by locus".format(
+                    split, max_size
+                )
+            )
+
+    def write_merged(self, path):
+        """
+        Merges the records of the loaded readers and writes them sorted to
+        the path. The readers are closed once done.
 
-                processed += 1
+        Records are streamed to the writer through a reorder window. If a
+        record falls outside of the window, the inputs are read again and the
+        merged records are sorted with a ``MafSorter`` instead.
+
+        :return: the number of records written
+        """
+        window_size = self.options.get("reorder_window", 0)
+        if not window_size:
+            return self.write_sorted(path)
 
-            self.logger.info("Writing {0} sorted, merged records...".format(processed))
+        try:
+            return self.write_streamed(path, window_size)
+        except ReorderWindowError as e:
+            self.logger.warning(e)
+            self.logger.warning("Falling back to sorting the merged records")
+
+        self.maf_readers = []
+        self.callers = []
+        self.maf_writer = None
+        self.load_readers(self._inputs, regions=self._regions)
+        return self.write_sorted(path)
+
+    def write_streamed(self, path, window_size):
+        """
+        Writes the merged records as they are produced through a reorder
+        window of `window_size` records.
 
+        :return: the number of records written
+        """
+        try:
             # Writer
-            self.maf_writer = MafWriter.from_path(
-                path=self.options["output_maf"],
+            self.maf_writer = maf_writer_from(
+                path=path,
+                threads=self.options.get("io_threads", 1),
                 header=self.maf_header,
                 validation_stringency=ValidationStringency.Strict,
             )
 
+            self.setup_masker()
+
+            window = ReorderWindow(
+                self.write_record, self.maf_header.contigs(), max_records=window_size
+            )
+            for maf_record in self.iter_merged_records():
+                window += maf_record
+            window.flush()
+
+            self.logger.info(
+                "Finished writing {0} sorted, merged records.".format(window.written)
+            )
+
+        finally:
+            for reader in self.maf_readers:
+                reader.close()
+
+            if self.maf_writer:
+                self.maf_writer.close()
+            self.close_masker()
+
+        return window.written
+
+    def write_record(self, record):
+        """
+        Writes a record to the output MAF, and to the masked MAF if it passes
+        the masking rules.
+        """
+        if self.maf_writer:
+            self.maf_writer += record
+
+        if self._masker:
+            self._masker.metrics.input_records += 1
+            if self._masker.keep_record(record):
+                self._masker.write_record(record)
+
+    def setup_masker(self):
+        """
+        Sets up the masking of the merged records and the masked MAF writer
+        when --masked_output_maf is given. Any previous masked output is
+        started over.
+        """
+        self._masker = None
+        if not self.options.get("masked_output_maf"):
+            return
+
+        self._masker = self.masked_runner_class(dict(self.options))
+        self._masker.setup_maf_header(source_header=self.maf_header)
+        self._masker.maf_writer = maf_writer_from(
+            path=self.options["masked_output_maf"],
+            threads=self.options.get("io_threads", 1),
+            header=self._masker.maf_header,
+            validation_stringency=ValidationStringency.Strict,
+        )
+
+    def close_masker(self):
+        """Closes the masked MAF writer."""
+        if self._masker and self._masker.maf_writer:
+            self._masker.maf_writer.close()
+
+    def report_masking(self):
+        """Logs the masked record count and prints the masking metrics."""
+        if not self._masker:
+            return
+
+        self.logger.info(
+            "Finished writing {0} masked records.".format(
+                self._masker.metrics.output_records
+            )
+        )
+        print(json.dumps(self._masker.metrics.to_json(), indent=2, sort_keys=True))
+
+    def write_sorted(self, path):
+        """
+        Collects the merged records in a ``MafSorter`` and writes them once
+        all records are merged.
+
+        :return: the number of records written
+        """
+        # Sorter
+        sorter = MafSorter(
+            max_objects_in_ram=100000,
+            sort_order_name=BarcodesAndCoordinate.name(),
+            scheme=self.maf_header.scheme(),
+            contigs=self.maf_header.contigs(),
+        )
+
+        try:
+            for maf_record in self.iter_merged_records():
+                # Add to sorter
+                sorter += maf_record
+
+            self.logger.info("Writing sorted, merged records...")
+
+            # Writer
+            self.maf_writer = maf_writer_from(
+                path=path,
+                threads=self.options.get("io_threads", 1),
+                header=self.maf_header,
+                validation_stringency=ValidationStringency.Strict,
+            )
+            self.setup_masker()
+
             counter = 0
             for record in sorter:
                 if counter > 0 and counter % 1000 == 0:
                     self.logger.info(
                         "Wrote {0} sorted, merged records...".format(counter)
                     )
-                self.maf_writer += record
+                self.write_record(record)
                 counter += 1
 
             self.logger.info(
@@ -242,7 +691,29 @@ class GDC_1_0_0_Aliquot_Merged(BaseRunner):
 
             if self.maf_writer:
                 self.maf_writer.close()
+            self.close_masker()
+
+        return counter
 
     @classmethod
     def __tool_name__(cls):
         return "gdc-1.0.0-aliquot-merged"
+
+
+def merge_contig(runner_class, options, inputs, regions, path):
+    """
+    Merges the records of a single contig in a worker process and writes them
+    sorted to the path.
+
+    :param runner_class: the runner class
+    :param options: the runner options
+    :param inputs: ``list`` of ``tuples`` of the caller and path of the MAFs
+    :param regions: optional ``list`` of regions of the contig to read
+    :param path: the output MAF
+    :return: the output path
+    """
+    runner = runner_class(dict(options))
+    runner.load_readers(inputs, regions=regions)
+    runner.setup_maf_header()
+    runner.write_merged(path)
+    return path
@@ -1,7 +1,13 @@
+from aliquotmaf.subcommands.mask_merged_aliquot.runners import (
+    GDC_2_0_0_Aliquot_Merged_Masked,
+)
 from aliquotmaf.subcommands.merge_aliquot.runners import GDC_1_0_0_Aliquot_Merged
 
 
 class GDC_2_0_0_Aliquot_Merged(GDC_1_0_0_Aliquot_Merged):
+    # Runner whose masking rules are applied for --masked_output_maf
+    masked_runner_class = GDC_2_0_0_Aliquot_Merged_Masked
+
     def __init__(self, options=dict()):
         super(GDC_2_0_0_Aliquot_Merged, self).__init__(options)
 
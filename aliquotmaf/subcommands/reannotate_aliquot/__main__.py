@@ -0,0 +1,57 @@
+"""
+Subcommand for refreshing the annotations and filters of a raw aliquot MAF.
+"""
+
+from aliquotmaf.subcommands.base import Subcommand
+from aliquotmaf.subcommands.reannotate_aliquot.runners import (
+    GDC_2_0_0_Aliquot_Reannotated,
+)
+from aliquotmaf.subcommands.utils import add_io_arguments
+
+
+class ReannotateAliquotMaf(Subcommand):
+    @classmethod
+    def __add_arguments__(cls, parser):
+        """Add the arguments to the parser"""
+        # Input group
+        p_input = parser.add_argument_group(title="Input/Output Options")
+        p_input.add_argument(
+            "--input_maf", required=True, help="Path to input raw aliquot MAF file"
+        )
+        p_input.add_argument(
+            "--output_maf", required=True, help="Path to output raw aliquot MAF file"
+        )
+        add_io_arguments(p_input, "a tabix indexed MAF")
+
+        # subparsers
+        subparsers = parser.add_subparsers(dest="subcommand")
+        subparsers.required = True
+
+        GDC_2_0_0_Aliquot_Reannotated.add(subparsers=subparsers)
+
+    @classmethod
+    def __get_description__(cls):
+        """
+        Optionally returns description
+        """
+        return (
+            "Recompute selected annotations and filters of a raw aliquot MAF "
+            "without reprocessing the VCF"
+        )
+
+    @classmethod
+    def __tool_name__(cls):
+        """
+        Tool name to use for the subparser
+        """
+        return cls.__name__
+
+    @classmethod
+    def add(cls, subparsers):
+        """Adds the given subcommand to the subparsers."""
+        subparser = subparsers.add_parser(
+            name=cls.__tool_name__(), description=cls.__get_description__()
+        )
+
+        cls.__add_arguments__(subparser)
+        return subparser
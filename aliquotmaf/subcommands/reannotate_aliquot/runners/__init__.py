@@ -0,0 +1,6 @@
+from __future__ import absolute_import
+
+from .base import BaseRunner
+from .gdc_2_0_0_aliquot_reannotated import GDC_2_0_0_Aliquot_Reannotated
+
+__all__ = [BaseRunner, GDC_2_0_0_Aliquot_Reannotated]
@@ -0,0 +1,442 @@
+"""
+Main logic for refreshing the annotations and filters of raw aliquot MAFs for
+spec gdc-2.0.0-aliquot.
+"""
+
+import urllib.parse
+
+import pysam
+from maflib.header import MafHeader
+from maflib.sort_order import BarcodesAndCoordinate
+from maflib.validation import ValidationStringency
+
+import aliquotmaf.annotators as Annotators
+import aliquotmaf.filters as Filters
+from aliquotmaf.converters.builder import get_builder
+from aliquotmaf.converters.utils import get_columns_from_header, init_empty_maf_record
+from aliquotmaf.locus import Locus
+from aliquotmaf.regions import parse_regions
+from aliquotmaf.subcommands.reannotate_aliquot.runners import BaseRunner
+from aliquotmaf.subcommands.utils import (
+    extract_annotation_from_header,
+    maf_reader_from,
+    maf_writer_from,
+)
+from aliquotmaf.subcommands.vcf_to_aliquot.extractors import EffectsExtractor
+
+# GDC_FILTER tags of the filters that have fixed tags. Any other tag in
+# GDC_FILTER comes from the GDC blacklist.
+FIXED_FILTER_TAGS = frozenset(
+    tag for filt_class in Filters.__all__ for tag in filt_class.tags
+)
+
+
+def get_var_allele_idx(vcf_format, vcf_tumor_gt):
+    """
+    Gets the variant allele index from the ``vcf_format`` and ``vcf_tumor_gt``
+    MAF columns, selecting the first non-REF allele of the tumor genotype as
+    ``VariantAlleleIndexExtractor`` does.
+    """
+    keys = vcf_format.split(":") if vcf_format else []
+    values = vcf_tumor_gt.split(":") if vcf_tumor_gt else []
+    if "GT" not in keys or keys.index("GT") >= len(values):
+        return 1
+    gt = values[keys.index("GT")].replace("|", "/").split("/")
+    alleles = [int(i) for i in gt if i not in (".", "", "0")]
+    return alleles[0] if alleles else 1
+
+
+class GDC_2_0_0_Aliquot_Reannotated(BaseRunner):
+    def __init__(self, options=dict()):
+        super(GDC_2_0_0_Aliquot_Reannotated, self).__init__(options)
+
+        # Schema
+        self.options["version"] = "gdc-1.0.0"
+        self.options["annotation"] = "gdc-2.0.0-aliquot"
+
+        # Filter tags rewritten in GDC_FILTER
+        self._recomputed_tags = set()
+        self._blacklist_tags = []
+
+        # The VEP annotated VCF the input MAF was converted from
+        self._input_vcf = None
+
+    @classmethod
+    def __add_arguments__(cls, parser):
+        """Add the arguments to the parser"""
+        parser.add_argument(
+            "--tumor_only", action="store_true", help="Is this a tumor-only MAF?"
+        )
+
+        anno = parser.add_argument_group(
+            title="Annotation Resources",
+            description="Only the annotations with a resource are recomputed",
+        )
+        anno.add_argument(
+            "--reference_fasta", default=None, help="Reference fasta file"
+        )
+        anno.add_argument(
+            "--reference_context_size",
+            type=int,
+            default=5,
+            help="Number of BP to add both upstream and "
+            + "downstream from variant for reference context",
+        )
+        anno.add_argument(
+            "--cosmic_vcf", default=None, help="Optional COSMIC VCF for annotating"
+        )
+        anno.add_argument(
+            "--input_vcf",
+            default=None,
+            help="The bgzipped and tabix-indexed VEP annotated VCF the input MAF "
+            + "was converted from. With --cosmic_vcf, the dbSNP_RS of records "
+            + "that the input COSMIC annotation cleared is recomputed from the "
+            + "Existing_variation of the VCF, otherwise it stays empty",
+        )
+        anno.add_argument("--hotspot_tsv", default=None, help="Optional hotspot TSV")
+        anno.add_argument(
+            "--entrez_gene_id_json",
+            default=None,
+            help="Optional map of ensembl transcript IDs and symbols to entrez gene ID",
+        )
+        anno.add_argument(
+            "--gnomad_noncancer_vcf",
+            default=None,
+            help="Path to the bgzipped and tabix-indexed non-cancer gnomAD allele frequency VCF.",
+        )
+
+        filt = parser.add_argument_group(
+            title="Filtering Options",
+            description="Only the filters with a resource or cutoff are recomputed",
+        )
+        filt.add_argument(
+            "--gnomad_af_cutoff",
+            default=None,
+            type=float,
+            help="Flag variants where the allele frequency in any gnomAD population "
+            + "is greater than this value as common_in_gnomAD",
+        )
+        filt.add_argument(
+            "--gdc_blacklist",
+            type=str,
+            default=None,
+            help="The file containing the blacklist tags and tumor aliquot uuids to "
+            + "apply them to.",
+        )
+        filt.add_argument(
+            "--gdc_pon_vcf",
+            type=str,
+            default=None,
+            help="The tabix-indexed panel of normals VCF for applying the gdc "
+            + "pon filter",
+        )
+        filt.add_argument(
+            "--nonexonic_intervals",
+            type=str,
+            default=None,
+            help="Flag variants outside of this tabix-indexed bed file "
+            + "as NonExonic",
+        )
+        filt.add_argument(
+            "--target_intervals",
+            action="append",
+            help="Flag variants outside of these tabix-indexed bed files "
+            + "as off_target. Use one or more times.",
+        )
+
+    def setup_maf_header(self):
+        """
+        Sets up the maf header from the input MAF.
+        """
+        _hdr = MafHeader.from_reader(reader=self.maf_reader)
+
+        self.maf_header = MafHeader.from_defaults(
+            version=self.options["version"],
+            annotation=self.options["annotation"],
+            sort_order=BarcodesAndCoordinate(),
+            contigs=_hdr.contigs(),
+        )
+        self.maf_header.validation_stringency = ValidationStringency.Strict
+
+        header_date = BaseRunner.get_header_date()
+        self.maf_header[header_date.key] = header_date
+
+        try:
+            nkey = _hdr["normal.aliquot"]
+            self.maf_header["normal.aliquot"] = nkey
+        except KeyError as e:
+            if not self.options["tumor_only"]:
+                raise e
+
+        tkey = _hdr["tumor.aliquot"]
+        self.maf_header["tumor.aliquot"] = tkey
+
+    def do_work(self):
+        """Main wrapper function for reannotating a raw aliquot MAF"""
+        self.logger.info(
+            "Processing input maf {0}...".format(self.options["input_maf"])
+        )
+
+        # Reader
+        self.maf_reader = maf_reader_from(
+            path=self.options["input_maf"],
+            threads=self.options.get("io_threads", 1),
+            regions=parse_regions(self.options.get("regions")),
+            validation_stringency=ValidationStringency.Strict,
+        )
+
+        # Header
+        self.setup_maf_header()
+
+        self._scheme = self.maf_header.scheme()
+        self._columns = get_columns_from_header(self.maf_header)
+
+        processed = 0
+        changed = 0
+        try:
+            self.setup_annotators()
+            self.setup_filters()
+
+            # Writer
+            self.maf_writer = maf_writer_from(
+                path=self.options["output_maf"],
+                threads=self.options.get("io_threads", 1),
+                header=self.maf_header,
+                validation_stringency=ValidationStringency.Strict,
+            )
+
+            for record in self.maf_reader:
+                if processed > 0 and processed % 1000 == 0:
+                    self.logger.info("Processed {0} records...".format(processed))
+
+                old_filters = record["GDC_FILTER"].value
+                record = self.reannotate(record)
+                if record["GDC_FILTER"].value != old_filters:
+                    changed += 1
+                self.write_record(record)
+                processed += 1
+
+            self.logger.info(
+                "Processed {0} records. GDC_FILTER changed for {1} records.".format(
+                    processed, changed
+                )
+            )
+
+        finally:
+            self.maf_reader.close()
+            if self.maf_writer:
+                self.maf_writer.close()
+            for obj in list(self.annotators.values()) + list(self.filters.values()):
+                obj.shutdown()
+            if self._input_vcf is not None:
+                self._input_vcf.close()
+
+    def reannotate(self, maf_record):
+        """
+        Recomputes the selected annotations and filters of a record and
+        rewrites GDC_FILTER.
+        """
+        locus = Locus.from_vcf_region(
+            maf_record["vcf_region"].value, contig=maf_record["Chromosome"].value
+        )
+        var_allele_idx = get_var_allele_idx(
+            maf_record["vcf_format"].value, maf_record["vcf_tumor_gt"].value
+        )
+
+        # The locus stands in for the VCF record in the annotators. The
+        # converter matches COSMIC on the first ALT allele.
+        if "cosmic_id" in self.annotators:
+            maf_record = self.restore_novel_dbsnp_rs(maf_record, locus, var_allele_idx)
+            maf_record = self.annotators["cosmic_id"].annotate(maf_record, locus)
+        if "hotspots" in self.annotators:
+            maf_record = self.annotators["hotspots"].annotate(maf_record)
+        if "entrez_gene_id" in self.annotators:
+            maf_record = self.annotators["entrez_gene_id"].annotate(maf_record)
+        if "gnomad_noncancer" in self.annotators:
+            maf_record = self.annotators["gnomad_noncancer"].annotate(
+                maf_record, locus, var_allele_idx
+            )
+        if "reference_context" in self.annotators:
+            maf_record = self.annotators["reference_context"].annotate(
+                maf_record, locus
+            )
+
+        if self.filters:
+            maf_record["GDC_FILTER"] = get_builder(
+                "GDC_FILTER",
+                self._scheme,
+                value=";".join(sorted(self.get_gdc_filters(maf_record, locus))),
+            )
+        return maf_record
+
+    def restore_novel_dbsnp_rs(self, maf_record, locus, var_allele_idx):
+        """
+        Restores the ``novel`` dbSNP_RS that the COSMIC annotation of the
+        input cleared, so that it only stays cleared for COSMIC variants of
+        the new COSMIC VCF. An empty dbSNP_RS is also written for variants
+        only seen in databases other than dbSNP, so the dbSNP_RS is recomputed
+        from the input VCF.
+        """
+        if self._input_vcf is None:
+            return maf_record
+        if maf_record["COSMIC"].value and not maf_record["dbSNP_RS"].value:
+            existing_variation = self.get_existing_variation(
+                locus, var_allele_idx, maf_record["Transcript_ID"].value
+            )
+            if EffectsExtractor.get_dbsnp_rs(existing_variation) == "novel":
+                maf_record["dbSNP_RS"] = get_builder(
+                    "dbSNP_RS", self._scheme, value="novel"
+                )
+        return maf_record
+
+    def get_existing_variation(self, locus, var_allele_idx, transcript_id):
+        """
+        Returns the Existing_variation of the effect of the record of the input
+        VCF at the locus, preferring the effect on the transcript of the MAF
+        record, or ``None`` if the VCF has no such record.
+        """
+        try:
+            records = self._input_vcf.fetch(locus.contig, locus.pos - 1, locus.pos)
+        except ValueError:
+            # The contig has no records in the index
+            return None
+
+        for vcf_record in records:
+            if (
+                vcf_record.pos != locus.pos
+                or vcf_record.ref != locus.ref
+                or tuple(vcf_record.alts or ()) != locus.alts
+            ):
+                continue
+            effects = []
+            for raw in vcf_record.info[self._input_vep_key]:
+                effect = dict(
+                    zip(self._input_ann_cols, urllib.parse.unquote(raw).split("|"))
+                )
+                allele_num = effect.get("ALLELE_NUM")
+                if allele_num and int(allele_num) != var_allele_idx:
+                    continue
+                effects.append(effect)
+            effects.sort(key=lambda i: i.get("Feature") != transcript_id)
+            if effects:
+                return effects[0].get("Existing_variation", "").replace("&", ";")
+        return None
+
+    def get_gdc_filters(self, maf_record, locus):
+        """
+        Returns the GDC_FILTER tags of the record, keeping the existing tags
+        of the filters that aren't recomputed.
+        """
+        gdc_filters = []
+        for tag in maf_record["GDC_FILTER"].value or []:
+            if tag in self._recomputed_tags:
+                continue
+            if "gdc_blacklist" in self.filters and tag not in FIXED_FILTER_TAGS:
+                continue
+            gdc_filters.append(tag)
+
+        gdc_filters.extend(self._blacklist_tags)
+        for filt_key, filt_obj in self.filters.items():
+            if filt_key == "gdc_blacklist":
+                continue
+            if filt_obj.filter(maf_record, locus=locus):
+                gdc_filters.extend(filt_obj.tags)
+        return gdc_filters
+
+    def write_record(self, record):
+        """
+        Writes the record with its columns in the order of the header.
+        """
+        new_record = init_empty_maf_record()
+        for column in self._columns:
+            new_record[column] = record[column]
+        self.maf_writer += new_record
+
+    def setup_annotators(self):
+        """
+        Sets up the annotators with a resource.
+        """
+        if self.options["reference_fasta"]:
+            self.annotators["reference_context"] = Annotators.ReferenceContext.setup(
+                self._scheme,
+                self.options["reference_fasta"],
+                self.options["reference_context_size"],
+            )
+
+        if self.options["cosmic_vcf"]:
+            self.annotators["cosmic_id"] = Annotators.CosmicID.setup(
+                self._scheme, self.options["cosmic_vcf"]
+            )
+
+        if self.options["cosmic_vcf"] and self.options["input_vcf"]:
+            self._input_vcf = pysam.VariantFile(self.options["input_vcf"])
+            (
+                self._input_ann_cols,
+                self._input_vep_key,
+            ) = extract_annotation_from_header(self._input_vcf, vep_key="CSQ")
+        elif self.options["cosmic_vcf"]:
+            self.logger.warning(
+                "No --input_vcf, the dbSNP_RS of records that are no longer "
+                "COSMIC variants stays empty"
+            )
+
+        if self.options["hotspot_tsv"]:
+            self.annotators["hotspots"] = Annotators.Hotspot.setup(
+                self._scheme, self.options["hotspot_tsv"]
+            )
+
+        if self.options["entrez_gene_id_json"]:
+            self.annotators["entrez_gene_id"] = Annotators.Entrez.setup(
+                self._scheme, self.options["entrez_gene_id_json"]
+            )
+
+        if self.options["gnomad_noncancer_vcf"]:
+            self.annotators["gnomad_noncancer"] = Annotators.GnomAD_VCF.setup(
+                self._scheme, self.options["gnomad_noncancer_vcf"]
+            )
+
+        self.logger.info(
+            "Recomputing annotations: {0}".format(", ".join(self.annotators) or "none")
+        )
+
+    def setup_filters(self):
+        """
+        Sets up the filters with a resource or cutoff.
+        """
+        if self.options["gnomad_af_cutoff"]:
+            self.filters["common_in_gnomAD"] = Filters.FilterGnomAD.setup(
+                self.options["gnomad_af_cutoff"]
+            )
+
+        if self.options["gdc_pon_vcf"]:
+            self.filters["gdc_pon"] = Filters.GdcPon.setup(self.options["gdc_pon_vcf"])
+
+        if self.options["nonexonic_intervals"]:
+            self.filters["nonexonic"] = Filters.NonExonic.setup(
+                self.options["nonexonic_intervals"]
+            )
+
+        if self.options["target_intervals"]:
+            self.filters["off_target"] = Filters.OffTarget.setup(
+                self.options["target_intervals"]
+            )
+
+        for filt_obj in self.filters.values():
+            self._recomputed_tags.update(filt_obj.tags)
+
+        # The tumor aliquot is the same for every record of the MAF
+        if self.options["gdc_blacklist"]:
+            self.filters["gdc_blacklist"] = Filters.GdcBlacklist.setup(
+                self.options["gdc_blacklist"]
+            )
+            self._blacklist_tags = self.filters["gdc_blacklist"].tags_for(
+                self.maf_header["tumor.aliquot"].value
+            )
+
+        self.logger.info(
+            "Recomputing filters: {0}".format(", ".join(self.filters) or "none")
+        )
+
+    @classmethod
+    def __tool_name__(cls):
+        return "gdc-2.0.0-aliquot"
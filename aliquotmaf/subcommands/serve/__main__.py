@@ -0,0 +1,175 @@
+"""
+Subcommands for running jobs on a long-lived local job server.
+
+* serve   Starts the server, with pre-forked workers keeping their resources
+          loaded between jobs
+* client  Runs a VcfToAliquotMaf, MergeAliquotMafs or MaskMergedAliquotMaf
+          command line on the server
+"""
+
+import argparse
+import json
+import os
+import shlex
+import signal
+import sys
+
+from aliquotmaf.logger import Logger
+from aliquotmaf.subcommands.base import Subcommand
+from aliquotmaf.subcommands.serve.client import submit_job
+from aliquotmaf.subcommands.serve.server import JobServer
+
+
+class Serve(Subcommand):
+    def __init__(self, options=dict()):
+        self.logger = Logger.get_logger(self.__class__.__name__)
+        self.options = options
+
+    @classmethod
+    def __add_arguments__(cls, parser):
+        """Add the arguments to the parser"""
+        parser.add_argument(
+            "--socket", required=True, help="Path of the Unix socket to listen on"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes running the jobs [1]",
+        )
+        parser.add_argument(
+            "--max_runners",
+            type=int,
+            default=4,
+            help="Number of runners, i.e. distinct sets of resource options, "
+            "each worker keeps loaded. The least recently used one is shut down "
+            "first [4]",
+        )
+        parser.add_argument(
+            "--preload",
+            default=None,
+            help="File with one aliquot-maf-tools command line per line. The "
+            "workers load the resources of these commands at startup",
+        )
+
+    @classmethod
+    def __get_description__(cls):
+        """
+        Optionally returns description
+        """
+        return (
+            "Run a local job server keeping the resources of VcfToAliquotMaf, "
+            "MergeAliquotMafs and MaskMergedAliquotMaf loaded between jobs"
+        )
+
+    @classmethod
+    def __tool_name__(cls):
+        """
+        Tool name to use for the subparser
+        """
+        return "serve"
+
+    @classmethod
+    def from_args(cls, args):
+        if args.max_runners < 1:
+            raise ValueError("--max_runners must be 1 or more")
+        return cls(options=vars(args))
+
+    @classmethod
+    def add(cls, subparsers):
+        """Adds the given subcommand to the subparsers."""
+        subparser = super().add(subparsers)
+        subparser.set_defaults(func=cls.from_args)
+        return subparser
+
+    def get_preload(self):
+        """Returns the ``list`` of command line arguments to preload."""
+        if not self.options["preload"]:
+            return []
+        with open(self.options["preload"], "rt") as fh:
+            return [shlex.split(line) for line in fh if line.strip()]
+
+    def do_work(self):
+        """Serves jobs until interrupted or terminated"""
+        path = self.options["socket"]
+        if os.path.exists(path):
+            os.unlink(path)
+
+        server = JobServer(
+            path,
+            workers=self.options["workers"],
+            preload=self.get_preload(),
+            max_runners=self.options["max_runners"],
+        )
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        self.logger.info(
+            "Listening on {0} with {1} workers".format(path, self.options["workers"])
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+class Client(Subcommand):
+    def __init__(self, options=dict()):
+        self.logger = Logger.get_logger(self.__class__.__name__)
+        self.options = options
+
+    @classmethod
+    def __add_arguments__(cls, parser):
+        """Add the arguments to the parser"""
+        parser.add_argument(
+            "--socket", required=True, help="Path of the Unix socket of the server"
+        )
+        parser.add_argument(
+            "args",
+            nargs=argparse.REMAINDER,
+            help="The aliquot-maf-tools command line to run, e.g. "
+            "VcfToAliquotMaf --input_vcf ... gdc-2.0.0-aliquot ...",
+        )
+
+    @classmethod
+    def __get_description__(cls):
+        """
+        Optionally returns description
+        """
+        return "Run an aliquot-maf-tools command line on a local job server"
+
+    @classmethod
+    def __tool_name__(cls):
+        """
+        Tool name to use for the subparser
+        """
+        return "client"
+
+    @classmethod
+    def from_args(cls, args):
+        if not args.args:
+            raise ValueError("No command line to run")
+        return cls(options=vars(args))
+
+    @classmethod
+    def add(cls, subparsers):
+        """Adds the given subcommand to the subparsers."""
+        subparser = super().add(subparsers)
+        subparser.set_defaults(func=cls.from_args)
+        return subparser
+
+    def do_work(self):
+        """Runs the job on the server, relaying its log and metrics"""
+        status = submit_job(
+            self.options["socket"],
+            self.options["args"],
+            on_log=lambda message: print(message, file=sys.stderr),
+        )
+        if status["status"] == "failed":
+            raise ValueError("Job failed: {0}".format(status.get("error")))
+
+        # Print the metrics like the local command
+        if "metrics" in status:
+            print(json.dumps(status["metrics"], indent=2, sort_keys=True))
@@ -0,0 +1,33 @@
+"""
+Client of the local job server, see `aliquotmaf.subcommands.serve.server`.
+"""
+
+import os
+import socket
+
+from aliquotmaf.subcommands.serve.server import read_message, send_message
+
+
+def submit_job(path, args, on_log=None, cwd=None):
+    """
+    Submits a job to the server and waits for it to finish.
+
+    :param path: the path of the Unix socket of the server
+    :param args: the aliquot-maf-tools arguments of the job
+    :param on_log: optional function called with each log line of the job
+    :param cwd: the directory relative paths are resolved from, the current
+        directory by default
+    :return: the job status
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+            send_message(wfile, {"args": list(args), "cwd": cwd or os.getcwd()})
+            while True:
+                message = read_message(rfile)
+                if message is None:
+                    raise ConnectionError("The server closed the connection")
+                if message["event"] == "log" and on_log:
+                    on_log(message["message"])
+                elif message["event"] == "finished":
+                    return message["status"]
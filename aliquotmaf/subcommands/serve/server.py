@@ -0,0 +1,364 @@
+"""
+Local job server running VcfToAliquotMaf, MergeAliquotMafs and
+MaskMergedAliquotMaf jobs on a pool of pre-forked worker processes.
+
+Each worker keeps one runner per distinct set of the ``resource_options`` of
+the runner class, e.g. the annotation and filter files of VcfToAliquotMaf, so
+the priority tables, annotators, filters and merger are loaded once per worker
+and reused by the following jobs, as in batch mode. The other options are
+applied to the runner for each job. A worker keeps at most ``max_runners``
+runners, shutting down the least recently used one first. The relative paths
+of the path options are made absolute against the directory of the client
+first, so clients in different directories never share the resources of
+different files.
+
+Clients connect to a Unix socket and exchange newline-delimited JSON messages:
+
+* request   ``{"args": [...], "cwd": "..."}``, the aliquot-maf-tools arguments
+* events    ``{"event": "accepted", "job": ID}``, then
+            ``{"event": "log", "message": "..."}`` for each log line of the job,
+            and finally ``{"event": "finished", "status": {...}}`` with the job
+            status of `~aliquotmaf.subcommands.batch.run_job`
+"""
+
+import contextlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import socketserver
+import threading
+from collections import OrderedDict
+
+from aliquotmaf.logger import Logger
+from aliquotmaf.subcommands.batch import run_job
+
+# Options naming files or directories, resolved against the directory of the
+# client. The input MAF options of MergeAliquotMafs are added by
+# `resolve_paths`
+PATH_OPTIONS = frozenset(
+    [
+        "input_vcf",
+        "input_maf",
+        "output_maf",
+        "masked_output_maf",
+        "status_json",
+        "checkpoint_dir",
+        "biotype_priority_file",
+        "effect_priority_file",
+        "custom_enst",
+        "reference_fasta",
+        "reference_fasta_index",
+        "cosmic_vcf",
+        "hotspot_tsv",
+        "entrez_gene_id_json",
+        "gnomad_noncancer_vcf",
+        "gdc_blacklist",
+        "gdc_pon_vcf",
+        "nonexonic_intervals",
+        "target_intervals",
+    ]
+)
+
+# State of a worker process, set up by `init_worker`
+_runners = OrderedDict()
+_max_runners = 4
+_log_handler = None
+
+
+def send_message(wfile, message):
+    """Writes a JSON message line."""
+    wfile.write((json.dumps(message, sort_keys=True) + "\n").encode("utf-8"))
+    wfile.flush()
+
+
+def read_message(rfile):
+    """Reads a JSON message line, or returns ``None`` at the end of the stream."""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class JobLogHandler(logging.Handler):
+    """Sends the log records of the running job of a worker to the server."""
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+        self.job_id = None
+        self.setFormatter(logging.Formatter(Logger.LoggerFormat))
+
+    def emit(self, record):
+        if self.job_id is None:
+            return
+        try:
+            self.queue.put((self.job_id, self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+
+def absolute_path(value, cwd):
+    """
+    Returns the absolute path of a path option value relative to `cwd`, or the
+    value unchanged when unset or already absolute. Lists of values are
+    resolved item by item.
+    """
+    if isinstance(value, list):
+        return [absolute_path(item, cwd) for item in value]
+    if not isinstance(value, str) or not value or os.path.isabs(value):
+        return value
+    return os.path.normpath(os.path.join(cwd, value))
+
+
+def resolve_paths(runner_class, options, cwd):
+    """
+    Makes the path options of a job absolute against `cwd`. ``--regions`` is
+    only resolved when it names an existing BED file, as it otherwise holds
+    region strings.
+
+    :param runner_class: the runner class of the job
+    :param options: ``dict`` of the job options, updated in place
+    :param cwd: the directory of the client
+    """
+    path_options = PATH_OPTIONS.union(getattr(runner_class, "input_maf_keys", ()))
+    for key in path_options.intersection(options):
+        options[key] = absolute_path(options[key], cwd)
+
+    regions = options.get("regions")
+    if regions and os.path.exists(os.path.join(cwd, regions)):
+        options["regions"] = absolute_path(regions, cwd)
+
+
+def parse_job_args(args, cwd=None):
+    """
+    Parses the aliquot-maf-tools arguments of a job. The path options, e.g. the
+    resources, inputs and outputs, are made absolute against `cwd`.
+
+    :param args: the aliquot-maf-tools arguments
+    :param cwd: the directory of the client, the current directory by default
+    :return: a ``tuple`` of the runner class, the ``dict`` of the options,
+        without the manifest columns, and the ``dict`` of the manifest columns
+        of the job
+    :raises ValueError: for invalid arguments and unsupported subcommands
+    """
+    from aliquotmaf.__main__ import get_parser
+
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(stderr):
+            options = get_parser().parse_args(args)
+    except SystemExit:
+        raise ValueError(stderr.getvalue().strip() or "Invalid arguments")
+
+    runner_class = options.func.__self__
+    if not hasattr(runner_class, "run_job"):
+        raise ValueError("{0} is not supported by serve".format(runner_class.__name__))
+    if getattr(options, "manifest", None):
+        raise ValueError("--manifest is not supported by serve")
+    runner_class.__validate_options__(options)
+
+    options = {k: v for k, v in vars(options).items() if k != "func"}
+    resolve_paths(runner_class, options, cwd or os.getcwd())
+    job = {key: options.pop(key, None) for key in runner_class.manifest_columns}
+    return runner_class, options, job
+
+
+def get_runner(runner_class, options):
+    """
+    Returns the runner of the worker for the resource options of the runner
+    class, creating it and loading its resources on first use. The least
+    recently used runner is shut down when the worker has more than
+    ``max_runners`` runners.
+
+    :param runner_class: the runner class of the job
+    :param options: ``dict`` of the job options the runner is created with
+    """
+    resources = {
+        key: options.get(key) for key in getattr(runner_class, "resource_options", ())
+    }
+    key = (runner_class, json.dumps(resources, sort_keys=True, default=str))
+    runner = _runners.get(key)
+    if runner is not None:
+        _runners.move_to_end(key)
+        return runner
+
+    runner = runner_class(dict(options))
+    if hasattr(runner, "load_resources"):
+        runner.load_resources()
+    _runners[key] = runner
+
+    while len(_runners) > _max_runners:
+        _, evicted = _runners.popitem(last=False)
+        if hasattr(evicted, "shutdown_annotators"):
+            evicted.shutdown_annotators()
+    return runner
+
+
+def init_worker(log_queue, preload, max_runners=4):
+    """
+    Sets up a worker process, loading the resources of the `preload` jobs.
+
+    :param log_queue: the queue the job log records are sent to
+    :param preload: ``list`` of job arguments whose runners are set up
+    :param max_runners: the number of runners the worker keeps
+    """
+    global _log_handler, _max_runners
+    _log_handler = JobLogHandler(log_queue)
+    Logger.RootLogger.addHandler(_log_handler)
+    _max_runners = max_runners
+
+    for args in preload:
+        runner_class, options, _ = parse_job_args(args)
+        get_runner(runner_class, options)
+
+
+def run_request(job_id, args, cwd=None):
+    """
+    Runs a job in a worker process.
+
+    :return: the job status
+    """
+    _log_handler.job_id = job_id
+    try:
+        if cwd:
+            os.chdir(cwd)
+        try:
+            runner_class, options, job = parse_job_args(args, cwd)
+            runner = get_runner(runner_class, options)
+            # The options that aren't resources can change between jobs
+            runner.options.update(options)
+        except Exception as e:
+            return {
+                "status": "failed",
+                "error": "{0}: {1}".format(e.__class__.__name__, e),
+            }
+
+        status = run_job(job, runner)
+        status["pid"] = os.getpid()
+        return status
+
+    finally:
+        _log_handler.job_id = None
+        # Marks the end of the log records of the job
+        _log_handler.queue.put((job_id, None))
+
+
+class JobRequestHandler(socketserver.StreamRequestHandler):
+    """Handles a job request of a client connection."""
+
+    def handle(self):
+        request = read_message(self.rfile)
+        if request is None:
+            return
+
+        job = self.server.register(self.wfile)
+        try:
+            job.send({"event": "accepted", "job": job.id})
+            self.server.logger.info(
+                "Job {0}: {1}".format(job.id, " ".join(request["args"]))
+            )
+            result = self.server.pool.apply_async(
+                run_request, (job.id, request["args"], request.get("cwd"))
+            )
+            status = result.get()
+            # Wait for the last log records of the job
+            job.logs_done.wait(timeout=10)
+            self.server.logger.info(
+                "Job {0} {1} in {2}s".format(
+                    job.id, status["status"], status.get("seconds", 0)
+                )
+            )
+            job.send({"event": "finished", "status": status})
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.logger.warning("Job {0} client disconnected".format(job.id))
+        finally:
+            self.server.unregister(job)
+
+
+class JobConnection:
+    """The connection of a job, shared by the handler and the log dispatcher."""
+
+    def __init__(self, job_id, wfile):
+        self.id = job_id
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.logs_done = threading.Event()
+
+    def send(self, message):
+        with self.lock:
+            send_message(self.wfile, message)
+
+
+class JobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server running the jobs of its clients on `workers` worker
+    processes.
+
+    :param path: the path of the Unix socket
+    :param workers: the number of worker processes
+    :param preload: ``list`` of job arguments whose resources the workers
+        load at startup
+    :param max_runners: the number of runners each worker keeps loaded
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, workers=1, preload=None, max_runners=4):
+        self.logger = Logger.get_logger(self.__class__.__name__)
+
+        context = multiprocessing.get_context("fork")
+        self.log_queue = context.Queue()
+        self.pool = context.Pool(
+            processes=workers,
+            initializer=init_worker,
+            initargs=(self.log_queue, preload or [], max_runners),
+        )
+
+        self._job_ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        super().__init__(path, JobRequestHandler)
+
+        self._dispatcher = threading.Thread(target=self.dispatch_logs, daemon=True)
+        self._dispatcher.start()
+
+    def register(self, wfile):
+        """Registers the connection of a new job."""
+        with self._lock:
+            job = JobConnection(next(self._job_ids), wfile)
+            self._jobs[job.id] = job
+        return job
+
+    def unregister(self, job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+    def dispatch_logs(self):
+        """Forwards the log records of the workers to the job clients."""
+        while True:
+            item = self.log_queue.get()
+            if item is None:
+                return
+            job_id, message = item
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            if message is None:
+                job.logs_done.set()
+                continue
+            try:
+                job.send({"event": "log", "message": message})
+            except OSError:
+                pass
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        self.pool.join()
+        self.log_queue.put(None)
+        self._dispatcher.join()
@@ -1,19 +1,78 @@
 """Utility functions for subcommands"""
 
-import gzip
+import functools
 import json
 import re
 
+from maflib.reader import MafReader
+from maflib.writer import MafWriter
 
-def get_open_function(fil):
+from aliquotmaf import bgzf
+from aliquotmaf.regions import MafRegionLines, index_maf
+
+
+def add_io_arguments(group, indexed_inputs):
+    """
+    Adds the ``--io_threads`` and ``--regions`` options shared by the
+    subcommands to their input/output argument group.
+
+    :param group: the argument group
+    :param indexed_inputs: the inputs ``--regions`` needs an index of, e.g.
+        ``"an indexed VCF"``
+    """
+    group.add_argument(
+        "--io_threads",
+        type=int,
+        default=1,
+        help="Number of threads used for BGZF compression and decompression "
+        "of the input and output files",
+    )
+    group.add_argument(
+        "--regions",
+        default=None,
+        help="Only process records whose MAF Start_Position lies in these "
+        "regions, so a VCF deletion is selected on POS + 1. Either a BED "
+        "file or comma-separated 1-based inclusive chr:start-end regions. "
+        "Requires {0}".format(indexed_inputs),
+    )
+
+
+def get_open_function(fil, threads=1):
     """
-    Returns the appropriate open function based on gz ending.
+    Returns the appropriate open function based on gz ending. Compressed files
+    are read and written as BGZF with `threads` (de)compression threads.
     """
     if fil.endswith(".gz"):
-        return gzip.open
+        return functools.partial(bgzf.open, threads=threads)
     return open
 
 
+def maf_reader_from(path, threads=1, regions=None, **kwargs):
+    """
+    Creates a ``~maflib.reader.MafReader`` for the path, decompressing
+    ``.gz`` files with `threads` threads. When `regions` are given only the
+    records starting in them are read, using the tabix index of the MAF.
+    """
+    if regions:
+        handle = MafRegionLines(path, regions, threads=threads)
+    else:
+        handle = get_open_function(path, threads)(path, "rt")
+    return MafReader(lines=handle, closeable=handle, **kwargs)
+
+
+def maf_writer_from(path, header, threads=1, **kwargs):
+    """
+    Creates a ``~maflib.writer.MafWriter`` for the path. ``.gz`` outputs are
+    written as BGZF with `threads` compression threads and are tabix indexed
+    once closed.
+    """
+    if path.endswith(".gz"):
+        handle = bgzf.open(path, "wt", threads=threads, on_close=index_maf)
+    else:
+        handle = open(path, "wt")
+    return MafWriter.from_fd(desc=handle, header=header, **kwargs)
+
+
 def load_json(fil):
     """
     Loads a json file.
@@ -3,10 +3,12 @@ Subcommand for converting a VEP annotated VCF to a raw aliquot MAF.
 """
 
 from aliquotmaf.subcommands.base import Subcommand
+from aliquotmaf.subcommands.batch import add_batch_arguments
 from aliquotmaf.subcommands.vcf_to_aliquot.runners import (
     GDC_1_0_0_Aliquot,
     GDC_2_0_0_Aliquot,
 )
+from aliquotmaf.subcommands.utils import add_io_arguments
 
 
 class VcfToAliquotMaf(Subcommand):
@@ -16,10 +18,22 @@ class VcfToAliquotMaf(Subcommand):
         # Input group
         p_input = parser.add_argument_group(title="Input/Output Options")
         p_input.add_argument(
-            "--input_vcf", required=True, help="Path to input VCF file"
+            "--input_vcf", help="Path to input VCF file. Required without --manifest"
         )
         p_input.add_argument(
-            "--output_maf", required=True, help="Path to output MAF file"
+            "--output_maf", help="Path to output MAF file. Required without --manifest"
+        )
+        add_io_arguments(p_input, "an indexed VCF")
+
+        # Batch group
+        add_batch_arguments(
+            parser,
+            "Convert the VCFs listed in this TSV in one run, setting up the "
+            "annotators and filters once. The header line names the columns, "
+            "input_vcf and output_maf are required. The other columns are "
+            "per-VCF sample options such as caller_id, src_vcf_uuid or "
+            "tumor_aliquot_uuid; empty cells use the command line value",
+            "VCF",
         )
 
         # subparsers
@@ -0,0 +1,224 @@
+"""
+Checkpoint and resume support for long vcf_to_aliquot runs.
+
+The checkpoint directory holds a ``checkpoint.json`` state file and one BGZF
+compressed MAF chunk per checkpoint with the records produced since the
+previous one. A restarted run validates the fingerprint of the input and
+options, reloads the chunks into a new sorter and skips the VCF records that
+were already processed.
+"""
+
+import hashlib
+import json
+import os
+
+from aliquotmaf import bgzf
+from aliquotmaf.logger import Logger
+from aliquotmaf.subcommands.utils import maf_reader_from
+
+# Options that don't change the output and are left out of the fingerprint
+_IGNORED_OPTIONS = frozenset(
+    [
+        "checkpoint_dir",
+        "checkpoint_interval",
+        "io_threads",
+        "worker_threads",
+        "batch_size",
+        "queue_size",
+        "annotator_threads",
+    ]
+)
+
+
+class Checkpoint:
+    """
+    Periodically persists the progress of a run.
+
+    :param directory: the checkpoint directory, created if missing
+    :param fingerprint: fingerprint of the input and options, see
+        `fingerprint_of`
+    :param maf_header: the ``~maflib.header.MafHeader`` of the output
+    :param columns: the MAF columns
+    :param interval: maximum number of VCF records between checkpoints
+    """
+
+    STATE_FILE = "checkpoint.json"
+
+    def __init__(self, directory, fingerprint, maf_header, columns, interval=100000):
+        self.logger = Logger.get_logger(self.__class__.__name__)
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.maf_header = maf_header
+        self.columns = columns
+        self.interval = interval
+
+        # Progress of the last saved checkpoint
+        self.line = 0
+        self.contig = None
+        self.pos = None
+        self.chunks = []
+
+        # Progress since the last saved checkpoint
+        self._buffer = []
+        self._contig = None
+        self._pos = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def fingerprint_of(input_path, options):
+        """
+        Fingerprints the input file by path, size and modification time, and
+        every option that affects the output.
+        """
+        stat = os.stat(input_path)
+        opts = {
+            k: v
+            for k, v in options.items()
+            if k not in _IGNORED_OPTIONS
+            and isinstance(v, (str, int, float, bool, list, type(None)))
+        }
+        payload = json.dumps(
+            {
+                "input": os.path.abspath(input_path),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "options": opts,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, self.STATE_FILE)
+
+    def load(self):
+        """
+        Loads the saved state. A checkpoint from a different input or options
+        is discarded.
+
+        :return: ``True`` when resuming from a checkpoint
+        """
+        if not os.path.exists(self.state_path):
+            return False
+
+        with open(self.state_path, "rt") as fh:
+            state = json.load(fh)
+
+        if state["fingerprint"] != self.fingerprint:
+            self.chunks = state["chunks"]
+            self.logger.warning(
+                "Checkpoint fingerprint does not match the input and options, "
+                "starting over"
+            )
+            self.clear()
+            return False
+
+        self.line = state["line"]
+        self.contig = state["contig"]
+        self.pos = state["pos"]
+        self.chunks = state["chunks"]
+        self._contig, self._pos = self.contig, self.pos
+        self.logger.info(
+            "Resuming after record {0} ({1}:{2})".format(
+                self.line, self.contig, self.pos
+            )
+        )
+        return True
+
+    def records(self, threads=1, **kwargs):
+        """Yields the saved MAF records. Keyword arguments go to the reader."""
+        for chunk in self.chunks:
+            reader = maf_reader_from(
+                path=os.path.join(self.directory, chunk), threads=threads, **kwargs
+            )
+            try:
+                yield from reader
+            finally:
+                reader.close()
+
+    def is_done(self, line, contig, pos):
+        """
+        Checks whether VCF record number `line` was processed before the
+        checkpoint. The last processed record must match the saved locus.
+        """
+        if line < self.line:
+            return True
+        if line == self.line:
+            if (contig, pos) != (self.contig, self.pos):
+                raise ValueError(
+                    "Record {0} is {1}:{2} but the checkpoint expected "
+                    "{3}:{4}".format(line, contig, pos, self.contig, self.pos)
+                )
+            return True
+        return False
+
+    def update(self, line, contig, pos):
+        """
+        Called before processing VCF record number `line`. Saves a checkpoint
+        when a contig is completed or `interval` records were processed.
+        """
+        completed = line - 1
+        if self._contig is not None and (
+            contig != self._contig or completed - self.line >= self.interval
+        ):
+            self.save(completed)
+        self._contig = contig
+        self._pos = pos
+
+    def add(self, maf_record):
+        """Adds a MAF record produced since the last checkpoint."""
+        self._buffer.append(str(maf_record))
+
+    def save(self, line):
+        """
+        Persists the records produced since the last checkpoint and the state
+        after VCF record number `line`. Both are written to temporary files
+        and renamed, so a run killed while saving keeps the previous
+        checkpoint.
+        """
+        if self._buffer:
+            chunk = "chunk_{0:06d}.maf.gz".format(len(self.chunks))
+            tmp_path = os.path.join(self.directory, chunk + ".tmp")
+            with bgzf.open(tmp_path, "wt") as fh:
+                fh.write(str(self.maf_header) + "\n")
+                fh.write("\t".join(self.columns) + "\n")
+                for record in self._buffer:
+                    fh.write(record + "\n")
+            os.replace(tmp_path, os.path.join(self.directory, chunk))
+            self.chunks.append(chunk)
+            self._buffer = []
+
+        self.line = line
+        self.contig = self._contig
+        self.pos = self._pos
+        state = {
+            "fingerprint": self.fingerprint,
+            "line": self.line,
+            "contig": self.contig,
+            "pos": self.pos,
+            "chunks": self.chunks,
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "wt") as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, self.state_path)
+        self.logger.info(
+            "Saved checkpoint after record {0} ({1}:{2})".format(
+                self.line, self.contig, self.pos
+            )
+        )
+
+    def clear(self):
+        """Removes the state and chunks once the run is finished."""
+        for chunk in self.chunks:
+            path = os.path.join(self.directory, chunk)
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        self.line = 0
+        self.contig = None
+        self.pos = None
+        self.chunks = []
@@ -1,8 +1,17 @@
 from __future__ import absolute_import
 
 from .base import Extractor
-from .effects import EffectsExtractor, EffectsExtractor_102, SelectOneEffectExtractor
-from .genotypes import GenotypeAndDepthsExtractor, VariantAlleleIndexExtractor
+from .effects import (
+    EffectsCache,
+    EffectsExtractor,
+    EffectsExtractor_102,
+    SelectOneEffectExtractor,
+)
+from .genotypes import (
+    ExtractionPlan,
+    GenotypeAndDepthsExtractor,
+    VariantAlleleIndexExtractor,
+)
 from .location import LocationDataExtractor
 from .population_frequency import PopulationFrequencyExtractor
 from .variant_class import VariantClassExtractor
@@ -11,10 +20,12 @@ __all__ = [
     Extractor,
     VariantAlleleIndexExtractor,
     GenotypeAndDepthsExtractor,
+    ExtractionPlan,
     LocationDataExtractor,
     EffectsExtractor,
     EffectsExtractor_102,
     SelectOneEffectExtractor,
+    EffectsCache,
     PopulationFrequencyExtractor,
     VariantClassExtractor,
 ]
@@ -6,13 +6,27 @@ some input source, mostly engineered for VEP annotated VCF files.
 * EffectsExtractor_102     Extract the VEP effects into a list of formatted
                            dictionaries based on VEP v102 outputs.
 * SelectOneEffectExtractor Select a single transcript effect based on priorities
+* EffectsCache             Bounded LRU cache of decoded and selected effects
 """
 
+import hashlib
 import re
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Final, List, Mapping, Optional, Tuple
 
 from aliquotmaf.subcommands.vcf_to_aliquot.extractors import Extractor
 
+# CSQ fields that never change for a given Feature within a VEP run
+TRANSCRIPT_STATIC_FIELDS: Final[Tuple[str, ...]] = (
+    "BIOTYPE",
+    "SYMBOL",
+    "CANONICAL",
+    "STRAND",
+    "ENTREZ",
+    "RefSeq",
+)
+
 
 class EffectsExtractor(Extractor):
     """A `~maf_converter_lib.extractor.Extractor` class that takes the VEP
@@ -47,6 +61,25 @@ class EffectsExtractor(Extractor):
         "Ter": "*",
     }
 
+    @staticmethod
+    def get_dbsnp_rs(existing_variation):
+        """
+        Returns the dbSNP_RS value of the ``;`` separated Existing_variation of
+        an effect.
+
+        :param existing_variation: the Existing_variation of the effect
+        :return: the dbSNP IDs, ``"novel"`` if VEP couldn't find the variant in
+            dbSNP/etc. or ``None`` if it was only seen in other databases
+        """
+        # If VEP couldn't find this variant in dbSNP/etc., we'll say it's "novel"
+        if not existing_variation:
+            return "novel"
+        # ::NOTE:: If seen in a DB other than dbSNP, this field will remain blank
+        dbsnp_rs = ";".join(
+            [i for i in existing_variation.split(";") if re.search(r"^rs\d+$", i)]
+        )
+        return dbsnp_rs or None
+
     @classmethod
     def extract(
         cls, effect_priority, biotype_priority, effect_keys, effect_list, var_idx
@@ -154,20 +187,7 @@ class EffectsExtractor(Extractor):
             else:
                 effect["Entrez_Gene_Id"] = None
 
-            # If VEP couldn't find this variant in dbSNP/etc., we'll say it's "novel"
-            if effect["Existing_variation"]:
-                # ::NOTE:: If seen in a DB other than dbSNP, this field will remain blank
-                effect["dbSNP_RS"] = ";".join(
-                    [
-                        i
-                        for i in effect["Existing_variation"].split(";")
-                        if re.search(r"^rs\d+$", i)
-                    ]
-                )
-                if effect["dbSNP_RS"] == "":
-                    effect["dbSNP_RS"] = None
-            else:
-                effect["dbSNP_RS"] = "novel"
+            effect["dbSNP_RS"] = cls.get_dbsnp_rs(effect["Existing_variation"])
 
             # Transcript_Length isn't separately reported, but can be parsed out
             # from cDNA_position
@@ -196,6 +216,7 @@ class EffectsExtractor_102(EffectsExtractor):
         effect_keys: List[str],
         effect_list: List[str],
         var_idx: int,
+        transcripts: Optional[Dict[str, Mapping[str, Optional[str]]]] = None,
     ) -> List[Dict[str, Optional[str]]]:
         """
         Entry point for parsing VEP effects.
@@ -205,15 +226,32 @@ class EffectsExtractor_102(EffectsExtractor):
                             effect_list
         :param effect_list: `list` of lists of effect data
         :param var_idx: the variant allele index
+        :param transcripts: optional run-level `dict` of Feature IDs to their
+                            interned static attributes. It is filled the first
+                            time a Feature is seen and reused afterwards.
         :returns: a `list` of effect `dict`
         """
         # The list of parsed effects to return
         all_effects = []
 
+        try:
+            feature_idx = effect_keys.index("Feature")
+        except ValueError:
+            feature_idx = None
+
         # Loop over each effect
         for edat in effect_list:
+            feature = None
+            transcript = None
+            if transcripts is not None and feature_idx is not None:
+                feature = edat[feature_idx] if feature_idx < len(edat) else None
+                transcript = transcripts.get(feature) if feature else None
+
             effect = {}
             for i, v in enumerate(effect_keys):
+                if transcript is not None and v in transcript:
+                    effect[v] = transcript[v]
+                    continue
                 try:
                     if edat[i]:
                         effect[v] = edat[i].replace("&", ";")
@@ -308,34 +346,51 @@ class EffectsExtractor_102(EffectsExtractor):
             effect["ESP_AA_AF"] = effect.get("AA_AF", None)
             effect["ESP_EA_AF"] = effect.get("EA_AF", None)
 
-            # If VEP couldn't find this variant in dbSNP/etc., we'll say it's "novel"
-            if effect["Existing_variation"]:
-                # ::NOTE:: If seen in a DB other than dbSNP, this field will remain blank
-                effect["dbSNP_RS"] = ";".join(
-                    [
-                        i
-                        for i in effect["Existing_variation"].split(";")
-                        if re.search(r"^rs\d+$", i)
-                    ]
-                )
-                if effect["dbSNP_RS"] == "":
-                    effect["dbSNP_RS"] = None
-            else:
-                effect["dbSNP_RS"] = "novel"
+            effect["dbSNP_RS"] = cls.get_dbsnp_rs(effect["Existing_variation"])
 
             # Transcript_Length isn't separately reported, but can be parsed out
             # from cDNA_position
             if effect["cDNA_position"]:
-                tlen = re.search(r"\/(\d+)$", effect["cDNA_position"])
-                effect["Transcript_Length"] = tlen.group(1) if tlen is not None else "0"
+                if transcript is not None and transcript["Transcript_Length"]:
+                    effect["Transcript_Length"] = transcript["Transcript_Length"]
+                else:
+                    tlen = re.search(r"\/(\d+)$", effect["cDNA_position"])
+                    effect["Transcript_Length"] = (
+                        tlen.group(1) if tlen is not None else "0"
+                    )
+                    if tlen is not None and feature:
+                        transcript = cls._intern_transcript(
+                            transcripts, feature, effect, tlen.group(1)
+                        )
             else:
                 effect["Transcript_Length"] = "0"
 
+            if transcript is None and feature:
+                cls._intern_transcript(transcripts, feature, effect, None)
+
             # Append the current effect to the all_effects list
             all_effects.append(effect)
 
         return all_effects
 
+    @staticmethod
+    def _intern_transcript(transcripts, feature, effect, transcript_length):
+        """
+        Stores the static attributes of a Feature as a read-only mapping so
+        that later effects on the same Feature share the same objects.
+
+        :param transcripts: the run-level `dict` of interned Features
+        :param feature: the Feature ID
+        :param effect: the parsed effect to copy the static fields from
+        :param transcript_length: the Transcript_Length parsed from
+                                  cDNA_position, or ``None`` if unknown
+        :returns: the interned mapping
+        """
+        record = {k: effect.get(k) for k in TRANSCRIPT_STATIC_FIELDS}
+        record["Transcript_Length"] = transcript_length
+        transcripts[feature] = MappingProxyType(record)
+        return transcripts[feature]
+
 
 class SelectOneEffectExtractor(Extractor):
     """A `~maf_converter_lib.extractor.Extractor` class that takes the priority
@@ -429,3 +484,83 @@ class SelectOneEffectExtractor(Extractor):
                 maf_effect = all_effects[0]
 
         return all_effects, maf_effect
+
+
+class EffectsCache:
+    """A bounded LRU cache of decoded VEP effects. Byte-identical CSQ values
+    are common across multiallelic splits and neighbouring records, so the
+    selected effect and the formatted ``all_effects`` list are stored once
+    and shared by every record with the same CSQ value and variant allele
+    index.
+
+    The cached selected effect must be treated as read-only; use
+    ``dict(selected_effect)`` before mutating it.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[bytes, Tuple[dict, Tuple[str, ...]]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(raw_csq, var_idx: int) -> bytes:
+        """
+        Builds the cache key from the raw CSQ INFO value and the variant
+        allele index.
+
+        :param raw_csq: the raw CSQ value, either a string or the tuple of
+                        comma-separated entries returned by pysam
+        :param var_idx: the variant allele index
+        :returns: a digest of the CSQ value and allele index
+        """
+        if not isinstance(raw_csq, str):
+            raw_csq = ",".join(raw_csq)
+        digest = hashlib.blake2b(raw_csq.encode("utf-8"), digest_size=16)
+        digest.update(var_idx.to_bytes(4, "little", signed=True))
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[dict, Tuple[str, ...]]]:
+        """
+        Returns the cached ``(selected_effect, all_effects)`` pair for the key
+        or ``None`` on a miss.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(
+        self, key: bytes, selected_effect: dict, all_effects: List[str]
+    ) -> Tuple[dict, Tuple[str, ...]]:
+        """
+        Stores the selected effect and formatted effects list, evicting the
+        least recently used entry when the cache is full.
+        """
+        value = (selected_effect, tuple(all_effects))
+        if self.maxsize <= 0:
+            return value
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit and miss statistics of the cache.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
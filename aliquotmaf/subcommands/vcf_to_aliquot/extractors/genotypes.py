@@ -3,9 +3,10 @@ here are subclasses of `~maf_converter_lib.extractor.Extractor` objects.
 
 * ExtractVariantAlleleIndexParser   extracts the variant allele index
 * ExtractGenotypeAndDepthsParser    extracts the genotype and depths
+* ExtractionPlan                    the caller specific extraction of a run
 """
 
-from typing import Final, List
+from typing import Dict, Final, List, Tuple
 
 from aliquotmaf.constants import variant_callers
 from aliquotmaf.logger import Logger
@@ -22,6 +23,26 @@ CAVEMAN_NUCLEOTIDE_COUNTS: Final[List[str]] = [
     "RTZ",
 ]
 
+# The forward and reverse strand CaVEMan count keys of each nucleotide
+CAVEMAN_ALLELE_COUNTS: Final[Dict[str, Tuple[str, str]]] = {
+    key[1]: (key, "R" + key[1:]) for key in CAVEMAN_NUCLEOTIDE_COUNTS if key[0] == "F"
+}
+
+# The FORMAT keys read from the samples of each variant caller, by the depth
+# extraction and the mutation status
+CALLER_FORMAT_KEYS: Final[Dict[str, Tuple[str, ...]]] = {
+    variant_callers.MUTECT2.GDC_ENUM: ("AD",),
+    variant_callers.GATK4_MUTECT2.GDC_ENUM: ("AD",),
+    variant_callers.GATK4_MUTECT2_PAIR.GDC_ENUM: ("AD",),
+    variant_callers.SOMATIC_SNIPER.GDC_ENUM: ("BCOUNT", "SS"),
+    variant_callers.MUSE.GDC_ENUM: ("AD", "DP", "SS"),
+    variant_callers.VARSCAN2.GDC_ENUM: ("RD", "AD", "DP"),
+    variant_callers.PINDEL.GDC_ENUM: ("AD", "DP"),
+    variant_callers.SANGER_PINDEL.GDC_ENUM: ("NR", "PR", "NP", "PP"),
+    variant_callers.SVABA_SOMATIC.GDC_ENUM: ("AD", "DP"),
+    variant_callers.CAVEMAN.GDC_ENUM: tuple(CAVEMAN_NUCLEOTIDE_COUNTS),
+}
+
 
 class VariantAlleleIndexExtractor(Extractor):
     """Extractor class for extracting the variant allele index"""
@@ -56,7 +77,9 @@ class GenotypeAndDepthsExtractor(Extractor):
     logger = Logger.get_logger("GenotypeAndDepthsExtractor")
 
     @classmethod
-    def extract(cls, var_allele_idx, genotype, alleles, caller_id):
+    def extract(
+        cls, var_allele_idx, genotype, alleles, caller_id=None, depths_function=None
+    ):
         """
         Extracts genotype and allele depths from variant and normalizes
         the formatting before returning the results.
@@ -68,6 +91,9 @@ class GenotypeAndDepthsExtractor(Extractor):
                         at the locus
         :param caller_id: a string identifying the variant caller that
                           generated the vcf file
+        :param depths_function: the depth extraction function of the caller,
+                                see `depths_function`, used instead of
+                                dispatching on `caller_id`
         :returns: an updated genotype record and depths list
         """
         depths = []
@@ -75,9 +101,12 @@ class GenotypeAndDepthsExtractor(Extractor):
         dp = 0
         if genotype.get("GT", {}):
             # extract depths and dp from vcf
-            depths, dp = cls._dispatch_extractor(
-                var_allele_idx, genotype, alleles, caller_id
-            )
+            if depths_function is not None:
+                depths, dp = depths_function(var_allele_idx, genotype, alleles)
+            else:
+                depths, dp = cls._dispatch_extractor(
+                    var_allele_idx, genotype, alleles, caller_id
+                )
             # Format allele depths for AD
             new_gt["AD"] = tuple(
                 [i if i != "" and i is not None else "." for i in depths]
@@ -102,33 +131,43 @@ class GenotypeAndDepthsExtractor(Extractor):
         :param caller_id: a string identifying the variant caller that
                           generated the vcf file
         """
-        depths = []
-        dp = 0
-        if caller_id == variant_callers.CAVEMAN:
-            depths, dp = cls._extract_caveman(var_allele_idx, genotype, alleles)
-        if caller_id == variant_callers.GATK4_MUTECT2:
-            depths, dp = cls._extract_mutect2(genotype)
-        if caller_id == variant_callers.MUTECT2:
-            depths, dp = cls._extract_mutect2(genotype)
-        if caller_id == variant_callers.GATK4_MUTECT2_PAIR:
-            depths, dp = cls._extract_mutect2(genotype)
-        if caller_id == variant_callers.SOMATIC_SNIPER:
-            depths, dp = cls._extract_somaticsniper(var_allele_idx, genotype, alleles)
-        if caller_id == variant_callers.MUSE:
-            depths, dp = cls._extract_muse(genotype)
-        if caller_id == variant_callers.VARSCAN2:
-            depths, dp = cls._extract_varscan2(var_allele_idx, genotype, alleles)
-        if caller_id == variant_callers.PINDEL:
-            depths, dp = cls._extract_pindel(genotype)
-        if caller_id == variant_callers.SANGER_PINDEL:
-            depths, dp = cls._extract_sanger_pindel(genotype)
-        if caller_id == variant_callers.SVABA_SOMATIC:
-            depths, dp = cls._extract_svaba_somatic(genotype)
-        if caller_id == variant_callers.STRELKA_SOMATIC:
-            depths, dp = cls._extract_strelka_somatic(genotype)
+        return cls.depths_function(caller_id)(var_allele_idx, genotype, alleles)
+
+    @classmethod
+    def depths_function(cls, caller_id):
+        """
+        Returns the depth extraction function of a variant caller, taking the
+        variant allele index, the genotype and the alleles and returning the
+        allele depths and the total depth. Runners look it up once per run
+        instead of dispatching for each sample.
+
+        :param caller_id: a string identifying the variant caller that
+                          generated the vcf file
+        """
+        caller_id = getattr(caller_id, "GDC_ENUM", caller_id)
+        by_alleles = {
+            variant_callers.CAVEMAN.GDC_ENUM: cls._extract_caveman,
+            variant_callers.SOMATIC_SNIPER.GDC_ENUM: cls._extract_somaticsniper,
+            variant_callers.VARSCAN2.GDC_ENUM: cls._extract_varscan2,
+        }
+        by_genotype = {
+            variant_callers.GATK4_MUTECT2.GDC_ENUM: cls._extract_mutect2,
+            variant_callers.MUTECT2.GDC_ENUM: cls._extract_mutect2,
+            variant_callers.GATK4_MUTECT2_PAIR.GDC_ENUM: cls._extract_mutect2,
+            variant_callers.MUSE.GDC_ENUM: cls._extract_muse,
+            variant_callers.PINDEL.GDC_ENUM: cls._extract_pindel,
+            variant_callers.SANGER_PINDEL.GDC_ENUM: cls._extract_sanger_pindel,
+            variant_callers.SVABA_SOMATIC.GDC_ENUM: cls._extract_svaba_somatic,
+            variant_callers.STRELKA_SOMATIC.GDC_ENUM: cls._extract_strelka_somatic,
+        }
         # if caller_id == variant_callers.VARDICT:
         #     self.extract_legacy(cls, var_allele_idx, genotype, alleles)
-        return depths, dp
+        if caller_id in by_alleles:
+            return by_alleles[caller_id]
+        if caller_id in by_genotype:
+            extract_fn = by_genotype[caller_id]
+            return lambda var_allele_idx, genotype, alleles: extract_fn(genotype)
+        return lambda var_allele_idx, genotype, alleles: ([], 0)
 
     @classmethod
     def _extract_mutect2(cls, genotype):
@@ -174,12 +213,10 @@ class GenotypeAndDepthsExtractor(Extractor):
         """
         # Handle CaVEMan which provides genotype and counts for all nucleotides in forward and reverse strands
         var_allele = alleles[var_allele_idx]
-        var_f_count_name = f"F{var_allele}Z"
-        var_r_count_name = f"R{var_allele}Z"
+        var_f_count_name, var_r_count_name = CAVEMAN_ALLELE_COUNTS[var_allele]
         var_count = genotype[var_f_count_name] + genotype[var_r_count_name]
         ref_allele = [al for al in alleles if al != var_allele][0]
-        ref_f_count_name = f"F{ref_allele}Z"
-        ref_r_count_name = f"R{ref_allele}Z"
+        ref_f_count_name, ref_r_count_name = CAVEMAN_ALLELE_COUNTS[ref_allele]
         ref_count = genotype[ref_f_count_name] + genotype[ref_r_count_name]
 
         # set depths of alleles
@@ -393,3 +430,46 @@ class GenotypeAndDepthsExtractor(Extractor):
         new_gt["GT"] = genotype["GT"]
         depths = [i if i != "." and i is not None else 0 for i in new_gt["AD"]]
         return new_gt, depths
+
+
+class ExtractionPlan:
+    """
+    The caller specific genotype and depth extraction of a run, resolved once
+    at setup instead of for each record and sample: the depth extraction
+    function of the variant caller, and the FORMAT keys it reads checked
+    against the VCF header.
+
+    :param caller_id: a string identifying the variant caller that
+                      generated the vcf file
+    :param header: the VCF header, or ``None`` to skip the FORMAT key check
+    """
+
+    logger = Logger.get_logger("ExtractionPlan")
+
+    def __init__(self, caller_id, header=None):
+        self.caller_id = caller_id
+        self.depths_function = GenotypeAndDepthsExtractor.depths_function(caller_id)
+        self.format_keys = CALLER_FORMAT_KEYS.get(
+            getattr(caller_id, "GDC_ENUM", caller_id), ()
+        )
+        self.missing_keys = ()
+        if header is not None:
+            self.missing_keys = tuple(
+                key for key in self.format_keys if key not in header.formats
+            )
+            if self.missing_keys:
+                self.logger.warning(
+                    "FORMAT keys {0} of {1} missing from the VCF header, records "
+                    "without them fail to convert".format(
+                        list(self.missing_keys), caller_id
+                    )
+                )
+
+    def extract(self, var_allele_idx, genotype, alleles):
+        """
+        Extracts the genotype and allele depths of a sample, see
+        `GenotypeAndDepthsExtractor.extract`.
+        """
+        return GenotypeAndDepthsExtractor.extract(
+            var_allele_idx, genotype, alleles, depths_function=self.depths_function
+        )
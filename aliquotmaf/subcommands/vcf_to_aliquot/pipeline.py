@@ -0,0 +1,280 @@
+"""
+Threaded producer/consumer pipeline of the VCF conversion.
+
+The stages are connected by bounded queues, so a slow stage stalls the stages
+feeding it instead of buffering the whole VCF:
+
+* reader     decodes the VCF records, in batches
+* workers    extract and transform the batches, `threads` of them in parallel
+* annotator  annotates and filters the batches of MAF records, in VCF order
+* consumer   the thread iterating the `ConversionPipeline`, e.g. the sorter
+* writer     serializes and compresses the sorted MAF records, see
+             `RecordWriter`
+
+Much of the decoding, the annotation lookups and the compression happen in
+pysam and htslib code releasing the GIL, which lets the stages overlap. Each
+queue records its depth and the time the stages spent waiting to put and get
+items, reported by ``stats()`` to show where the pipeline waits.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Marks the end of the items of a queue
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised in a stage waiting on a queue when another stage failed."""
+
+
+class StageQueue:
+    """
+    A bounded queue between a producing and a consuming stage, recording its
+    depth and the time the stages waited on it.
+
+    :param name: the name of the queue in the stats
+    :param maxsize: the capacity of the queue
+    :param stop: the ``threading.Event`` stopping the pipeline
+    """
+
+    def __init__(self, name, maxsize, stop):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize)
+        self._stop = stop
+
+        self.items = 0
+        self.max_depth = 0
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+        self._depth_total = 0
+
+    def put(self, item):
+        """Puts an item, waiting while the queue is full."""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            start = time.perf_counter()
+            while True:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            self.put_wait += time.perf_counter() - start
+
+        depth = self._queue.qsize()
+        self.items += 1
+        self._depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def get(self):
+        """Gets an item, waiting while the queue is empty."""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        start = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+                try:
+                    return self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+        finally:
+            self.get_wait += time.perf_counter() - start
+
+    def stats(self):
+        """Returns the depth and stall statistics of the queue."""
+        mean_depth = self._depth_total / self.items if self.items else 0.0
+        return {
+            "maxsize": self.maxsize,
+            "items": self.items,
+            "max_depth": self.max_depth,
+            "mean_depth": round(mean_depth, 1),
+            "put_wait_seconds": round(self.put_wait, 3),
+            "get_wait_seconds": round(self.get_wait, 3),
+        }
+
+
+class Pipeline:
+    """
+    Runs stage threads connected by `StageQueue`. The first failing stage
+    stops the others, and its exception is raised by `finish`.
+
+    :param queue_size: the capacity of the queues
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._queues = []
+        self._threads = []
+        self._error = None
+        self._lock = threading.Lock()
+
+    def add_queue(self, name):
+        """Adds a queue between two stages."""
+        stage_queue = StageQueue(name, self.queue_size, self._stop)
+        self._queues.append(stage_queue)
+        return stage_queue
+
+    def add_stage(self, name, target, *args):
+        """Adds a stage running ``target(*args)`` in its own thread."""
+        self._threads.append(
+            threading.Thread(
+                target=self._run_stage, args=(target,) + args, name=name, daemon=True
+            )
+        )
+
+    def _run_stage(self, target, *args):
+        try:
+            target(*args)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            self._stop.set()
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def finish(self):
+        """
+        Stops and joins the stages, raising the exception of a failed stage.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """Returns the stats of the queues, by name."""
+        return {stage_queue.name: stage_queue.stats() for stage_queue in self._queues}
+
+
+class ConversionPipeline(Pipeline):
+    """
+    Converts items, e.g. batches of VCF records, with a reader thread,
+    `threads` worker threads and an annotator thread. Iterating the pipeline
+    yields an ``(item, result)`` tuple per item, in the input order.
+
+    The ``converting`` queue holds the items read and not yet annotated, its
+    get wait includes the time the annotator waited for the workers. The
+    ``annotated`` queue holds the items waiting for the consumer.
+
+    :param items: iterable of the items, iterated by the reader thread
+    :param convert: function of an item run by the workers
+    :param annotate: function of an item and the result of `convert` run in
+        order by the annotator, returning the result
+    :param threads: the number of worker threads
+    :param queue_size: the capacity of the queues
+    """
+
+    def __init__(self, items, convert, annotate, threads=1, queue_size=16):
+        super().__init__(queue_size=queue_size)
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="convert")
+        self._converting = self.add_queue("converting")
+        self._annotated = self.add_queue("annotated")
+        self.add_stage("reader", self.read, items, convert)
+        self.add_stage("annotator", self.annotate, annotate)
+
+    def read(self, items, convert):
+        for item in items:
+            self._converting.put((item, self._executor.submit(convert, item)))
+        self._converting.put(_DONE)
+
+    def annotate(self, annotate):
+        while True:
+            entry = self._converting.get()
+            if entry is _DONE:
+                break
+
+            item, future = entry
+            if not future.done():
+                start = time.perf_counter()
+                future.result()
+                self._converting.get_wait += time.perf_counter() - start
+            self._annotated.put((item, annotate(item, future.result())))
+        self._annotated.put(_DONE)
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                item = self._annotated.get()
+                if item is _DONE:
+                    break
+                yield item
+        except PipelineStopped:
+            pass
+        finally:
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+            self._executor.shutdown(cancel_futures=True)
+        self.finish()
+
+    def stats(self):
+        return {"threads": self.threads, "queues": super().stats()}
+
+
+class RecordWriter(Pipeline):
+    """
+    Context manager writing records with a writer thread, which serializes and
+    compresses them while the calling thread produces the next ones, e.g.
+    merges the sorted chunks of a sorter.
+
+    :param writer: the writer the records are added to
+    :param queue_size: the capacity of the ``writing`` queue
+    """
+
+    def __init__(self, writer, queue_size=1000):
+        super().__init__(queue_size=queue_size)
+        self._writing = self.add_queue("writing")
+        self.add_stage("writer", self.write_records, writer)
+
+    def write_records(self, writer):
+        while True:
+            record = self._writing.get()
+            if record is _DONE:
+                return
+            writer += record
+
+    def write(self, record):
+        """Queues a record to write."""
+        self._writing.put(record)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            try:
+                self._writing.put(_DONE)
+            except PipelineStopped:
+                pass
+            # Let the writer drain the queue
+            for thread in self._threads:
+                thread.join()
+        if exc_type is None or exc_type is PipelineStopped:
+            self.finish()
+            return False
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        return False
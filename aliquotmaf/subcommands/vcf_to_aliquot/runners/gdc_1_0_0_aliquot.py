@@ -7,7 +7,6 @@ from maflib.header import MafHeader, MafHeaderRecord
 from maflib.sort_order import BarcodesAndCoordinate
 from maflib.sorter import MafSorter
 from maflib.validation import ValidationStringency
-from maflib.writer import MafWriter
 
 import aliquotmaf.annotators as Annotators
 import aliquotmaf.filters as Filters
@@ -21,11 +20,13 @@ from aliquotmaf.converters.formatters import (
     format_vcf_columns,
 )
 from aliquotmaf.converters.utils import get_columns_from_header, init_empty_maf_record
+from aliquotmaf.regions import fetch_vcf_records, parse_regions
 from aliquotmaf.subcommands.utils import (
     assert_sample_in_header,
     extract_annotation_from_header,
     load_enst,
     load_json,
+    maf_writer_from,
 )
 from aliquotmaf.subcommands.vcf_to_aliquot.runners import BaseRunner
 
@@ -71,7 +72,16 @@ class GDC_1_0_0_Aliquot(BaseRunner):
 
     @classmethod
     def __validate_options__(cls, options):
-        """Validates the tumor only stuff"""
+        """Validates the input/output and tumor only stuff"""
+        if options.manifest:
+            raise ValueError(
+                "--manifest is not supported by {0}".format(cls.__tool_name__())
+            )
+        if options.input_vcf is None:
+            raise ValueError("--input_vcf is required")
+        if options.output_maf is None:
+            raise ValueError("--output_maf is required")
+
         if options.tumor_only:
             options.normal_vcf_id = None
         else:
@@ -262,7 +272,9 @@ class GDC_1_0_0_Aliquot(BaseRunner):
         self._colset = set(self._columns)
 
         # Initialize vcf reader
-        vcf_object = pysam.VariantFile(self.options["input_vcf"])
+        vcf_object = pysam.VariantFile(
+            self.options["input_vcf"], threads=self.options.get("io_threads", 1)
+        )
         tumor_sample_id = self.options["tumor_vcf_id"]
         normal_sample_id = self.options["normal_vcf_id"]
         is_tumor_only = self.options["tumor_only"]
@@ -289,7 +301,9 @@ class GDC_1_0_0_Aliquot(BaseRunner):
 
             # Convert
             line = 0
-            for vcf_record in vcf_object.fetch():
+            regions = parse_regions(self.options.get("regions"))
+            records = fetch_vcf_records(vcf_object, regions, self.maf_start_position)
+            for vcf_record in records:
                 line += 1
 
                 if line % 1000 == 0:
@@ -330,8 +344,9 @@ class GDC_1_0_0_Aliquot(BaseRunner):
 
             # Write
             self.logger.info("Writing {0} sorted records...".format(line))
-            self.maf_writer = MafWriter.from_path(
+            self.maf_writer = maf_writer_from(
                 path=self.options["output_maf"],
+                threads=self.options.get("io_threads", 1),
                 header=self.maf_header,
                 validation_stringency=ValidationStringency.Strict,
             )
@@ -358,6 +373,22 @@ class GDC_1_0_0_Aliquot(BaseRunner):
 
         self.logger.info("Finished")
 
+    def maf_start_position(self, vcf_record):
+        """
+        Returns the MAF Start_Position of a VCF record, which the ``--regions``
+        select on, e.g. POS + 1 for a deletion.
+        """
+        var_allele_idx = Extractors.VariantAlleleIndexExtractor.extract(
+            tumor_genotype=vcf_record.samples[self.options["tumor_vcf_id"]]
+        )
+        location_data = Extractors.LocationDataExtractor.extract(
+            ref_allele=vcf_record.ref,
+            var_allele=vcf_record.alleles[var_allele_idx],
+            position=vcf_record.pos,
+            alleles=vcf_record.alleles,
+        )
+        return location_data["start"]
+
     def extract(
         self,
         tumor_sample_id,
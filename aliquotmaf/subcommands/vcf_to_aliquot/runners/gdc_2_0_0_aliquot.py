@@ -1,5 +1,7 @@
 """Main vcf2maf logic for spec gdc-2.0.0-aliquot"""
 
+import argparse
+import threading
 import urllib.parse
 
 import pysam
@@ -7,14 +9,13 @@ from maflib.header import MafHeader, MafHeaderRecord
 from maflib.sort_order import BarcodesAndCoordinate
 from maflib.sorter import MafSorter
 from maflib.validation import ValidationStringency
-from maflib.writer import MafWriter
 
 import aliquotmaf.annotators as Annotators
 import aliquotmaf.filters as Filters
 import aliquotmaf.subcommands.vcf_to_aliquot.extractors as Extractors
 from aliquotmaf.constants import variant_callers
 from aliquotmaf.converters.builder import get_builder
-from aliquotmaf.converters.collection import InputCollection
+from aliquotmaf.converters.collection import InputCollection, InputData
 from aliquotmaf.converters.formatters import (
     format_all_effects,
     format_alleles,
@@ -22,20 +23,72 @@ from aliquotmaf.converters.formatters import (
     format_vcf_columns,
 )
 from aliquotmaf.converters.utils import get_columns_from_header, init_empty_maf_record
+from aliquotmaf.locus import Locus
+from aliquotmaf.regions import fetch_vcf_records, parse_regions
+from aliquotmaf.shared_tables import memory_usage
+from aliquotmaf.subcommands.batch import read_manifest, run_batch
 from aliquotmaf.subcommands.utils import (
     assert_sample_in_header,
     extract_annotation_from_header,
     load_enst,
     load_json,
+    maf_writer_from,
+)
+from aliquotmaf.subcommands.vcf_to_aliquot.checkpoint import Checkpoint
+from aliquotmaf.subcommands.vcf_to_aliquot.pipeline import (
+    ConversionPipeline,
+    RecordWriter,
 )
 from aliquotmaf.subcommands.vcf_to_aliquot.runners import BaseRunner
+from aliquotmaf.subcommands.vcf_to_aliquot.text_engine import TextVcfReader
 
 
 class GDC_2_0_0_Aliquot(BaseRunner):
+    # Options that can be set per VCF in the --manifest
+    manifest_columns = (
+        "input_vcf",
+        "output_maf",
+        "caller_id",
+        "src_vcf_uuid",
+        "case_uuid",
+        "tumor_submitter_id",
+        "tumor_aliquot_uuid",
+        "tumor_bam_uuid",
+        "normal_submitter_id",
+        "normal_aliquot_uuid",
+        "normal_bam_uuid",
+        "tumor_vcf_id",
+        "normal_vcf_id",
+    )
+
+    # Options of the priority tables, annotators and filters loaded once per
+    # runner. The other options can change between the jobs of a job server
+    resource_options = (
+        "biotype_priority_file",
+        "effect_priority_file",
+        "custom_enst",
+        "annotator_threads",
+        "reference_fasta",
+        "reference_fasta_index",
+        "reference_context_size",
+        "cosmic_vcf",
+        "hotspot_tsv",
+        "entrez_gene_id_json",
+        "gnomad_noncancer_vcf",
+        "gnomad_ref_prefix",
+        "shared_tables",
+        "gnomad_af_cutoff",
+        "gdc_blacklist",
+        "gdc_pon_vcf",
+        "nonexonic_intervals",
+        "target_intervals",
+    )
+
     def __init__(self, options=dict()):
         super(GDC_2_0_0_Aliquot, self).__init__(options)
 
-        # Load the resource files
+        # Load the resource files. The priority maps are small and looked up
+        # for every transcript, so they stay private dicts.
         self.logger.info("Loading priority files")
         self.biotype_priority = load_json(self.options["biotype_priority_file"])
         self.effect_priority = load_json(self.options["effect_priority_file"])
@@ -44,6 +97,19 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             if self.options["custom_enst"]
             else None
         )
+        self.effects_cache = Extractors.EffectsCache(
+            maxsize=self.options.get("effects_cache_size", 10000)
+        )
+        # Static per-transcript CSQ attributes, interned on first sight
+        self.transcripts = {}
+        # Guards the effects cache shared by the pipeline workers
+        self._effects_lock = threading.Lock()
+        # Queue stats of the last threaded conversion
+        self.pipeline_stats = None
+        # Runs the independent annotators of each batch concurrently
+        self.annotator_scheduler = Annotators.AnnotatorScheduler(
+            self.options.get("annotator_threads", 0)
+        )
 
         # Schema
         self.options["version"] = "gdc-1.0.0"
@@ -61,6 +127,14 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             "gnomad_noncancer": None,
         }
 
+        # VCF header info, set in setup_conversion
+        self._tumor_idx = None
+        self._normal_idx = None
+        self._ann_cols_format = None
+        self._vep_key = None
+        # The caller specific genotype and depth extraction
+        self._extraction_plan = None
+
         # Filters
         self.filters = {
             "common_in_gnomAD": None,
@@ -72,9 +146,62 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             "offtarget": None,
         }
 
+        # Run-invariant columns and filter tags, built once in setup
+        self._constant_columns = {}
+        self._constant_filter_tags = []
+
+        # The annotators and filters are set up once and reused by the jobs of
+        # a batch, which reset the manifest options to these defaults
+        self._resources_loaded = False
+        self._default_job_options = {
+            key: self.options.get(key) for key in self.manifest_columns
+        }
+
     @classmethod
     def __validate_options__(cls, options):
-        """Validates the tumor only stuff"""
+        """Validates the options of the VCF, or of each VCF of the manifest"""
+        if options.worker_threads < 0:
+            raise ValueError("--worker_threads must be 0 or more")
+        if options.queue_size < 1:
+            raise ValueError("--queue_size must be 1 or more")
+        if options.batch_size < 1:
+            raise ValueError("--batch_size must be 1 or more")
+        if options.annotator_threads < 0:
+            raise ValueError("--annotator_threads must be 0 or more")
+
+        if not options.manifest:
+            cls.validate_job_options(options)
+            return
+
+        if options.checkpoint_dir:
+            raise ValueError("--checkpoint_dir is not supported with --manifest")
+        for job in read_manifest(
+            options.manifest, cls.manifest_columns, ("input_vcf", "output_maf")
+        ):
+            cls.validate_job_options(argparse.Namespace(**dict(vars(options), **job)))
+
+    @classmethod
+    def validate_job_options(cls, options):
+        """Validates the options of a single VCF"""
+        for key in ("input_vcf", "output_maf", "caller_id", "src_vcf_uuid"):
+            if getattr(options, key) is None:
+                raise ValueError("--{0} is required".format(key))
+        if options.caller_id not in variant_callers.astuple():
+            raise ValueError("Unknown variant caller {0}".format(options.caller_id))
+        cls.validate_sample_options(options)
+
+    @classmethod
+    def validate_sample_options(cls, options):
+        """Validates the sample metadata and the tumor only stuff"""
+        for key in (
+            "case_uuid",
+            "tumor_submitter_id",
+            "tumor_aliquot_uuid",
+            "tumor_bam_uuid",
+        ):
+            if getattr(options, key) is None:
+                raise ValueError("--{0} is required".format(key))
+
         if options.tumor_only:
             options.normal_vcf_id = None
         else:
@@ -88,6 +215,79 @@ class GDC_2_0_0_Aliquot(BaseRunner):
     @classmethod
     def __add_arguments__(cls, parser):
         """Add the arguments to the parser"""
+        vcf = cls.add_vcf_arguments(parser)
+        vcf.add_argument(
+            "--caller_id",
+            help="Name of the caller used to detect mutations. Required unless "
+            + "set in the --manifest",
+            choices=variant_callers.astuple(),
+        )
+        vcf.add_argument(
+            "--src_vcf_uuid",
+            help="The UUID of the src VCF file. Required unless set in the "
+            + "--manifest",
+        )
+
+        pipe = parser.add_argument_group(title="Pipeline Options")
+        pipe.add_argument(
+            "--worker_threads",
+            type=int,
+            default=0,
+            help="Number of threads extracting and transforming the records. "
+            + "With 1 or more, the records are read, converted, annotated and "
+            + "written by separate threads connected by bounded queues [0, "
+            + "convert on the main thread]",
+        )
+        pipe.add_argument(
+            "--batch_size",
+            type=int,
+            default=100,
+            help="Number of records converted, annotated and filtered together. "
+            + "Annotators and filters supporting batches share their work, e.g. "
+            + "their region queries, between the records of a batch [100]",
+        )
+        pipe.add_argument(
+            "--queue_size",
+            type=int,
+            default=16,
+            help="Capacity of the queues between the pipeline threads, in "
+            + "batches [16]",
+        )
+        pipe.add_argument(
+            "--annotator_threads",
+            type=int,
+            default=0,
+            help="Number of threads running the I/O bound annotators of a "
+            + "batch, e.g. the COSMIC, gnomAD and reference lookups, "
+            + "concurrently with the annotators setting other columns [0, "
+            + "annotate one after the other]",
+        )
+
+        ckpt = parser.add_argument_group(title="Checkpoint Options")
+        ckpt.add_argument(
+            "--checkpoint_dir",
+            default=None,
+            help="Directory used to checkpoint progress. A restarted run with "
+            "the same input and options resumes from the last checkpoint",
+        )
+        ckpt.add_argument(
+            "--checkpoint_interval",
+            type=int,
+            default=100000,
+            help="Maximum number of VCF records between checkpoints",
+        )
+
+        cls.add_sample_arguments(parser)
+        cls.add_annotation_arguments(parser)
+        cls.add_filter_arguments(parser)
+
+    @classmethod
+    def add_vcf_arguments(cls, parser):
+        """
+        Adds the VCF options shared by all the VCFs of an aliquot.
+
+        :return: the argument group
+        """
         vcf = parser.add_argument_group(title="VCF options")
         vcf.add_argument(
             "--tumor_only", action="store_true", help="Is this a tumor-only VCF?"
@@ -105,28 +305,27 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             help="Name of the normal sample in the VCF",
         )
         vcf.add_argument(
-            "--caller_id",
-            required=True,
-            help="Name of the caller used to detect mutations",
-            choices=variant_callers.astuple(),
-        )
-        vcf.add_argument(
-            "--src_vcf_uuid", required=True, help="The UUID of the src VCF file"
+            "--vcf_engine",
+            choices=["pysam", "text"],
+            default="pysam",
+            help="Engine used to read the input VCF. 'text' streams raw lines "
+            "and skips building pysam records; the output is identical",
         )
+        return vcf
 
+    @classmethod
+    def add_sample_arguments(cls, parser):
+        """
+        Adds the sample metadata options. The case and tumor options are
+        required, see `validate_sample_options`.
+        """
         sample = parser.add_argument_group(title="Sample Metadata")
-        sample.add_argument("--case_uuid", required=True, help="Sample case UUID")
+        sample.add_argument("--case_uuid", help="Sample case UUID")
         sample.add_argument(
-            "--tumor_submitter_id",
-            required=True,
-            help="Tumor sample aliquot submitter ID",
-        )
-        sample.add_argument(
-            "--tumor_aliquot_uuid", required=True, help="Tumor sample aliquot UUID"
-        )
-        sample.add_argument(
-            "--tumor_bam_uuid", required=True, help="Tumor sample bam UUID"
+            "--tumor_submitter_id", help="Tumor sample aliquot submitter ID"
         )
+        sample.add_argument("--tumor_aliquot_uuid", help="Tumor sample aliquot UUID")
+        sample.add_argument("--tumor_bam_uuid", help="Tumor sample bam UUID")
 
         sample.add_argument(
             "--normal_submitter_id", help="Normal sample aliquot submitter ID"
@@ -139,6 +338,9 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             "--maf_center", action="append", required=True, help="The sequencing center"
         )
 
+    @classmethod
+    def add_annotation_arguments(cls, parser):
+        """Adds the annotation resource options."""
         anno = parser.add_argument_group(title="Annotation Resources")
         anno.add_argument(
             "--biotype_priority_file", required=True, help="Biotype priority JSON"
@@ -149,12 +351,29 @@ class GDC_2_0_0_Aliquot(BaseRunner):
         anno.add_argument(
             "--custom_enst", default=None, help="Optional custom ENST overrides"
         )
+        anno.add_argument(
+            "--effects_cache_size",
+            type=int,
+            default=10000,
+            help="Maximum number of distinct VEP CSQ values to keep decoded "
+            + "in memory. Use 0 to disable [10000]",
+        )
         anno.add_argument(
             "--reference_fasta", required=True, help="Reference fasta file"
         )
         anno.add_argument(
             "--reference_fasta_index", required=True, help="Reference fasta fai file"
         )
+        anno.add_argument(
+            "--shared_tables",
+            action="store_true",
+            help="Load the Entrez, hotspot and blacklist tables into shared "
+            + "memory (/dev/shm) files. Concurrent and later runs with the same "
+            + "resource files map these tables instead of loading private "
+            + "copies. Building a table removes the tables of older versions "
+            + "of its resource file. The tables are otherwise kept until "
+            + "reboot; remove /dev/shm/aliquotmaf_*.tbl to free their memory",
+        )
         anno.add_argument(
             "--reference_context_size",
             type=int,
@@ -185,6 +404,9 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             help="Path to the bgzipped and tabix-indexed non-cancer gnomAD allele frequency VCF.",
         )
 
+    @classmethod
+    def add_filter_arguments(cls, parser):
+        """Adds the filtering options."""
         filt = parser.add_argument_group(title="Filtering Options")
 
         filt.add_argument(
@@ -258,6 +480,67 @@ class GDC_2_0_0_Aliquot(BaseRunner):
 
     def do_work(self):
         """Main wrapper function for running vcf2maf"""
+        if self.options.get("manifest"):
+            self.do_batch()
+            return
+
+        try:
+            if self.convert_vcf() is None:
+                return False
+        finally:
+            self.shutdown_annotators()
+
+        self.logger.info("Finished")
+
+    def do_batch(self):
+        """
+        Converts the VCFs of the manifest, in `processes` worker processes
+        that each set up the annotators and filters once, and writes the
+        per-VCF status report.
+        """
+        try:
+            run_batch(self, self.manifest_columns, ("input_vcf", "output_maf"))
+        finally:
+            self.shutdown_annotators()
+
+        self.logger.info("Finished")
+
+    def run_job(self, job):
+        """
+        Converts the VCF of a manifest job, reusing the annotators and filters
+        of the previous jobs.
+
+        :param job: ``dict`` of the manifest options of the job
+        :return: ``dict`` of the job results
+        """
+        self.options.update(self._default_job_options)
+        self.options.update(job)
+        if self.options["tumor_only"]:
+            self.options["normal_vcf_id"] = None
+
+        # The CSQ format may differ between VCFs
+        self.effects_cache = Extractors.EffectsCache(
+            maxsize=self.options.get("effects_cache_size", 10000)
+        )
+        self.transcripts = {}
+        self.maf_writer = None
+
+        records = self.convert_vcf()
+        if records is None:
+            return {"status": "skipped"}
+        result = {"records": records, "memory_kb": memory_usage()}
+        if self.pipeline_stats:
+            result["pipeline"] = self.pipeline_stats
+        result["annotators"] = self.annotator_scheduler.stats()
+        return result
+
+    def convert_vcf(self):
+        """
+        Converts the input VCF and writes the sorted MAF.
+
+        :return: the number of records written, or ``None`` if the variant
+            caller isn't supported
+        """
         self.logger.info(
             "Processing input vcf {0}...".format(self.options["input_vcf"])
         )
@@ -268,105 +551,169 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             self.logger.error(
                 "Variant caller {} not implemented".format(self.options["caller_id"])
             )
-            return False
+            return None
 
         # Initialize the maf file
         self.setup_maf_header()
 
-        sorter = MafSorter(
-            max_objects_in_ram=100000,
-            sort_order_name=BarcodesAndCoordinate.name(),
-            scheme=self.maf_header.scheme(),
-            fasta_index=self.options["reference_fasta_index"],
-        )
+        sorter = self.setup_sorter()
 
-        self._scheme = self.maf_header.scheme()
-        self._columns = get_columns_from_header(self.maf_header)
-        self._colset = set(self._columns)
-
-        # Initialize vcf reader
-        vcf_object = pysam.VariantFile(self.options["input_vcf"])
-        tumor_sample_id = self.options["tumor_vcf_id"]
-        normal_sample_id = self.options["normal_vcf_id"]
-        is_tumor_only = self.options["tumor_only"]
+        vcf_object = self.open_vcf()
+        self.annotator_scheduler.reset()
 
         try:
-            # Validate samples
-            tumor_idx = assert_sample_in_header(
-                vcf_object, self.options["tumor_vcf_id"]
-            )
-            normal_idx = assert_sample_in_header(
-                vcf_object, self.options["normal_vcf_id"], can_fail=is_tumor_only
-            )
-
-            # extract annotation from header
-            ann_cols_format, vep_key = extract_annotation_from_header(
-                vcf_object, vep_key="CSQ"
-            )
-
-            # Initialize annotators
-            self.setup_annotators()
-
-            # Initialize filters
-            self.setup_filters()
+            # Initialize the annotators, filters and the constant columns
+            self.setup_conversion(vcf_object)
+
+            # Reload the records of a previous run
+            checkpoint = self.setup_checkpoint()
+            if checkpoint and checkpoint.load():
+                for maf_record in checkpoint.records(
+                    threads=self.options.get("io_threads", 1),
+                    validation_stringency=ValidationStringency.Strict,
+                ):
+                    sorter += maf_record
 
             # Convert
             line = 0
-            for vcf_record in vcf_object.fetch():
-                line += 1
-
+            for line, vcf_record, maf_record in self.iter_converted(
+                vcf_object, checkpoint
+            ):
                 if line % 1000 == 0:
                     self.logger.info("Processed {0} records...".format(line))
 
-                # Extract data
-                data = self.extract(
-                    tumor_sample_id,
-                    normal_sample_id,
-                    tumor_idx,
-                    normal_idx,
-                    ann_cols_format,
-                    vep_key,
-                    vcf_record,
-                    is_tumor_only,
-                    self.options["caller_id"],
-                )
+                if checkpoint:
+                    checkpoint.update(line, vcf_record.chrom, vcf_record.pos)
 
-                # Skip rare occasions where VEP doesn't provide IMPACT or the consequence is ?
-                if (
-                    not data["selected_effect"]["IMPACT"]
-                    or data["selected_effect"]["One_Consequence"] == "?"
-                ):
-                    self.logger.warn(
-                        "Skipping record with unknown impact or consequence: {0} - {1}".format(
-                            data["selected_effect"]["IMPACT"],
-                            data["selected_effect"]["One_Consequence"],
-                        )
-                    )
+                if maf_record is None:
                     continue
 
-                # Transform
-                maf_record = self.transform(
-                    vcf_record, data, is_tumor_only, line_number=line
-                )
-
-                # badkeys = set(maf_record.keys()) - set(self._columns)
-                # if badkeys is not set():
-
-                #     raise KeyError("Unexpected keys {k}: {v} found in maf_record".format(
-                #         k=badkeys, v=maf_record[list(badkeys)[0]]))
-
                 # Add to sorter
                 sorter += maf_record
+                if checkpoint:
+                    checkpoint.add(maf_record)
 
             # Write
             self.logger.info("Writing {0} sorted records...".format(line))
-            self.maf_writer = MafWriter.from_path(
+            self.maf_writer = maf_writer_from(
                 path=self.options["output_maf"],
+                threads=self.options.get("io_threads", 1),
                 header=self.maf_header,
                 validation_stringency=ValidationStringency.Strict,
             )
 
-            counter = 0
+            counter = self.write_sorted(sorter)
+
+            self.logger.info("Finished writing {0} records".format(counter))
+            if checkpoint:
+                checkpoint.clear()
+            self.logger.info(
+                "Effects cache stats: {0}".format(self.effects_cache.stats())
+            )
+            if self.pipeline_stats:
+                self.logger.info(
+                    "Pipeline queue stats: {0}".format(self.pipeline_stats)
+                )
+            self.logger.info(
+                "Annotator scheduler stats: {0}".format(
+                    self.annotator_scheduler.stats()
+                )
+            )
+            self.logger.info("Memory usage (kB): {0}".format(memory_usage()))
+
+        finally:
+            vcf_object.close()
+            sorter.close()
+            if self.maf_writer:
+                self.maf_writer.close()
+
+        return counter
+
+    def iter_converted(self, vcf_object, checkpoint=None):
+        """
+        Converts the records of the VCF in batches of `batch_size` records, on
+        the main thread or with a
+        `~aliquotmaf.subcommands.vcf_to_aliquot.pipeline.ConversionPipeline`
+        of `worker_threads` threads.
+
+        :param vcf_object: the opened VCF
+        :param checkpoint: optional checkpoint, whose processed records are
+            skipped
+        :return: a generator of ``(line, vcf_record, maf_record)`` tuples in
+            the VCF order, with a ``None`` MAF record for skipped records
+        """
+        batches = self.read_batches(vcf_object, checkpoint)
+        self.pipeline_stats = None
+
+        threads = self.options.get("worker_threads", 0)
+        if not threads:
+            for batch in batches:
+                yield from self.annotate_batch(batch, self.convert_batch(batch))
+            return
+
+        pipeline = ConversionPipeline(
+            batches,
+            convert=self.convert_batch,
+            annotate=self.annotate_batch,
+            threads=threads,
+            queue_size=self.options.get("queue_size", 16),
+        )
+        try:
+            for _, converted in pipeline:
+                yield from converted
+        finally:
+            self.pipeline_stats = pipeline.stats()
+
+    def maf_start_position(self, vcf_record):
+        """
+        Returns the MAF Start_Position of a VCF record, which the ``--regions``
+        select on, e.g. POS + 1 for a deletion.
+        """
+        var_allele_idx = Extractors.VariantAlleleIndexExtractor.extract(
+            tumor_genotype=vcf_record.samples[self.options["tumor_vcf_id"]]
+        )
+        location_data = Extractors.LocationDataExtractor.extract(
+            ref_allele=vcf_record.ref,
+            var_allele=vcf_record.alleles[var_allele_idx],
+            position=vcf_record.pos,
+            alleles=vcf_record.alleles,
+        )
+        return location_data["start"]
+
+    def read_batches(self, vcf_object, checkpoint=None):
+        """
+        Yields the ``list`` of up to `batch_size` ``(line, vcf_record)``
+        tuples of the VCF records in the regions, skipping those processed
+        before the checkpoint.
+        """
+        batch_size = self.options.get("batch_size", 1)
+        batch = []
+        line = 0
+        regions = parse_regions(self.options.get("regions"))
+        records = fetch_vcf_records(vcf_object, regions, self.maf_start_position)
+        for vcf_record in records:
+            line += 1
+            if checkpoint and checkpoint.is_done(
+                line, vcf_record.chrom, vcf_record.pos
+            ):
+                continue
+
+            batch.append((line, vcf_record))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def write_sorted(self, sorter):
+        """
+        Writes the sorted records, with a writer thread when converting with
+        `worker_threads`.
+
+        :return: the number of records written
+        """
+        counter = 0
+        if not self.options.get("worker_threads", 0):
             for record in sorter:
                 counter += 1
 
@@ -374,19 +721,243 @@ class GDC_2_0_0_Aliquot(BaseRunner):
                     self.logger.info("Wrote {0} records...".format(counter))
 
                 self.maf_writer += record
+            return counter
 
-            self.logger.info("Finished writing {0} records".format(counter))
+        queue_size = self.options.get("queue_size", 16) * self.options.get(
+            "batch_size", 1
+        )
+        with RecordWriter(self.maf_writer, queue_size=queue_size) as writer:
+            for record in sorter:
+                counter += 1
+
+                if counter % 1000 == 0:
+                    self.logger.info("Wrote {0} records...".format(counter))
+
+                writer.write(record)
+        if self.pipeline_stats:
+            self.pipeline_stats["queues"].update(writer.stats())
+        return counter
+
+    def load_resources(self):
+        """
+        Sets up the annotators and filters ahead of the first job, e.g. for a
+        job server.
+        """
+        self._scheme = MafHeader.from_defaults(
+            version=self.options["version"],
+            annotation=self.options["annotation"],
+            sort_order=BarcodesAndCoordinate(),
+            fasta_index=self.options["reference_fasta_index"],
+        ).scheme()
+        self.setup_annotators()
+        self.setup_filters()
+        self._resources_loaded = True
+
+    def shutdown_annotators(self):
+        """Shuts down the annotators."""
+        for anno in self.annotators:
+            if self.annotators[anno]:
+                self.annotators[anno].shutdown()
+        self.annotator_scheduler.shutdown()
+
+    def iter_sorted_records(self, output_maf=None):
+        """
+        Converts the input VCF and yields the sorted MAF records, without
+        writing the raw MAF. Used to feed the converted records of a caller
+        directly into merging. The annotators are left running for the
+        caller to shut down, see `shutdown_annotators`.
+
+        :param output_maf: optional path to also write the sorted records to
+        """
+        self.setup_maf_header()
+        sorter = self.setup_sorter()
+        vcf_object = self.open_vcf()
+        self.maf_writer = None
+
+        try:
+            self.setup_conversion(vcf_object)
+
+            line = 0
+            for line, _, maf_record in self.iter_converted(vcf_object):
+                if line % 1000 == 0:
+                    self.logger.info("Processed {0} records...".format(line))
+
+                if maf_record is not None:
+                    sorter += maf_record
+
+            self.logger.info("Converted {0} records".format(line))
+            vcf_object.close()
+
+            if output_maf:
+                self.maf_writer = maf_writer_from(
+                    path=output_maf,
+                    threads=self.options.get("io_threads", 1),
+                    header=self.maf_header,
+                    validation_stringency=ValidationStringency.Strict,
+                )
+
+            for record in sorter:
+                if self.maf_writer:
+                    self.maf_writer += record
+                yield record
 
         finally:
             vcf_object.close()
             sorter.close()
             if self.maf_writer:
                 self.maf_writer.close()
-            for anno in self.annotators:
-                if self.annotators[anno]:
-                    self.annotators[anno].shutdown()
 
-        self.logger.info("Finished")
+    def setup_sorter(self):
+        """
+        Sets up the sorter of the MAF records, and the scheme and columns of
+        the maf header.
+        """
+        sorter = MafSorter(
+            max_objects_in_ram=100000,
+            sort_order_name=BarcodesAndCoordinate.name(),
+            scheme=self.maf_header.scheme(),
+            fasta_index=self.options["reference_fasta_index"],
+        )
+
+        self._scheme = self.maf_header.scheme()
+        self._columns = get_columns_from_header(self.maf_header)
+        self._colset = set(self._columns)
+        return sorter
+
+    def open_vcf(self):
+        """
+        Opens the input VCF with the selected engine.
+        """
+        threads = self.options.get("io_threads", 1)
+        if self.options.get("vcf_engine") == "text":
+            return TextVcfReader(self.options["input_vcf"], threads=threads)
+        return pysam.VariantFile(self.options["input_vcf"], threads=threads)
+
+    def setup_conversion(self, vcf_object):
+        """
+        Validates the samples and the VEP annotation of the VCF header, and sets
+        up the annotators, filters and constant columns.
+        """
+        is_tumor_only = self.options["tumor_only"]
+
+        # Validate samples
+        self._tumor_idx = assert_sample_in_header(
+            vcf_object, self.options["tumor_vcf_id"]
+        )
+        self._normal_idx = assert_sample_in_header(
+            vcf_object, self.options["normal_vcf_id"], can_fail=is_tumor_only
+        )
+
+        # extract annotation from header
+        self._ann_cols_format, self._vep_key = extract_annotation_from_header(
+            vcf_object, vep_key="CSQ"
+        )
+
+        # Resolve the caller specific extraction once for the run
+        self._extraction_plan = Extractors.ExtractionPlan(
+            self.options["caller_id"], vcf_object.header
+        )
+
+        # Initialize annotators and filters. They only depend on the shared
+        # options, except for the caller of the mutation status
+        if self._resources_loaded:
+            self.setup_caller_annotators()
+        else:
+            self.setup_annotators()
+            self.setup_filters()
+            self._resources_loaded = True
+        self.setup_sample_filters()
+
+        # Build the columns that don't change between records
+        self.setup_constant_columns()
+
+    def convert(self, vcf_record, line):
+        """
+        Converts a VCF record to a MAF record.
+
+        :param vcf_record: the VCF record
+        :param line: the number of the record in the VCF
+        :return: the MAF record, or ``None`` for skipped records
+        """
+        batch = [(line, vcf_record)]
+        return self.annotate_batch(batch, self.convert_batch(batch))[0][2]
+
+    def convert_batch(self, batch):
+        """
+        Extracts and transforms a batch of VCF records with `convert_record`.
+
+        :param batch: ``list`` of ``(line, vcf_record)`` tuples
+        :return: ``list`` of the results of `convert_record`
+        """
+        return [self.convert_record(vcf_record, line) for line, vcf_record in batch]
+
+    def convert_record(self, vcf_record, line):
+        """
+        Extracts and transforms a VCF record, without the annotations and
+        filters. Safe to run in several threads.
+
+        :param vcf_record: the VCF record
+        :param line: the number of the record in the VCF
+        :return: the ``(maf_record, data)`` tuple of the MAF record and the
+            extracted data, or ``None`` for skipped records
+        """
+        is_tumor_only = self.options["tumor_only"]
+
+        # Extract data
+        data = self.extract(
+            self.options["tumor_vcf_id"],
+            self.options["normal_vcf_id"],
+            self._tumor_idx,
+            self._normal_idx,
+            self._ann_cols_format,
+            self._vep_key,
+            vcf_record,
+            is_tumor_only,
+            self.options["caller_id"],
+        )
+
+        # Skip rare occasions where VEP doesn't provide IMPACT or the consequence is ?
+        if (
+            not data["selected_effect"]["IMPACT"]
+            or data["selected_effect"]["One_Consequence"] == "?"
+        ):
+            self.logger.warn(
+                "Skipping record with unknown impact or consequence: {0} - {1}".format(
+                    data["selected_effect"]["IMPACT"],
+                    data["selected_effect"]["One_Consequence"],
+                )
+            )
+            return None
+
+        # Transform
+        maf_record = self.transform(vcf_record, data, is_tumor_only, line_number=line)
+        return maf_record, data
+
+    def annotate_batch(self, batch, converted):
+        """
+        Annotates and filters the MAF records of `convert_batch`. The
+        annotators aren't thread safe, so this runs in a single thread.
+
+        :param batch: ``list`` of ``(line, vcf_record)`` tuples
+        :param converted: the results of `convert_batch`
+        :return: ``list`` of ``(line, vcf_record, maf_record)`` tuples, with a
+            ``None`` MAF record for skipped records
+        """
+        indices = [i for i, value in enumerate(converted) if value is not None]
+        maf_records = [None] * len(batch)
+        if indices:
+            annotated = self.annotate(
+                [converted[i][0] for i in indices],
+                [batch[i][1] for i in indices],
+                [converted[i][1] for i in indices],
+            )
+            for i, maf_record in zip(indices, annotated):
+                maf_records[i] = maf_record
+
+        return [
+            (line, vcf_record, maf_record)
+            for (line, vcf_record), maf_record in zip(batch, maf_records)
+        ]
 
     def extract(
         self,
@@ -419,19 +990,16 @@ class GDC_2_0_0_Aliquot(BaseRunner):
         var_allele_idx = Extractors.VariantAlleleIndexExtractor.extract(
             tumor_genotype=record.samples[tumor_sample_id]
         )
-        tumor_gt, tumor_depths = Extractors.GenotypeAndDepthsExtractor.extract(
-            var_allele_idx=var_allele_idx,
-            genotype=record.samples[tumor_sample_id],
-            alleles=record.alleles,
-            caller_id=caller_id,
+        plan = self._extraction_plan
+        if plan is None or plan.caller_id != caller_id:
+            plan = Extractors.ExtractionPlan(caller_id)
+        tumor_gt, tumor_depths = plan.extract(
+            var_allele_idx, record.samples[tumor_sample_id], record.alleles
         )
 
         if not is_tumor_only:
-            normal_gt, normal_depths = Extractors.GenotypeAndDepthsExtractor.extract(
-                var_allele_idx=var_allele_idx,
-                genotype=record.samples[normal_sample_id],
-                alleles=record.alleles,
-                caller_id=caller_id,
+            normal_gt, normal_depths = plan.extract(
+                var_allele_idx, record.samples[normal_sample_id], record.alleles
             )
         else:
             normal_gt, normal_depths = None, None
@@ -444,25 +1012,36 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             alleles=record.alleles,
         )
 
-        # Handle effects
-        effects = Extractors.EffectsExtractor_102.extract(
-            effect_priority=self.effect_priority,
-            effect_keys=ann_cols,
-            effect_list=[
-                urllib.parse.unquote(i).split("|") for i in record.info[vep_key]
-            ],
-            var_idx=var_allele_idx,
-        )
+        # Handle effects, reusing the decoded effects of identical CSQ values
+        raw_csq = record.info[vep_key]
+        cache_key = self.effects_cache.make_key(raw_csq, var_allele_idx)
+        with self._effects_lock:
+            cached = self.effects_cache.get(cache_key)
+        if cached is None:
+            effects = Extractors.EffectsExtractor_102.extract(
+                effect_priority=self.effect_priority,
+                effect_keys=ann_cols,
+                effect_list=[urllib.parse.unquote(i).split("|") for i in raw_csq],
+                var_idx=var_allele_idx,
+                transcripts=self.transcripts,
+            )
 
-        effects, selected_effect = Extractors.SelectOneEffectExtractor.extract(
-            all_effects=effects,
-            effect_priority=self.effect_priority,
-            biotype_priority=self.biotype_priority,
-            custom_enst=self.custom_enst,
-        )
+            effects, selected_effect = Extractors.SelectOneEffectExtractor.extract(
+                all_effects=effects,
+                effect_priority=self.effect_priority,
+                biotype_priority=self.biotype_priority,
+                custom_enst=self.custom_enst,
+            )
+            formatted_effects = format_all_effects(effects)
+            with self._effects_lock:
+                cached = self.effects_cache.put(
+                    cache_key, selected_effect, formatted_effects
+                )
+        cached_effect, formatted_effects = cached
 
+        # The population frequency extractor mutates the effect, so work on a copy
         selected_effect = Extractors.PopulationFrequencyExtractor.extract(
-            effect=selected_effect, var_allele=location_data["var_allele"]
+            effect=dict(cached_effect), var_allele=location_data["var_allele"]
         )
 
         # Handle variant class
@@ -479,7 +1058,7 @@ class GDC_2_0_0_Aliquot(BaseRunner):
         dic["normal_gt"] = normal_gt
         dic["normal_depths"] = normal_depths
         dic["location_data"] = location_data
-        dic["effects"] = format_all_effects(effects)
+        dic["effects"] = formatted_effects
         dic["selected_effect"] = selected_effect
         dic["variant_class"] = variant_class
         dic["vcf_columns"] = format_vcf_columns(
@@ -504,12 +1083,12 @@ class GDC_2_0_0_Aliquot(BaseRunner):
             default="Unknown",
         )
 
-        collection.add(column="Center", value=self.options["maf_center"])
-        collection.add(column="NCBI_Build", value="GRCh38")
+        collection.add(data=self._constant_columns["Center"])
+        collection.add(data=self._constant_columns["NCBI_Build"])
         collection.add(column="Chromosome", value=vcf_record.chrom)
         collection.add(column="Start_Position", value=data["location_data"]["start"])
         collection.add(column="End_Position", value=data["location_data"]["stop"])
-        collection.add(column="Strand", value="+")
+        collection.add(data=self._constant_columns["Strand"])
         collection.add(column="Variant_Classification", value=data["variant_class"])
         collection.add(column="Variant_Type", value=data["location_data"]["var_type"])
         collection.add(
@@ -544,27 +1123,18 @@ class GDC_2_0_0_Aliquot(BaseRunner):
                 collection.add(column=k, value=v)
         else:
             for k in ["Match_Norm_Seq_Allele1", "Match_Norm_Seq_Allele2"]:
-                collection.add(column=k, value="")
+                collection.add(data=self._constant_columns[k])
 
         collection.add(column="dbSNP_RS", value=data["selected_effect"]["dbSNP_RS"])
 
-        collection.add(
-            column="Tumor_Sample_Barcode", value=self.options["tumor_submitter_id"]
-        )
-        collection.add(
-            column="Matched_Norm_Sample_Barcode",
-            value=self.options["normal_submitter_id"],
-            default="",
-        )
-        collection.add(column="Sequencer", value=self.options["sequencer"], default="")
-        collection.add(
-            column="Tumor_Sample_UUID", value=self.options["tumor_aliquot_uuid"]
-        )
-        collection.add(
-            column="Matched_Norm_Sample_UUID",
-            value=self.options["normal_aliquot_uuid"],
-            default="",
-        )
+        for k in [
+            "Tumor_Sample_Barcode",
+            "Matched_Norm_Sample_Barcode",
+            "Sequencer",
+            "Tumor_Sample_UUID",
+            "Matched_Norm_Sample_UUID",
+        ]:
+            collection.add(data=self._constant_columns[k])
         collection.add(column="all_effects", value=";".join(data["effects"]))
 
         for k, v in zip(
@@ -590,7 +1160,7 @@ class GDC_2_0_0_Aliquot(BaseRunner):
                 collection.add(column=k, value=v)
         else:
             for k in ["n_depth", "n_ref_count", "n_alt_count"]:
-                collection.add(column=k, value=None)
+                collection.add(data=self._constant_columns[k])
 
         # Add other columns from selected_effect if they are canonical in the schema
         for k in data["selected_effect"]:
@@ -598,10 +1168,8 @@ class GDC_2_0_0_Aliquot(BaseRunner):
                 collection.add(column=k, value=data["selected_effect"][k])
 
         # Set other uuids
-        collection.add(column="src_vcf_id", value=self.options["src_vcf_uuid"])
-        collection.add(column="tumor_bam_uuid", value=self.options["tumor_bam_uuid"])
-        collection.add(column="normal_bam_uuid", value=self.options["normal_bam_uuid"])
-        collection.add(column="case_id", value=self.options["case_uuid"])
+        for k in ["src_vcf_id", "tumor_bam_uuid", "normal_bam_uuid", "case_id"]:
+            collection.add(data=self._constant_columns[k])
 
         # VCF columns
         collection.add(column="FILTER", value=";".join(sorted(list(vcf_record.filter))))
@@ -614,9 +1182,8 @@ class GDC_2_0_0_Aliquot(BaseRunner):
         )
 
         # Set the other columns to none
-        collection.add(column="Score", value="")
-        collection.add(column="BAM_File", value="")
-        collection.add(column="Sequencing_Phase", value="")
+        for k in ["Score", "BAM_File", "Sequencing_Phase"]:
+            collection.add(data=self._constant_columns[k])
 
         # I don't think this is needed, all of these are created at initialization from the schema columns
         # dbSNP_Val_Status needs to remain as column but will always be empty
@@ -636,60 +1203,85 @@ class GDC_2_0_0_Aliquot(BaseRunner):
         # if len(foo) != 0:
         #     raise KeyError("Unexpected keys found: {}".format(foo))
 
-        # Annotations
-        maf_record["dbSNP_Val_Status"] = get_builder(
-            "dbSNP_Val_Status", self._scheme, value=None
-        )
-
-        if self.annotators["cosmic_id"]:
-            maf_record = self.annotators["cosmic_id"].annotate(maf_record, vcf_record)
-        else:
-            maf_record["COSMIC"] = get_builder("COSMIC", self._scheme, value=None)
-
-        if self.annotators["hotspots"]:
-            maf_record = self.annotators["hotspots"].annotate(maf_record)
-        else:
-            maf_record["hotspot"] = get_builder("hotspot", self._scheme, value=None)
+        return maf_record
 
-        if self.annotators["entrez_gene_id"]:
-            maf_record = self.annotators["entrez_gene_id"].annotate(maf_record)
-        else:
-            maf_record["Entrez_Gene_Id"] = get_builder(
-                "entrez_gene_id", self._scheme, value=0
-            )
+    def annotate(self, maf_records, vcf_records, data):
+        """
+        Adds the annotations and the GDC filters to a batch of MAF records.
 
-        if self.annotators["gnomad_noncancer"]:
-            maf_record = self.annotators["gnomad_noncancer"].annotate(
-                maf_record, vcf_record, data["var_allele_idx"]
-            )
+        :param maf_records: ``list`` of the MAF records of `transform`
+        :param vcf_records: ``list`` of their VCF records
+        :param data: ``list`` of their extracted data
+        :return: ``list`` of the annotated MAF records
+        """
+        # Annotations
+        dbsnp_val_status = self._constant_columns["dbSNP_Val_Status"].transformed
+        for maf_record in maf_records:
+            maf_record["dbSNP_Val_Status"] = dbsnp_val_status
+
+        # Default columns of the annotators not set up
+        for maf_record in maf_records:
+            if not self.annotators["cosmic_id"]:
+                maf_record["COSMIC"] = get_builder("COSMIC", self._scheme, value=None)
+            if not self.annotators["hotspots"]:
+                maf_record["hotspot"] = get_builder(
+                    "hotspot", self._scheme, value=None
+                )
+            if not self.annotators["entrez_gene_id"]:
+                maf_record["Entrez_Gene_Id"] = get_builder(
+                    "entrez_gene_id", self._scheme, value=0
+                )
 
-        maf_record = self.annotators["reference_context"].annotate(
-            maf_record, vcf_record
-        )
-        maf_record = self.annotators["mutation_status"].annotate(
-            maf_record, vcf_record, self.options["tumor_vcf_id"]
+        calls = [
+            ("cosmic_id", (vcf_records,), {}),
+            ("hotspots", (), {}),
+            ("entrez_gene_id", (), {}),
+            (
+                "gnomad_noncancer",
+                (vcf_records, [i["var_allele_idx"] for i in data]),
+                {},
+            ),
+            ("reference_context", (vcf_records,), {}),
+            (
+                "mutation_status",
+                (vcf_records,),
+                {"tumor_sample": self.options["tumor_vcf_id"]},
+            ),
+        ]
+        maf_records = self.annotator_scheduler.annotate(
+            maf_records,
+            [
+                (self.annotators[key], args, kwargs)
+                for key, args, kwargs in calls
+                if self.annotators[key]
+            ],
         )
 
         # Filters
-        gdc_filters = []
+        loci = [Locus.from_vcf_record(vcf_record) for vcf_record in vcf_records]
+        gdc_filters = [list(self._constant_filter_tags) for _ in maf_records]
         for filt_key in self.filters:
             filt_obj = self.filters[filt_key]
-            if filt_obj and filt_obj.filter(maf_record):
-                gdc_filters.extend(filt_obj.tags)
+            if filt_key == "gdc_blacklist" or not filt_obj:
+                continue
+            for tags, flagged in zip(
+                gdc_filters, filt_obj.filter_batch(maf_records, loci=loci)
+            ):
+                if flagged:
+                    tags.extend(filt_obj.tags)
 
-        maf_record["GDC_FILTER"] = get_builder(
-            "GDC_FILTER", self._scheme, value=";".join(sorted(gdc_filters))
-        )
+        for maf_record, tags in zip(maf_records, gdc_filters):
+            maf_record["GDC_FILTER"] = get_builder(
+                "GDC_FILTER", self._scheme, value=";".join(sorted(tags))
+            )
 
-        return maf_record
+        return maf_records
 
     def setup_annotators(self):
         """
         Sets up all annotator classes.
         """
-        self.annotators["mutation_status"] = Annotators.MutationStatus.setup(
-            self._scheme, self.options["caller_id"]
-        )
+        self.setup_caller_annotators()
 
         self.annotators["reference_context"] = Annotators.ReferenceContext.setup(
             self._scheme,
@@ -704,12 +1296,16 @@ class GDC_2_0_0_Aliquot(BaseRunner):
 
         if self.options["hotspot_tsv"]:
             self.annotators["hotspots"] = Annotators.Hotspot.setup(
-                self._scheme, self.options["hotspot_tsv"]
+                self._scheme,
+                self.options["hotspot_tsv"],
+                shared=self.options.get("shared_tables", False),
             )
 
         if self.options["entrez_gene_id_json"]:
             self.annotators["entrez_gene_id"] = Annotators.Entrez.setup(
-                self._scheme, self.options["entrez_gene_id_json"]
+                self._scheme,
+                self.options["entrez_gene_id_json"],
+                shared=self.options.get("shared_tables", False),
             )
 
         # Commented out for now due to performance
@@ -723,6 +1319,14 @@ class GDC_2_0_0_Aliquot(BaseRunner):
                 self._scheme, self.options["gnomad_noncancer_vcf"]
             )
 
+    def setup_caller_annotators(self):
+        """
+        Sets up the annotators that depend on the variant caller.
+        """
+        self.annotators["mutation_status"] = Annotators.MutationStatus.setup(
+            self._scheme, self.options["caller_id"]
+        )
+
     def setup_filters(self):
         """
         Sets up all filter classes.
@@ -737,12 +1341,8 @@ class GDC_2_0_0_Aliquot(BaseRunner):
 
         if self.options["gdc_blacklist"]:
             self.filters["gdc_blacklist"] = Filters.GdcBlacklist.setup(
-                self.options["gdc_blacklist"]
-            )
-
-        if not self.options["tumor_only"]:
-            self.filters["normal_depth"] = Filters.NormalDepth.setup(
-                self.options["min_n_depth"]
+                self.options["gdc_blacklist"],
+                shared=self.options.get("shared_tables", False),
             )
 
         if self.options["gdc_pon_vcf"]:
@@ -758,6 +1358,80 @@ class GDC_2_0_0_Aliquot(BaseRunner):
                 self.options["target_intervals"]
             )
 
+    def setup_sample_filters(self):
+        """
+        Sets up the filters that depend on the options of the run, rather than
+        on the loaded resources.
+        """
+        self.filters["normal_depth"] = (
+            None
+            if self.options["tumor_only"]
+            else Filters.NormalDepth.setup(self.options["min_n_depth"])
+        )
+
+    def setup_checkpoint(self):
+        """
+        Sets up the checkpoint when a checkpoint directory is given.
+        """
+        if not self.options.get("checkpoint_dir"):
+            return None
+        return Checkpoint(
+            self.options["checkpoint_dir"],
+            Checkpoint.fingerprint_of(self.options["input_vcf"], self.options),
+            self.maf_header,
+            self._columns,
+            interval=self.options.get("checkpoint_interval", 100000),
+        )
+
+    def setup_constant_columns(self):
+        """
+        Builds the columns and filter tags that are identical for every record
+        in the run. The built columns are shared by reference between all output
+        records, so they must never be mutated in place.
+        """
+        is_tumor_only = self.options["tumor_only"]
+        constants = [
+            ("Center", self.options["maf_center"], None),
+            ("NCBI_Build", "GRCh38", None),
+            ("Strand", "+", None),
+            ("Tumor_Sample_Barcode", self.options["tumor_submitter_id"], None),
+            ("Matched_Norm_Sample_Barcode", self.options["normal_submitter_id"], ""),
+            ("Sequencer", self.options["sequencer"], ""),
+            ("Tumor_Sample_UUID", self.options["tumor_aliquot_uuid"], None),
+            ("Matched_Norm_Sample_UUID", self.options["normal_aliquot_uuid"], ""),
+            ("src_vcf_id", self.options["src_vcf_uuid"], None),
+            ("tumor_bam_uuid", self.options["tumor_bam_uuid"], None),
+            ("normal_bam_uuid", self.options["normal_bam_uuid"], None),
+            ("case_id", self.options["case_uuid"], None),
+            ("Score", "", None),
+            ("BAM_File", "", None),
+            ("Sequencing_Phase", "", None),
+            ("dbSNP_Val_Status", None, None),
+        ]
+        if is_tumor_only:
+            constants.extend(
+                [
+                    ("Match_Norm_Seq_Allele1", "", None),
+                    ("Match_Norm_Seq_Allele2", "", None),
+                    ("n_depth", None, None),
+                    ("n_ref_count", None, None),
+                    ("n_alt_count", None, None),
+                ]
+            )
+
+        self._constant_columns = {
+            column: InputData.prebuilt(value, column, self._scheme, default=default)
+            for column, value, default in constants
+        }
+
+        # The blacklist only depends on the tumor aliquot
+        self._constant_filter_tags = []
+        if self.filters["gdc_blacklist"]:
+            tumor_aliquot = self._constant_columns["Tumor_Sample_UUID"].transformed
+            self._constant_filter_tags = self.filters["gdc_blacklist"].tags_for(
+                tumor_aliquot.value
+            )
+
     @classmethod
     def __tool_name__(cls):
         return "gdc-2.0.0-aliquot"
@@ -0,0 +1,315 @@
+"""
+Text-level VCF input engine. Streams raw lines from a bgzipped, tabix-indexed
+VCF and exposes light records with the subset of the ``~pysam.VariantRecord``
+interface used by the extractors, annotators and formatters. Values are typed
+and formatted the way htslib would, so the output is identical to the pysam
+engine.
+
+* TextVcfReader   Reads the header with pysam and streams raw records
+* TextVcfRecord   A lazily parsed VCF line
+"""
+
+import struct
+
+import pysam
+
+# Number of tab-separated columns before FORMAT
+_FIXED_COLUMNS = 8
+
+
+def _to_float32(token):
+    """Rounds to single precision like htslib does when storing floats."""
+    return struct.unpack("f", struct.pack("f", float(token)))[0]
+
+
+def _format_int(token):
+    if token == ".":
+        return token
+    try:
+        return str(int(token))
+    except ValueError:
+        return token
+
+
+def _format_float(token):
+    # htslib writes floats with 6 significant digits, as with "%g"
+    if token == ".":
+        return token
+    try:
+        return "%g" % _to_float32(token)
+    except (ValueError, OverflowError):
+        return token
+
+
+def _format_gt(token):
+    """Rewrites a GT value the way htslib formats allele indices."""
+    out = []
+    start = 0
+    for i, char in enumerate(token):
+        if char in "/|":
+            out.append(_format_int(token[start:i]))
+            out.append(char)
+            start = i + 1
+    out.append(_format_int(token[start:]))
+    return "".join(out)
+
+
+def _format_values(raw, vtype):
+    if vtype == "Integer":
+        return ",".join(_format_int(i) for i in raw.split(","))
+    if vtype == "Float":
+        return ",".join(_format_float(i) for i in raw.split(","))
+    return raw
+
+
+def _parse_gt(token):
+    alleles = token.replace("|", "/").split("/")
+    return tuple(None if i == "." else int(i) for i in alleles)
+
+
+def _parse_scalar(token, vtype):
+    if token == "." and vtype in ("Integer", "Float"):
+        return None
+    if vtype == "Integer":
+        return int(token)
+    if vtype == "Float":
+        return _to_float32(token)
+    return token
+
+
+def _parse_value(raw, vtype, number):
+    """
+    Types a raw value like pysam: Number=1 values are scalars and everything
+    else is a ``tuple`` with missing values as ``None``. As in pysam, strings
+    with commas are split whatever their number, and a key without a value is
+    ``None``, or ``()`` when not Number=1.
+    """
+    if raw is None:
+        return None if number == 1 else ()
+    if vtype == "String":
+        if number == 1 and "," not in raw:
+            return raw
+        return tuple(raw.split(","))
+    if number == 1:
+        return _parse_scalar(raw, vtype)
+    return tuple(
+        None if i == "." or i == "" else _parse_scalar(i, vtype)
+        for i in raw.split(",")
+    )
+
+
+class _HeaderTypes:
+    """
+    The (type, number) of each INFO and FORMAT key, resolved once. Undefined
+    keys are looked up as ("String", 1), the type htslib gives them.
+    """
+
+    def __init__(self, header):
+        self.info = {k: (v.type, v.number) for k, v in header.info.items()}
+        self.formats = {k: (v.type, v.number) for k, v in header.formats.items()}
+        self.contigs = {k: v.id for k, v in header.contigs.items()}
+        self.samples = {k: i for i, k in enumerate(header.samples)}
+
+
+class TextVcfInfo:
+    """Lazily parsed INFO column with the read-only mapping interface of pysam."""
+
+    def __init__(self, raw, types):
+        self._raw = raw
+        self._types = types
+        self._data = None
+
+    def _items(self):
+        if self._data is None:
+            self._data = {}
+            if self._raw != ".":
+                for item in self._raw.split(";"):
+                    key, _, value = item.partition("=")
+                    self._data[key] = value if _ else None
+        return self._data
+
+    def __contains__(self, key):
+        return key in self._items()
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __getitem__(self, key):
+        vtype, number = self._types.get(key, ("String", 1))
+        items = self._items()
+        if key not in items:
+            if vtype == "Flag":
+                return False
+            raise KeyError(key)
+        if vtype == "Flag":
+            return True
+        return _parse_value(items[key], vtype, number)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def formatted(self, drop_keys=()):
+        """The INFO column as htslib would write it without the dropped keys."""
+        if self._raw == ".":
+            return self._raw
+        out = []
+        for item in self._raw.split(";"):
+            key, sep, value = item.partition("=")
+            if key in drop_keys:
+                continue
+            vtype, _ = self._types.get(key, ("String", 1))
+            out.append(key + sep + _format_values(value, vtype) if sep else item)
+        return ";".join(out) if out else "."
+
+
+class TextVcfRecord:
+    """
+    A VCF line split into its fixed columns. INFO, FORMAT and the sample
+    columns are only parsed when accessed.
+    """
+
+    __slots__ = (
+        "_types",
+        "_fields",
+        "_samples",
+        "_format_keys",
+        "info",
+        "chrom",
+        "pos",
+        "id",
+        "ref",
+        "alts",
+        "alleles",
+        "filter",
+        "rid",
+    )
+
+    def __init__(self, line, types):
+        fields = line.rstrip("\r\n").split("\t", _FIXED_COLUMNS)
+        self._types = types
+        self._fields = fields
+        self._samples = None
+        self._format_keys = None
+
+        self.chrom = fields[0]
+        self.pos = int(fields[1])
+        self.id = None if fields[2] == "." else fields[2]
+        self.ref = fields[3]
+        self.alts = None if fields[4] == "." else tuple(fields[4].split(","))
+        self.alleles = (self.ref,) + (self.alts or ())
+        self.filter = () if fields[6] == "." else tuple(fields[6].split(";"))
+        self.rid = types.contigs.get(self.chrom)
+        self.info = TextVcfInfo(fields[7], types.info)
+
+    @property
+    def stop(self):
+        if "END" in self.info:
+            return self.info["END"]
+        return self.pos + len(self.ref) - 1
+
+    @property
+    def samples(self):
+        """Mapping of sample name to a ``dict`` of typed FORMAT values."""
+        if self._samples is None:
+            columns = self._sample_columns()
+            self._samples = _TextVcfSamples(self, columns)
+        return self._samples
+
+    def _sample_columns(self):
+        if len(self._fields) <= _FIXED_COLUMNS:
+            self._format_keys = []
+            return []
+        columns = self._fields[_FIXED_COLUMNS].split("\t")
+        self._format_keys = columns[0].split(":")
+        return columns[1:]
+
+    def to_fields(self, drop_info_keys=()):
+        """
+        Returns the columns of the line formatted as htslib would write them,
+        with the given INFO keys removed.
+        """
+        columns = self._fields[:7] + [self.info.formatted(drop_info_keys)]
+        if len(self._fields) > _FIXED_COLUMNS:
+            sample_columns = self._sample_columns()
+            columns.append(":".join(self._format_keys))
+            columns.extend(self._format_sample(i) for i in sample_columns)
+        return columns
+
+    def _format_sample(self, raw):
+        values = raw.split(":")
+        values.extend(["."] * (len(self._format_keys) - len(values)))
+        out = []
+        for key, value in zip(self._format_keys, values):
+            if key == "GT":
+                out.append(_format_gt(value))
+            else:
+                vtype, _ = self._types.formats.get(key, ("String", 1))
+                out.append(_format_values(value, vtype))
+        return ":".join(out)
+
+    def __str__(self):
+        return "\t".join(self.to_fields()) + "\n"
+
+
+class _TextVcfSamples:
+    """Parses sample columns on first access by sample name or index."""
+
+    def __init__(self, record, columns):
+        self._record = record
+        self._columns = columns
+        self._parsed = {}
+
+    def __getitem__(self, sample):
+        if isinstance(sample, int):
+            idx = sample
+        else:
+            idx = self._record._types.samples[sample]
+        if idx not in self._parsed:
+            self._parsed[idx] = self._parse(self._columns[idx])
+        return self._parsed[idx]
+
+    def _parse(self, raw):
+        formats = self._record._types.formats
+        values = raw.split(":")
+        sample = {}
+        for i, key in enumerate(self._record._format_keys):
+            value = values[i] if i < len(values) else "."
+            if key == "GT":
+                sample[key] = _parse_gt(value)
+                continue
+            vtype, number = formats.get(key, ("String", 1))
+            sample[key] = _parse_value(value, vtype, number)
+        return sample
+
+
+class TextVcfReader:
+    """
+    Reads a bgzipped and tabix-indexed VCF as text. The header is parsed with
+    pysam, and record lines are streamed with multithreaded BGZF decompression.
+
+    :param path: path to the VCF
+    :param threads: number of BGZF decompression threads
+    """
+
+    def __init__(self, path, threads=2):
+        self.path = path
+        self._header_file = pysam.VariantFile(path)
+        self.header = self._header_file.header
+        self._types = _HeaderTypes(self.header)
+        self._tabix = pysam.TabixFile(path, threads=threads)
+
+    def fetch(self, *args, **kwargs):
+        """
+        Yields `TextVcfRecord` objects. Accepts the same region arguments as
+        ``~pysam.TabixFile.fetch``.
+        """
+        types = self._types
+        lines = self._tabix.fetch(*args, **kwargs)
+        return (TextVcfRecord(line, types) for line in lines)
+
+    def close(self):
+        self._tabix.close()
+        self._header_file.close()
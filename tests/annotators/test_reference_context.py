@@ -7,6 +7,7 @@ from collections import OrderedDict, namedtuple
 import pysam
 import pytest
 from maflib.column_types import StringColumn
+from maflib.record import MafRecord
 
 from aliquotmaf.annotators import ReferenceContext
 
@@ -109,3 +110,26 @@ def test_reference_context_ins(
     record = gen.insertion
     maf_record = annotator.annotate(get_empty_maf_record, record)
     assert maf_record["CONTEXT"].value == "TGTAATTGAAA"
+
+
+def test_reference_context_batch(
+    test_scheme, setup_annotator, get_test_file, get_empty_maf_record, vcf_gen
+):
+    fasta_path = get_test_file("fake_ref.fa")
+    annotator = setup_annotator(test_scheme, source=fasta_path)
+
+    gen = vcf_gen("ex1.vcf.gz")
+    records = [gen.insertion, gen.snp, gen.deletion]
+    maf_records = [MafRecord(line_number=i) for i in range(len(records))]
+
+    maf_records = annotator.annotate_batch(maf_records, records)
+    assert [i["CONTEXT"].value for i in maf_records] == [
+        "TGTAATTGAAA",
+        "AGTGGCTCATT",
+        "AATGAACTTCTGTA",
+    ]
+
+    # one fetch per record
+    annotator.max_gap = 0
+    maf_records = annotator.annotate_batch(maf_records, records)
+    assert maf_records[1]["CONTEXT"].value == "AGTGGCTCATT"
@@ -0,0 +1,111 @@
+"""
+Tests for the ``aliquotmaf.annotators.scheduler`` module.
+"""
+
+import threading
+
+import pytest
+
+from aliquotmaf.annotators.scheduler import AnnotatorScheduler, RecordView
+
+
+class FakeAnnotator:
+    def __init__(self, reads=(), writes=(), io_bound=False, values=None):
+        self.reads = reads
+        self.writes = writes
+        self.io_bound = io_bound
+        self.values = values or {}
+        self.threads = set()
+
+    def annotate_batch(self, maf_records, suffix=""):
+        self.threads.add(threading.get_ident())
+        for maf_record in maf_records:
+            for key in self.reads:
+                assert key in maf_record
+            for key, value in self.values.items():
+                maf_record[key] = value + suffix
+        return maf_records
+
+
+def test_plan():
+    cosmic = FakeAnnotator(("dbSNP_RS",), ("COSMIC", "dbSNP_RS"), True)
+    hotspot = FakeAnnotator(("Hugo_Symbol",), ("hotspot",))
+    gnomad = FakeAnnotator((), ("gnomAD_AF",), True)
+    validation = FakeAnnotator(("dbSNP_RS",), ("dbSNP_Val_Status",))
+    context = FakeAnnotator((), ("CONTEXT",), True)
+    undeclared = FakeAnnotator(None, None)
+
+    assert AnnotatorScheduler.plan(
+        [cosmic, hotspot, gnomad, validation, context]
+    ) == [[0, 1, 2, 4], [3]]
+    assert AnnotatorScheduler.plan([cosmic, undeclared, context]) == [
+        [0],
+        [1],
+        [2],
+    ]
+
+
+def test_record_view():
+    record = {"Hugo_Symbol": "TP53"}
+    view = RecordView(record)
+    view["hotspot"] = "Y"
+
+    assert view["hotspot"] == "Y"
+    assert view["Hugo_Symbol"] == "TP53"
+    assert "hotspot" in view and "Hugo_Symbol" in view
+    assert record == {"Hugo_Symbol": "TP53"}
+
+
+@pytest.mark.parametrize("threads", [0, 2])
+def test_annotate(threads):
+    first = FakeAnnotator((), ("CONTEXT",), True, {"CONTEXT": "A"})
+    second = FakeAnnotator((), ("COSMIC",), True, {"COSMIC": "COSV"})
+    third = FakeAnnotator(("CONTEXT",), ("CONTEXT",), False, {"CONTEXT": "C"})
+    scheduler = AnnotatorScheduler(threads)
+    scheduler.sample_interval = 2
+    batches = []
+    try:
+        for _ in range(2):
+            records = [{"Hugo_Symbol": "KRAS"} for _ in range(5)]
+            batches.append(
+                scheduler.annotate(
+                    records,
+                    [
+                        (first, (), {}),
+                        (second, (), {"suffix": "1"}),
+                        (third, ("T",), {}),
+                    ],
+                )
+            )
+    finally:
+        scheduler.shutdown()
+
+    for records in batches:
+        assert records == [
+            {"Hugo_Symbol": "KRAS", "CONTEXT": "CT", "COSMIC": "COSV1"}
+            for _ in range(5)
+        ]
+    if threads:
+        assert first.threads - {threading.get_ident()}
+
+    # With threads, the second batch runs sequentially to measure the speedup
+    stats = scheduler.stats()
+    assert stats["threads"] == threads
+    assert stats["batches"] == 2
+    if threads:
+        assert stats["sampled_records"] == 5
+        assert stats["speedup"] > 0
+    else:
+        assert stats["sampled_records"] == 0
+        assert stats["speedup"] is None
+
+
+def test_annotate_undeclared_column():
+    first = FakeAnnotator((), ("CONTEXT",), True, {"CONTEXT": "A"})
+    second = FakeAnnotator((), ("COSMIC",), True, {"hotspot": "Y"})
+    scheduler = AnnotatorScheduler(2)
+    try:
+        with pytest.raises(ValueError):
+            scheduler.annotate([{}], [(first, (), {}), (second, (), {})])
+    finally:
+        scheduler.shutdown()
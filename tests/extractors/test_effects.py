@@ -5,6 +5,7 @@ Tests the extractors in aliquotmaf.subcommands.vcf_to_protected.extractors.effec
 import pytest
 
 from aliquotmaf.subcommands.vcf_to_aliquot.extractors.effects import (
+    EffectsCache,
     EffectsExtractor,
     EffectsExtractor_102,
     SelectOneEffectExtractor,
@@ -160,3 +161,122 @@ def test_select_one_effect_extractor_vep_102(
         res, effect_priority, biotype_priority, custom_enst=enst
     )
     assert (selected["Consequence"], selected["BIOTYPE"]) == expected
+
+
+@pytest.mark.parametrize(
+    "existing_variation, expected",
+    [
+        (None, "novel"),
+        ("", "novel"),
+        ("rs123", "rs123"),
+        ("rs123;COSV456;rs789", "rs123;rs789"),
+        ("COSV456", None),
+    ],
+)
+def test_get_dbsnp_rs(existing_variation, expected):
+    assert EffectsExtractor.get_dbsnp_rs(existing_variation) == expected
+
+
+def test_effects_cache_key():
+    """
+    Tests that the cache key depends on both the CSQ value and the allele index
+    and that tuple and string CSQ values produce the same key.
+    """
+    csq = ("A|missense_variant|MODERATE", "A|synonymous_variant|LOW")
+    assert EffectsCache.make_key(csq, 1) == EffectsCache.make_key(",".join(csq), 1)
+    assert EffectsCache.make_key(csq, 1) != EffectsCache.make_key(csq, 2)
+    assert EffectsCache.make_key(csq, 1) != EffectsCache.make_key(csq[:1], 1)
+
+
+def test_effects_cache_hits_and_eviction():
+    """
+    Tests the LRU behavior and hit/miss statistics of the effects cache.
+    """
+    cache = EffectsCache(maxsize=2)
+    keys = [EffectsCache.make_key(str(i), 1) for i in range(3)]
+
+    assert cache.get(keys[0]) is None
+    selected, effects = cache.put(keys[0], {"SYMBOL": "A"}, ["a"])
+    assert effects == ("a",)
+    assert cache.get(keys[0]) == ({"SYMBOL": "A"}, ("a",))
+
+    cache.put(keys[1], {"SYMBOL": "B"}, ["b"])
+    # keys[0] was used more recently than keys[1], so keys[1] is evicted
+    cache.get(keys[0])
+    cache.put(keys[2], {"SYMBOL": "C"}, ["c"])
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+    assert stats["size"] == 2
+
+
+def test_effects_cache_disabled():
+    """
+    Tests that a cache size of 0 never stores entries.
+    """
+    cache = EffectsCache(maxsize=0)
+    key = EffectsCache.make_key("A|B", 1)
+    assert cache.put(key, {}, ["a"]) == ({}, ("a",))
+    assert cache.get(key) is None
+    assert len(cache) == 0
+
+
+def test_effects_extractor_102_transcript_interning():
+    """
+    Tests that interning static per-transcript attributes doesn't change the
+    extracted effects and that the interned values are shared.
+    """
+    effect_priority = {"missense_variant": 1, "intron_variant": 2}
+
+    def make_effect(consequence, cdna_position):
+        rec = []
+        for col in ANNO_COLUMNS_102:
+            if col == "Consequence":
+                rec.append(consequence)
+            elif col == "Feature":
+                rec.append("ENST0001")
+            elif col == "SYMBOL":
+                rec.append("GENE1")
+            elif col == "BIOTYPE":
+                rec.append("protein_coding")
+            elif col == "CANONICAL":
+                rec.append("YES")
+            elif col == "cDNA_position":
+                rec.append(cdna_position)
+            elif col == "ALLELE_NUM":
+                rec.append("1")
+            else:
+                rec.append("")
+        return rec
+
+    transcripts = {}
+    records = [
+        [make_effect("intron_variant", "")],
+        [make_effect("missense_variant", "10/1500")],
+        [make_effect("missense_variant", "20/1500")],
+        [make_effect("intron_variant", "")],
+    ]
+    for elist in records:
+        expected = EffectsExtractor_102.extract(
+            effect_priority, ANNO_COLUMNS_102, elist, 1
+        )
+        found = EffectsExtractor_102.extract(
+            effect_priority, ANNO_COLUMNS_102, elist, 1, transcripts=transcripts
+        )
+        assert found == expected
+
+    assert list(transcripts) == ["ENST0001"]
+    assert transcripts["ENST0001"]["Transcript_Length"] == "1500"
+
+    first = EffectsExtractor_102.extract(
+        effect_priority, ANNO_COLUMNS_102, records[1], 1, transcripts=transcripts
+    )[0]
+    second = EffectsExtractor_102.extract(
+        effect_priority, ANNO_COLUMNS_102, records[2], 1, transcripts=transcripts
+    )[0]
+    assert first["SYMBOL"] is second["SYMBOL"]
+    assert first["Transcript_Length"] is second["Transcript_Length"]
@@ -5,10 +5,12 @@ Tests the extractors in aliquotmaf.subcommands.vcf_to_protected.extractors.genot
 from unittest import TestCase
 from unittest.mock import patch
 
+import pysam
 import pytest
 
 from aliquotmaf.constants import variant_callers
 from aliquotmaf.subcommands.vcf_to_aliquot.extractors.genotypes import (
+    ExtractionPlan,
     GenotypeAndDepthsExtractor,
     VariantAlleleIndexExtractor,
 )
@@ -560,3 +562,102 @@ class TestGenotypeExtractor(TestCase):
         # Validate results
         assert allele_depths == expected_allele_depths
         assert dp == expected_dp
+
+
+@pytest.mark.parametrize(
+    "caller, genotype, alleles, expected_ad, expected_dp, expected_depths",
+    [
+        ("MuTect2", {"GT": (0, 1), "AD": (10, 5)}, ("A", "T"), (10, 5), 15, [10, 5]),
+        (
+            "MuSE",
+            {"GT": (0, 1), "AD": (10, 5), "DP": 16},
+            ("A", "T"),
+            (10, 5),
+            16,
+            [10, 5],
+        ),
+        (
+            "VarScan2",
+            {"GT": (0, 1), "RD": 10, "AD": 5, "DP": 15},
+            ("A", "T"),
+            (10, 5),
+            15,
+            [10, 5],
+        ),
+        (
+            "SomaticSniper",
+            {"GT": (0, 1), "BCOUNT": (1, 2, 3, 4)},
+            ("A", "T"),
+            (1, 4),
+            5,
+            [1, 4],
+        ),
+        (
+            "CaVEMan",
+            {
+                "GT": (0, 1),
+                "FAZ": 1,
+                "FCZ": 0,
+                "FGZ": 0,
+                "FTZ": 2,
+                "RAZ": 3,
+                "RCZ": 0,
+                "RGZ": 1,
+                "RTZ": 4,
+            },
+            ("A", "T"),
+            (4, 6),
+            11,
+            [4, 6],
+        ),
+        (
+            "Sanger Pindel",
+            {"GT": (0, 1), "NR": 9, "PR": 8, "NP": 2, "PP": 3},
+            ("A", "AT"),
+            (12, 5),
+            17,
+            [12, 5],
+        ),
+        ("Strelka Somatic", {"GT": (0, 1)}, ("A", "T"), (), 0, []),
+        ("somecaller", {"GT": (0, 1)}, ("A", "T"), (), 0, []),
+    ],
+)
+def test_extraction_plan(
+    caller, genotype, alleles, expected_ad, expected_dp, expected_depths
+):
+    """
+    The plan extracts the genotype and depths of each caller
+    """
+    new_gt, depths = ExtractionPlan(caller).extract(1, genotype, alleles)
+    assert new_gt == {"GT": (0, 1), "AD": expected_ad, "DP": expected_dp}
+    assert depths == expected_depths
+
+
+def test_extraction_plan_format_keys():
+    """
+    The plan resolves the FORMAT keys of the caller from the VCF header
+    """
+    header = pysam.VariantHeader()
+    header.formats.add("AD", "R", "Integer", "Allele depths")
+
+    plan = ExtractionPlan(variant_callers.MUSE, header)
+    assert plan.format_keys == ("AD", "DP", "SS")
+    assert plan.missing_keys == ("DP", "SS")
+
+    plan = ExtractionPlan("GATK4 MuTect2", header)
+    assert plan.missing_keys == ()
+
+
+def test_extraction_plan_missing_dp():
+    """
+    Without DP in the VCF header, the plan reports the missing key and records
+    of callers reading the total depth from DP fail to convert
+    """
+    header = pysam.VariantHeader()
+    header.formats.add("AD", "R", "Integer", "Allele depths")
+    header.formats.add("SS", 1, "Integer", "Somatic status")
+
+    plan = ExtractionPlan(variant_callers.MUSE, header)
+    assert plan.missing_keys == ("DP",)
+    with pytest.raises(KeyError):
+        plan.extract(1, {"GT": (0, 1), "AD": (10, 5)}, ("A", "T"))
@@ -69,3 +69,19 @@ def test_blacklist_filter(
     result = filterer.filter(maf_record)
     assert result is expected_bool
     assert filterer.tags == expected_tags
+
+
+@pytest.mark.parametrize(
+    "tumor_uuid, expected_tags",
+    [
+        ("00000000-0000-0000-0000-000000000002", []),
+        ("00000000-0000-0000-0000-000000000001", ["QC_Pending", "OTHER"]),
+    ],
+)
+def test_blacklist_tags_for(setup_filter, get_test_file, tumor_uuid, expected_tags):
+    """
+    Test the per-aliquot blacklist lookup used by runners at setup
+    """
+    tsv_path = get_test_file("fake_blacklist.tsv")
+    filterer = setup_filter(tsv_path)
+    assert filterer.tags_for(tumor_uuid) == expected_tags
@@ -6,9 +6,11 @@ from collections import OrderedDict
 
 import pytest
 from maflib.column_types import StringColumn
+from maflib.record import MafRecord
 
 from aliquotmaf.converters.builder import get_builder
 from aliquotmaf.filters import Multiallelic
+from aliquotmaf.locus import Locus
 
 
 @pytest.fixture
@@ -47,6 +49,7 @@ def test_setup_multiallelic(setup_filter):
         ("chr1:10:.:C:T,G,A", True),
         ("chr2:8:.:CTACTT:C", False),
         ("chr1:10:.:C:T,T,C", False),
+        ("chr1:100:.:N:N]chr2:321681]", False),
     ],
 )
 def test_multiallelic_filter(
@@ -60,3 +63,43 @@ def test_multiallelic_filter(
     maf_record["vcf_region"] = get_builder("vcf_region", test_scheme, value=vcf_region)
     result = filterer.filter(maf_record)
     assert result is expected
+
+
+@pytest.mark.parametrize(
+    "vcf_region, expected",
+    [
+        ("chr1:11:.:G:C", False),
+        ("chr1:10:.:C:T,G", True),
+        ("chr1:10:.:C:T,T,C", False),
+    ],
+)
+def test_multiallelic_filter_locus(
+    setup_filter, get_empty_maf_record, vcf_region, expected
+):
+    """
+    Test multiallelic filter with a pre-parsed locus
+    """
+    filterer = setup_filter()
+    locus = Locus.from_vcf_region(vcf_region)
+    result = filterer.filter(get_empty_maf_record, locus=locus)
+    assert result is expected
+
+
+def test_multiallelic_filter_batch(test_scheme, setup_filter):
+    """
+    Test multiallelic filter on a batch of records, with and without loci
+    """
+    vcf_regions = ["chr1:11:.:G:C", "chr1:10:.:C:T,G", "chr1:10:.:C:T,T,C"]
+    maf_records = []
+    for i, vcf_region in enumerate(vcf_regions):
+        maf_record = MafRecord(line_number=i)
+        maf_record["vcf_region"] = get_builder(
+            "vcf_region", test_scheme, value=vcf_region
+        )
+        maf_records.append(maf_record)
+
+    filterer = setup_filter()
+    assert filterer.filter_batch(maf_records) == [False, True, False]
+
+    loci = [Locus.from_vcf_region(i) for i in vcf_regions]
+    assert filterer.filter_batch(maf_records, loci=loci) == [False, True, False]
@@ -6,6 +6,7 @@ from collections import OrderedDict
 
 import pytest
 from maflib.column_types import NullableZeroBasedIntegerColumn
+from maflib.record import MafRecord
 
 from aliquotmaf.converters.builder import get_builder
 from aliquotmaf.filters import NormalDepth
@@ -53,3 +54,17 @@ def test_normal_depth_filter(
     maf_record["n_depth"] = get_builder("n_depth", test_scheme, value=normal_depth)
     result = filterer.filter(maf_record)
     assert result is expected
+
+
+def test_normal_depth_filter_batch(test_scheme, setup_filter):
+    """
+    Test Normal Depth filter on a batch of records
+    """
+    maf_records = []
+    for i, normal_depth in enumerate([None, 7, 8, 0]):
+        maf_record = MafRecord(line_number=i)
+        maf_record["n_depth"] = get_builder("n_depth", test_scheme, value=normal_depth)
+        maf_records.append(maf_record)
+
+    assert setup_filter(7).filter_batch(maf_records) == [False, True, False, True]
+    assert setup_filter(None).filter_batch(maf_records) == [False] * 4
@@ -85,3 +85,67 @@ def test_format_alleles(
 #         genotype=gt, depths=depths, var_allele_idx=idx, default_total_dp=0
 #     )
 #     assert (dp, ref_ct, alt_ct) == expected
+
+
+@pytest.mark.parametrize(
+    "info, expected_info",
+    [
+        ({"CSQ": ("T|missense_variant",), "DP": 5}, "DP=5"),
+        ({"DP": 5, "CSQ": ("T|missense_variant", "T|intron_variant")}, "DP=5"),
+        ({"CSQ": ("T|missense_variant",)}, ""),
+        ({}, "."),
+    ],
+)
+def test_format_vcf_columns(get_test_vcf_header, info, expected_info):
+    """
+    Tests that the VCF columns are formatted without the CSQ annotations.
+    """
+    meta = [
+        {"key": "contig", "items": [("ID", "chr1")]},
+        {
+            "key": "INFO",
+            "items": [
+                ("ID", "CSQ"),
+                ("Number", "."),
+                ("Type", "String"),
+                ("Description", "Consequence annotations. Format: Allele|Consequence"),
+            ],
+        },
+        {
+            "key": "INFO",
+            "items": [
+                ("ID", "DP"),
+                ("Number", "1"),
+                ("Type", "Integer"),
+                ("Description", "Total depth"),
+            ],
+        },
+        {
+            "key": "FORMAT",
+            "items": [
+                ("ID", "GT"),
+                ("Number", "1"),
+                ("Type", "String"),
+                ("Description", "Genotype"),
+            ],
+        },
+    ]
+    vcf_object = get_test_vcf_header(meta=meta, samples=["NORMAL", "TUMOR"])
+    record = vcf_object.header.new_record(
+        contig="chr1", start=9, stop=10, alleles=("A", "T"), info=info
+    )
+    record.samples["NORMAL"]["GT"] = (0, 0)
+    record.samples["TUMOR"]["GT"] = (0, 1)
+
+    res = Formatters.format_vcf_columns(
+        vcf_record=record, vep_key="CSQ", tumor_idx=10, normal_idx=9
+    )
+
+    assert res["vcf_region"] == "chr1:10:.:A:T"
+    assert res["vcf_info"] == expected_info
+    assert res["vcf_format"] == "GT"
+    assert res["vcf_tumor_gt"] == "0/1"
+    assert res["vcf_normal_gt"] == "0/0"
+    assert res["FILTER"] == "."
+    # The source record keeps its annotations
+    assert ("CSQ" in record.info) == ("CSQ" in info)
@@ -110,3 +110,31 @@ def test_record_merge_4(
         assert result["n_depth"].value == 10
         assert result["n_ref_count"].value == 10
         assert result["n_alt_count"].value == 0
+
+
+def test_record_merge_single_record_matches_first_element(
+    test_input_scheme, test_output_scheme, overlapped_records_generate
+):
+    callers = ["vardict"]
+    maf_lines = [
+        [
+            "chr1\t1\t1\tSNP\tA\tC\tA\tC\tA\tA\t10\t5\t8\t8\t8\t0\tA\toff_target;gdc_pon\n",
+            "chr1\t1\t2\tDNP\tAT\tCG\tAT\tCG\tAT\tAT\t8\t2\t6\t10\t10\t1\tB\t\n",
+        ]
+    ]
+
+    record = overlapped_records_generate(test_input_scheme, maf_lines, callers)
+
+    merger = MafRecordMerger_1_0_0(test_output_scheme)
+
+    for tumor_only in (False, True):
+        results = merger.merge_records(record, tumor_only=tumor_only)
+        assert len(results) == 2
+        for variant, result in zip(record["vardict"], results):
+            expected = merger.maf_from_first_element(
+                {"vardict": [variant]}, ["vardict"], tumor_only=tumor_only
+            )
+            assert str(result) == str(expected)
+
+    assert results[0]["t_depth"].value == 13
+    assert results[0]["GDC_FILTER"].value == ["gdc_pon", "off_target"]
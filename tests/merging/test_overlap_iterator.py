@@ -0,0 +1,101 @@
+"""
+Tests for the ``aliquotmaf.merging.overlap_iterator`` module.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from maflib.overlap_iter import LocatableOverlapIterator
+from maflib.record import MafRecord
+from maflib.validation import ValidationStringency
+
+from aliquotmaf.merging.overlap_iterator import SweepOverlapIterator
+
+CONTIGS = ["chr1", "chr2", "chr3"]
+
+
+def make_record(contig, start, end):
+    return {
+        "Chromosome": SimpleNamespace(value=contig),
+        "Start_Position": SimpleNamespace(value=start),
+        "End_Position": SimpleNamespace(value=end),
+    }
+
+
+def to_loci(cluster):
+    return [
+        [
+            (
+                r["Chromosome"].value,
+                r["Start_Position"].value,
+                r["End_Position"].value,
+            )
+            for r in records
+        ]
+        for records in cluster
+    ]
+
+
+def make_maf_record(scheme, contig, start, end):
+    if start == end:
+        alleles = "SNP\tA\tC\tA\tC\tA\tA"
+    else:
+        ref = "A" * (end - start + 1)
+        alleles = "DEL\t{0}\t-\t{0}\t-\t{0}\t{0}".format(ref)
+    return MafRecord.from_line(
+        "{0}\t{1}\t{2}\t{3}\t10\t2\t8\t8\t8\t0\t\t\n".format(
+            contig, start, end, alleles
+        ),
+        scheme=scheme,
+        validation_stringency=ValidationStringency.Strict,
+    )
+
+
+def test_sweep_overlap_iterator():
+    a = [make_record("chr1", 10, 10), make_record("chr1", 12, 20)]
+    b = [make_record("chr1", 15, 15), make_record("chr1", 21, 21)]
+    c = [make_record("chr1", 20, 25), make_record("chr2", 1, 5)]
+
+    clusters = [to_loci(i) for i in SweepOverlapIterator([a, b, c], CONTIGS)]
+    assert clusters == [
+        [[("chr1", 10, 10)], [], []],
+        [[("chr1", 12, 20)], [("chr1", 15, 15), ("chr1", 21, 21)], [("chr1", 20, 25)]],
+        [[], [], [("chr2", 1, 5)]],
+    ]
+
+
+def test_sweep_overlap_iterator_empty():
+    assert list(SweepOverlapIterator([[], []], CONTIGS)) == []
+
+
+def test_sweep_overlap_iterator_unsorted():
+    a = [make_record("chr1", 10, 10), make_record("chr1", 5, 5)]
+    with pytest.raises(ValueError):
+        list(SweepOverlapIterator([a], CONTIGS))
+
+    b = [make_record("chr2", 10, 10), make_record("chr1", 5, 5)]
+    with pytest.raises(ValueError):
+        list(SweepOverlapIterator([b, [make_record("chr3", 1, 1)]], CONTIGS))
+
+
+def test_sweep_overlap_iterator_unknown_contig():
+    with pytest.raises(ValueError):
+        list(SweepOverlapIterator([[make_record("chrX", 1, 1)]], CONTIGS))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sweep_overlap_iterator_matches_maflib(seed, test_input_scheme):
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(rng.randint(1, 5)):
+        records = []
+        for contig in CONTIGS:
+            for start in sorted(rng.randint(1, 200) for _ in range(rng.randint(0, 30))):
+                end = start + rng.randint(0, 6)
+                records.append(make_maf_record(test_input_scheme, contig, start, end))
+        inputs.append(records)
+
+    expected = [to_loci(i) for i in LocatableOverlapIterator(inputs, contigs=CONTIGS)]
+    found = [to_loci(i) for i in SweepOverlapIterator(inputs, CONTIGS)]
+    assert found == expected
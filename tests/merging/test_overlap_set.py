@@ -2,6 +2,8 @@
 Tests associated with the OverlapSet class.
 """
 
+from aliquotmaf.merging.overlap_set import OverlapSizeHistogram
+
 
 def test_overlap_set_basic_singleton(test_input_scheme, overlapped_records_generate):
     """
@@ -169,3 +171,50 @@ def test_overlap_set_basic_d(test_input_scheme, overlapped_records_generate):
     assert len(record.caller_type_map) == 4
 
     assert record.all_single_record() is False
+
+
+def test_overlap_set_split_by_locus(test_input_scheme, overlapped_records_generate):
+    """
+    Test splitting overlaps into one set per locus allele key
+    """
+    callers = ["MuTect2", "Pindel"]
+    maf_lines = [
+        [
+            "chr1\t1\t1\tSNP\tA\tC\tA\tC\tA\tA\t10\t2\t8\t8\t8\t0\t\t\n",
+            "chr1\t2\t3\tDEL\tAT\t-\tAT\t-\tAT\tAT\t20\t2\t18\t8\t8\t0\t\t\n",
+        ],
+        [
+            "chr1\t1\t3\tDEL\tAAT\t-\tAAT\t-\tAAT\tAAT\t20\t2\t18\t8\t8\t0\t\t\n",
+            "chr1\t2\t3\tDEL\tAT\t-\tAT\t-\tAT\tAT\t20\t2\t18\t8\t8\t0\t\t\n",
+        ],
+    ]
+
+    record = overlapped_records_generate(test_input_scheme, maf_lines, callers)
+    assert len(record) == 4
+
+    subsets = record.split_by_locus()
+    assert [list(i.locus_allele_map) for i in subsets] == [
+        ["1:1:C"],
+        ["1:3:-"],
+        ["2:3:-"],
+    ]
+    assert [len(i) for i in subsets] == [1, 1, 2]
+    assert subsets[0].callers == ["MuTect2"]
+    assert subsets[1].callers == ["Pindel"]
+    assert subsets[2].callers == ["MuTect2", "Pindel"]
+
+
+def test_overlap_size_histogram():
+    histogram = OverlapSizeHistogram()
+    for size in [1, 1, 2, 3, 4, 5, 1000]:
+        histogram.add(size)
+
+    assert histogram.bins() == [
+        ("1", 2),
+        ("2", 1),
+        ("3-4", 2),
+        ("5-8", 1),
+        ("513-1024", 1),
+    ]
+    assert histogram.max_size == 1000
+    assert str(histogram) == "1: 2, 2: 1, 3-4: 2, 5-8: 1, 513-1024: 1"
@@ -0,0 +1,46 @@
+"""
+Tests for the ``aliquotmaf.merging.partition`` module.
+"""
+
+import pytest
+
+from aliquotmaf import bgzf
+from aliquotmaf.merging.partition import indexed_contigs, split_by_contig
+
+HEADER = "#version gdc-1.0.0\n#annotation.spec gdc-1.0.0-aliquot\n"
+COLUMNS = "Hugo_Symbol\tChromosome\tStart_Position\n"
+RECORDS = ["A\tchr1\t10\n", "B\tchr1\t20\n", "C\tchr3\t5\n"]
+
+
+@pytest.mark.parametrize("name", ["in.maf", "in.maf.gz"])
+def test_split_by_contig(tmp_path, name):
+    path = str(tmp_path / name)
+    open_function = bgzf.open if name.endswith(".gz") else open
+    with open_function(path, "wt") as fh:
+        fh.write(HEADER + COLUMNS + "".join(RECORDS))
+
+    shards, empty = split_by_contig(
+        path, str(tmp_path), "mutect2", ["chr1", "chr2", "chr3"]
+    )
+    assert sorted(shards) == ["chr1", "chr3"]
+    assert shards["chr3"] == str(tmp_path / "mutect2.2.maf")
+    with open(shards["chr1"]) as fh:
+        assert fh.read() == HEADER + COLUMNS + RECORDS[0] + RECORDS[1]
+    with open(shards["chr3"]) as fh:
+        assert fh.read() == HEADER + COLUMNS + RECORDS[2]
+    with open(empty) as fh:
+        assert fh.read() == HEADER + COLUMNS
+
+
+def test_split_by_contig_unknown_contig(tmp_path):
+    path = tmp_path / "in.maf"
+    path.write_text(HEADER + COLUMNS + "".join(RECORDS))
+
+    with pytest.raises(ValueError):
+        split_by_contig(str(path), str(tmp_path), "mutect2", ["chr1"])
+
+
+def test_indexed_contigs_not_indexed(tmp_path):
+    path = tmp_path / "in.maf"
+    path.write_text(HEADER + COLUMNS + "".join(RECORDS))
+    assert indexed_contigs(str(path)) is None
@@ -0,0 +1,58 @@
+"""
+Tests for the ``aliquotmaf.merging.reorder_window`` module.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from aliquotmaf.merging.reorder_window import ReorderWindow, ReorderWindowError
+
+CONTIGS = ["chr1", "chr2"]
+
+
+def make_record(contig, start, end, name=None):
+    return {
+        "Chromosome": SimpleNamespace(value=contig),
+        "Start_Position": SimpleNamespace(value=start),
+        "End_Position": SimpleNamespace(value=end),
+        "name": name,
+    }
+
+
+def test_reorder_window():
+    written = []
+    window = ReorderWindow(written.append, CONTIGS, max_records=2)
+    records = [
+        make_record("chr1", 20, 20),
+        make_record("chr1", 10, 12),
+        make_record("chr1", 10, 10, "a"),
+        make_record("chr2", 1, 1),
+        make_record("chr1", 30, 30),
+    ]
+    for record in records:
+        window += record
+    assert written == [records[2], records[1], records[0]]
+
+    window.flush()
+    assert written == [records[2], records[1], records[0], records[4], records[3]]
+    assert window.written == 5
+
+
+def test_reorder_window_equal_keys_keep_order():
+    written = []
+    window = ReorderWindow(written.append, CONTIGS, max_records=10)
+    records = [make_record("chr1", 10, 10, i) for i in range(5)]
+    for record in records:
+        window += record
+    window.flush()
+    assert written == records
+
+
+def test_reorder_window_too_small():
+    written = []
+    window = ReorderWindow(written.append, CONTIGS, max_records=1)
+    window += make_record("chr1", 20, 20)
+    window += make_record("chr1", 30, 30)
+    with pytest.raises(ReorderWindowError):
+        window += make_record("chr1", 10, 10)
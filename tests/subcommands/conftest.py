@@ -0,0 +1,224 @@
+"""
+Fixtures running the subcommands on small VEP annotated tumor/normal VCFs of
+the fake reference.
+"""
+
+import gzip
+import os
+
+import pysam
+import pytest
+
+from aliquotmaf.__main__ import main
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(TESTS_DIR, "data")
+EXTRAS_DIR = os.path.join(os.path.dirname(TESTS_DIR), "extras")
+
+REFERENCE_FASTA = os.path.join(DATA_DIR, "fake_ref.fa")
+CASE_UUID = "8d3a8a7e-52d3-4c32-9a56-1c5a4a3f7e01"
+TUMOR_ALIQUOT_UUID = "0b7b5e4f-5a2c-4b0e-8f3c-2d9a4c1e6f02"
+TUMOR_BAM_UUID = "6f1c2d3e-4b5a-4c6d-8e7f-9a0b1c2d3e03"
+NORMAL_ALIQUOT_UUID = "1a2b3c4d-5e6f-4a7b-8c9d-0e1f2a3b4c04"
+NORMAL_BAM_UUID = "7e8f9a0b-1c2d-4e3f-8a4b-5c6d7e8f9a05"
+
+# The VEP annotation of the variants, from the VCF of the effects tests
+VEP_VCF = os.path.join(DATA_DIR, "ex3.vcf.gz")
+
+# The (contig, position) of the variants of the caller VCFs
+VARIANTS = [("chr1", 10), ("chr1", 20), ("chr1", 700), ("chr2", 30), ("chr2", 900)]
+
+# The callers of the aliquot, and their VCF FORMAT values besides GT
+CALLERS = {
+    "MuTect2": {"AD": ((30, 0), (20, 10)), "DP": (30, 30)},
+    "MuSE": {"AD": ((28, 0), (18, 9)), "DP": (28, 27), "SS": (2, 2)},
+}
+
+
+def get_vep_annotation(existing_variation=""):
+    """
+    Returns the CSQ description and the CSQ value of a variant of ex3, with no
+    existing variation by default so that the variants are novel.
+    """
+    with pysam.VariantFile(VEP_VCF) as vcf:
+        description = vcf.header.info["CSQ"].description
+        csq = next(iter(vcf)).info["CSQ"][0].split("|")
+    fields = description.split("Format: ")[1].split("|")
+    csq[fields.index("Existing_variation")] = existing_variation
+    return description, "|".join(csq)
+
+
+def write_caller_vcf(path, caller_id, variants=VARIANTS, existing_variation=None):
+    """
+    Writes the bgzipped and indexed tumor/normal VCF of a caller, with the VEP
+    annotation of ex3 for each variant.
+
+    :param path: the output VCF
+    :param caller_id: a caller of `CALLERS`
+    :param variants: ``list`` of the ``(contig, position)`` of the variants
+    :param existing_variation: optional ``dict`` of the VEP Existing_variation
+        of variants
+    :return: the path
+    """
+    existing_variation = existing_variation or {}
+    description, default_csq = get_vep_annotation()
+    values = CALLERS[caller_id]
+
+    header = pysam.VariantHeader()
+    with pysam.FastaFile(REFERENCE_FASTA) as fasta:
+        for contig, length in zip(fasta.references, fasta.lengths):
+            header.contigs.add(contig, length=length)
+        refs = [fasta.fetch(contig, pos - 1, pos).upper() for contig, pos in variants]
+    header.info.add("CSQ", ".", "String", description)
+    header.formats.add("GT", 1, "String", "Genotype")
+    header.formats.add("AD", "R", "Integer", "Allelic depths")
+    header.formats.add("DP", 1, "Integer", "Read depth")
+    header.formats.add("SS", 1, "Integer", "Somatic status")
+    header.add_sample("NORMAL")
+    header.add_sample("TUMOR")
+
+    with pysam.VariantFile(path, "wz", header=header) as out:
+        for (contig, pos), ref in zip(variants, refs):
+            alt = [i for i in "ACGT" if i != ref][0]
+            record = out.new_record(contig=contig, start=pos - 1, alleles=(ref, alt))
+            csq = default_csq
+            if (contig, pos) in existing_variation:
+                _, csq = get_vep_annotation(existing_variation[(contig, pos)])
+            record.info["CSQ"] = ("|".join([alt] + csq.split("|")[1:]),)
+            for i, (sample, gt) in enumerate([("NORMAL", (0, 0)), ("TUMOR", (0, 1))]):
+                record.samples[sample]["GT"] = gt
+                for key, value in values.items():
+                    record.samples[sample][key] = value[i]
+            out.write(record)
+    pysam.tabix_index(path, preset="vcf", force=True)
+    return path
+
+
+def convert_args(input_vcf, output_maf, caller_id):
+    """Returns the VcfToAliquotMaf arguments of a caller VCF."""
+    return [
+        "VcfToAliquotMaf",
+        "--input_vcf",
+        input_vcf,
+        "--output_maf",
+        output_maf,
+        "gdc-2.0.0-aliquot",
+        "--caller_id",
+        caller_id,
+        "--src_vcf_uuid",
+        CASE_UUID,
+    ] + aliquot_args()
+
+
+def aliquot_args():
+    """Returns the sample and resource arguments of the aliquot."""
+    return [
+        "--case_uuid",
+        CASE_UUID,
+        "--tumor_submitter_id",
+        "FAKE-TUMOR",
+        "--tumor_aliquot_uuid",
+        TUMOR_ALIQUOT_UUID,
+        "--tumor_bam_uuid",
+        TUMOR_BAM_UUID,
+        "--normal_submitter_id",
+        "FAKE-NORMAL",
+        "--normal_aliquot_uuid",
+        NORMAL_ALIQUOT_UUID,
+        "--normal_bam_uuid",
+        NORMAL_BAM_UUID,
+        "--maf_center",
+        "FAKE",
+        "--biotype_priority_file",
+        os.path.join(EXTRAS_DIR, "biotype.priority.02282017.json"),
+        "--effect_priority_file",
+        os.path.join(EXTRAS_DIR, "effect.priority.02282017.json"),
+        "--reference_fasta",
+        REFERENCE_FASTA,
+        "--reference_fasta_index",
+        REFERENCE_FASTA + ".fai",
+    ]
+
+
+def read_records(path):
+    """Returns the column header and record lines of a MAF."""
+    open_function = gzip.open if path.endswith(".gz") else open
+    with open_function(path, "rt") as fh:
+        return [line for line in fh if not line.startswith("#")]
+
+
+def read_maf_dicts(path):
+    """Returns the records of a MAF as ``dict`` of column to value."""
+    lines = read_records(path)
+    columns = lines[0].rstrip("\n").split("\t")
+    return [dict(zip(columns, line.rstrip("\n").split("\t"))) for line in lines[1:]]
+
+
+@pytest.fixture
+def caller_vcfs(tmp_path):
+    """The VCFs of the callers of `CALLERS`, by caller."""
+    return {
+        caller_id: write_caller_vcf(
+            str(tmp_path / "{0}.vcf.gz".format(caller_id)), caller_id
+        )
+        for caller_id in CALLERS
+    }
+
+
+def merge_args(output_maf, raw_mafs):
+    """Returns the MergeAliquotMafs arguments of the raw MAFs of `CALLERS`."""
+    return [
+        "MergeAliquotMafs",
+        "--output_maf",
+        output_maf,
+        "gdc-2.0.0-aliquot-merged",
+        "--mutect2",
+        raw_mafs["MuTect2"],
+        "--muse",
+        raw_mafs["MuSE"],
+    ]
+
+
+def convert_callers(directory, caller_vcfs):
+    """Converts the caller VCFs, returning the raw aliquot MAFs by caller."""
+    mafs = {}
+    for caller_id, vcf in caller_vcfs.items():
+        mafs[caller_id] = os.path.join(directory, "{0}.maf.gz".format(caller_id))
+        main(convert_args(vcf, mafs[caller_id], caller_id))
+    return mafs
+
+
+@pytest.fixture
+def raw_mafs(tmp_path, caller_vcfs):
+    """The raw aliquot MAFs of the caller VCFs, by caller."""
+    return convert_callers(str(tmp_path), caller_vcfs)
+
+
+@pytest.fixture
+def merged_maf(tmp_path, raw_mafs):
+    """The merged MAF of the raw aliquot MAFs."""
+    path = str(tmp_path / "merged.maf.gz")
+    main(merge_args(path, raw_mafs))
+    return path
+
+
+@pytest.fixture
+def other_raw_mafs(tmp_path):
+    """The raw aliquot MAFs of a second aliquot, with some of the variants."""
+    directory = tmp_path / "other"
+    directory.mkdir()
+    caller_vcfs = {
+        caller_id: write_caller_vcf(
+            str(directory / "{0}.vcf.gz".format(caller_id)), caller_id, VARIANTS[1:4]
+        )
+        for caller_id in CALLERS
+    }
+    return convert_callers(str(directory), caller_vcfs)
+
+
+@pytest.fixture
+def other_merged_maf(tmp_path, other_raw_mafs):
+    """The merged MAF of the second aliquot."""
+    path = str(tmp_path / "other" / "merged.maf.gz")
+    main(merge_args(path, other_raw_mafs))
+    return path
@@ -0,0 +1,133 @@
+"""
+Tests for the ``aliquotmaf.subcommands.aliquot_pipeline`` subcommands.
+"""
+
+import os
+import uuid
+
+import pytest
+
+from aliquotmaf.__main__ import main
+from aliquotmaf.merging.reorder_window import ReorderWindowError
+from aliquotmaf.subcommands.aliquot_pipeline.runners import (
+    gdc_2_0_0_aliquot_pipeline as pipeline,
+)
+from aliquotmaf.subcommands.vcf_to_aliquot.runners import GDC_2_0_0_Aliquot
+from tests.subcommands.conftest import CASE_UUID, aliquot_args, read_records
+
+
+def get_commands(outputs, caller_vcfs):
+    fake_uuid = str(uuid.uuid4())
+    commands = ["AliquotPipeline"] + outputs + ["gdc-2.0.0-aliquot-pipeline"]
+    for caller_id in caller_vcfs:
+        commands += ["--caller_vcf", caller_id, fake_uuid, "./fake.vcf.gz"]
+    return commands + [
+        "--case_uuid",
+        fake_uuid,
+        "--tumor_submitter_id",
+        "FAKE-TUMOR",
+        "--tumor_aliquot_uuid",
+        fake_uuid,
+        "--tumor_bam_uuid",
+        fake_uuid,
+        "--maf_center",
+        "FAKE",
+        "--biotype_priority_file",
+        "./fake.json",
+        "--effect_priority_file",
+        "./fake.json",
+        "--reference_fasta",
+        "./fake.fa",
+        "--reference_fasta_index",
+        "./fake.fa.fai",
+        "--tumor_only",
+    ]
+
+
+def test_validation_outputs():
+    with pytest.raises(ValueError, match="--masked_output_maf"):
+        main(get_commands([], ["MuTect2", "MuSE"]))
+
+
+def test_validation_callers():
+    outputs = ["--masked_output_maf", "./fake.maf.gz"]
+
+    with pytest.raises(ValueError, match="given twice"):
+        main(get_commands(outputs, ["MuTect2", "MuTect2"]))
+
+    with pytest.raises(ValueError, match="Unknown variant caller"):
+        main(get_commands(outputs, ["MuTect2", "FakeCaller"]))
+
+    with pytest.raises(ValueError, match="not implemented"):
+        main(get_commands(outputs, ["MuTect2", "VarDict"]))
+
+
+class OverflowingWindow(pipeline.ReorderWindow):
+    def __iadd__(self, record):
+        raise ReorderWindowError("Overflow")
+
+
+@pytest.mark.parametrize("raw_output", [False, True])
+@pytest.mark.parametrize("overflow", [False, True])
+def test_pipeline_matches_subcommands(
+    tmp_path, monkeypatch, caller_vcfs, raw_mafs, merged_maf, overflow, raw_output
+):
+    masked_maf = str(tmp_path / "masked.maf.gz")
+    main(
+        [
+            "MaskMergedAliquotMaf",
+            "--input_maf",
+            merged_maf,
+            "--output_maf",
+            masked_maf,
+            "gdc-2.0.0-aliquot-merged-masked",
+        ]
+    )
+
+    conversions = []
+    setup_conversion = GDC_2_0_0_Aliquot.setup_conversion
+
+    def counting_setup_conversion(converter, vcf_object):
+        conversions.append(converter.options["caller_id"])
+        return setup_conversion(converter, vcf_object)
+
+    monkeypatch.setattr(
+        GDC_2_0_0_Aliquot, "setup_conversion", counting_setup_conversion
+    )
+    if overflow:
+        monkeypatch.setattr(pipeline, "ReorderWindow", OverflowingWindow)
+
+    pipeline_dir = tmp_path / "pipeline"
+    pipeline_dir.mkdir()
+    args = [
+        "AliquotPipeline",
+        "--merged_output_maf",
+        str(pipeline_dir / "merged.maf.gz"),
+        "--masked_output_maf",
+        str(pipeline_dir / "masked.maf.gz"),
+    ]
+    if raw_output:
+        args += ["--raw_output_dir", str(pipeline_dir)]
+    args.append("gdc-2.0.0-aliquot-pipeline")
+    for caller_id, vcf in caller_vcfs.items():
+        args += ["--caller_vcf", caller_id, CASE_UUID, vcf]
+    main(args + aliquot_args())
+
+    # The VCFs are only converted again when falling back to sorting
+    assert conversions == list(caller_vcfs) * (2 if overflow else 1)
+    assert read_records(str(pipeline_dir / "merged.maf.gz")) == read_records(
+        merged_maf
+    )
+    assert read_records(str(pipeline_dir / "masked.maf.gz")) == read_records(
+        masked_maf
+    )
+
+    # The raw aliquot MAFs are only written when requested
+    raw_outputs = sorted(i for i in os.listdir(pipeline_dir) if ".raw.maf" in i)
+    if raw_output:
+        assert raw_outputs == ["muse.raw.maf.gz", "mutect2.raw.maf.gz"]
+        for caller_id, snake in [("MuTect2", "mutect2"), ("MuSE", "muse")]:
+            raw_maf = str(pipeline_dir / "{0}.raw.maf.gz".format(snake))
+            assert read_records(raw_maf) == read_records(raw_mafs[caller_id])
+    else:
+        assert raw_outputs == []
@@ -0,0 +1,83 @@
+"""
+Tests for the ``aliquotmaf.subcommands.mask_merged_aliquot`` subcommands.
+"""
+
+import json
+
+import pytest
+
+from aliquotmaf.__main__ import main
+from tests.subcommands.conftest import read_records
+
+
+def test_validation_manifest(tmp_path):
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text("input_maf\toutput_maf\n./fake.maf.gz\t\n")
+    main_commands = [
+        "MaskMergedAliquotMaf",
+        "--manifest",
+        str(manifest),
+        "gdc-2.0.0-aliquot-merged-masked",
+    ]
+
+    with pytest.raises(ValueError, match="has no output_maf"):
+        main(main_commands)
+
+    with pytest.raises(ValueError, match="--input_maf is required"):
+        main(main_commands[:1] + main_commands[3:])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_manifest(tmp_path, capsys, merged_maf, other_merged_maf, processes):
+    inputs = [merged_maf, other_merged_maf]
+
+    # Single runs
+    single_outputs = []
+    single_metrics = []
+    for i, input_maf in enumerate(inputs):
+        single_outputs.append(str(tmp_path / "single_{0}.maf.gz".format(i)))
+        capsys.readouterr()
+        main(
+            [
+                "MaskMergedAliquotMaf",
+                "--input_maf",
+                input_maf,
+                "--output_maf",
+                single_outputs[-1],
+                "gdc-2.0.0-aliquot-merged-masked",
+            ]
+        )
+        single_metrics.append(json.loads(capsys.readouterr().out))
+
+    # Manifest run
+    outputs = [str(tmp_path / "batch_{0}.maf.gz".format(i)) for i in range(2)]
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(
+        "input_maf\toutput_maf\n"
+        + "".join("{0}\t{1}\n".format(*i) for i in zip(inputs, outputs))
+    )
+    status_json = tmp_path / "status.json"
+    main(
+        [
+            "MaskMergedAliquotMaf",
+            "--manifest",
+            str(manifest),
+            "--processes",
+            str(processes),
+            "--status_json",
+            str(status_json),
+            "gdc-2.0.0-aliquot-merged-masked",
+        ]
+    )
+
+    with open(status_json) as fh:
+        status = json.load(fh)
+    assert status["total"] == 2
+    assert status["failed"] == 0
+    for i, job in enumerate(status["jobs"]):
+        assert read_records(outputs[i]) == read_records(single_outputs[i])
+        assert job["status"] == "ok"
+        assert job["input_maf"] == inputs[i]
+        assert job["records"] == len(read_records(inputs[i])) - 1
+        assert job["masked_records"] == len(read_records(single_outputs[i])) - 1
+        assert job["metrics"] == single_metrics[i]
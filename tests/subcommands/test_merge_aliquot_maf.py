@@ -0,0 +1,112 @@
+"""
+Tests for the ``aliquotmaf.subcommands.merge_aliquot`` subcommands.
+"""
+
+import gzip
+import json
+import shutil
+
+import pytest
+
+from aliquotmaf.__main__ import main
+from aliquotmaf.subcommands.merge_aliquot.runners import (
+    gdc_1_0_0_aliquot_merged as merged_runner,
+)
+from tests.subcommands.conftest import merge_args, read_maf_dicts, read_records
+
+
+def test_manifest(tmp_path, merged_maf, other_merged_maf, raw_mafs, other_raw_mafs):
+    expected = [merged_maf, other_merged_maf]
+    outputs = [str(tmp_path / "batch_{0}.maf.gz".format(i)) for i in range(2)]
+    masked_outputs = [
+        str(tmp_path / "batch_{0}.masked.maf.gz".format(i)) for i in range(2)
+    ]
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(
+        "mutect2\tmuse\toutput_maf\tmasked_output_maf\n"
+        + "".join(
+            "{0}\t{1}\t{2}\t{3}\n".format(mafs["MuTect2"], mafs["MuSE"], *paths)
+            for mafs, paths in zip(
+                [raw_mafs, other_raw_mafs], zip(outputs, masked_outputs)
+            )
+        )
+    )
+    status_json = tmp_path / "status.json"
+    main(
+        [
+            "MergeAliquotMafs",
+            "--manifest",
+            str(manifest),
+            "--status_json",
+            str(status_json),
+            "gdc-2.0.0-aliquot-merged",
+        ]
+    )
+
+    with open(status_json) as fh:
+        status = json.load(fh)
+    assert status["total"] == 2
+    assert status["failed"] == 0
+    for i, job in enumerate(status["jobs"]):
+        assert read_records(outputs[i]) == read_records(expected[i])
+        assert job["status"] == "ok"
+        assert job["records"] == len(read_records(expected[i])) - 1
+        assert job["masked_records"] == len(read_records(masked_outputs[i])) - 1
+        assert job["metrics"]["input_records"] == job["records"]
+
+
+def read_text(path):
+    """Returns the whole decompressed text of a MAF, header included."""
+    with gzip.open(path, "rt") as fh:
+        return fh.read()
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_threads(tmp_path, monkeypatch, raw_mafs, indexed):
+    inputs = dict(raw_mafs)
+    if not indexed:
+        # Plain MAFs have no tabix index, so they are split by contig first
+        for caller_id, path in raw_mafs.items():
+            inputs[caller_id] = str(tmp_path / "{0}.maf".format(caller_id))
+            with gzip.open(path, "rb") as src, open(inputs[caller_id], "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+    splits = []
+    split_by_contig = merged_runner.split_by_contig
+
+    def recording_split_by_contig(path, *args, **kwargs):
+        splits.append(path)
+        return split_by_contig(path, *args, **kwargs)
+
+    monkeypatch.setattr(merged_runner, "split_by_contig", recording_split_by_contig)
+
+    outputs = {}
+    for threads in (1, 2):
+        output_maf = str(tmp_path / "merged.{0}.maf.gz".format(threads))
+        masked_maf = str(tmp_path / "masked.{0}.maf.gz".format(threads))
+        args = merge_args(output_maf, inputs)
+        args[3:3] = ["--masked_output_maf", masked_maf]
+        main(args + ["--threads", str(threads)])
+        outputs[threads] = (read_text(output_maf), read_text(masked_maf))
+
+    assert sorted(splits) == ([] if indexed else sorted(inputs.values()))
+    assert outputs[2] == outputs[1]
+    # The records of both contigs are merged and masked
+    merged = read_maf_dicts(str(tmp_path / "merged.1.maf.gz"))
+    assert {i["Chromosome"] for i in merged} == {"chr1", "chr2"}
+    assert len(read_records(str(tmp_path / "masked.1.maf.gz"))) > 1
+
+
+def test_overlap_engine_sweep(tmp_path, raw_mafs, merged_maf):
+    output_maf = str(tmp_path / "sweep.maf.gz")
+    main(merge_args(output_maf, raw_mafs) + ["--overlap_engine", "sweep"])
+    assert read_records(output_maf) == read_records(merged_maf)
+
+
+def test_max_overlap_size(tmp_path, raw_mafs, merged_maf):
+    # Every overlap set has a record of each caller, so all of them are split.
+    # The callers agree on the loci and alleles, so the merged records don't
+    # change.
+    output_maf = str(tmp_path / "split.maf.gz")
+    main(merge_args(output_maf, raw_mafs) + ["--max_overlap_size", "1"])
+    assert read_records(output_maf) == read_records(merged_maf)
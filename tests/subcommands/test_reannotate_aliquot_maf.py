@@ -0,0 +1,251 @@
+"""
+Tests for the ``aliquotmaf.subcommands.reannotate_aliquot`` subcommands.
+"""
+
+from types import SimpleNamespace
+
+import pysam
+import pytest
+
+from aliquotmaf.__main__ import main
+from aliquotmaf.subcommands.reannotate_aliquot.runners.gdc_2_0_0_aliquot_reannotated import (
+    GDC_2_0_0_Aliquot_Reannotated,
+    get_var_allele_idx,
+)
+from tests.subcommands.conftest import (
+    REFERENCE_FASTA,
+    VARIANTS,
+    convert_args,
+    read_maf_dicts,
+    read_records,
+    write_caller_vcf,
+)
+
+
+class FakeFilter:
+    def __init__(self, tags, flagged):
+        self.tags = tags
+        self.flagged = flagged
+
+    def filter(self, maf_record, locus=None):
+        return self.flagged
+
+
+def get_runner(filters, blacklist_tags=()):
+    runner = GDC_2_0_0_Aliquot_Reannotated(options={})
+    runner.filters = filters
+    for key, filt_obj in filters.items():
+        if key != "gdc_blacklist":
+            runner._recomputed_tags.update(filt_obj.tags)
+    runner._blacklist_tags = list(blacklist_tags)
+    return runner
+
+
+def get_record(gdc_filters):
+    return {"GDC_FILTER": SimpleNamespace(value=gdc_filters)}
+
+
+def write_vcf(path, records, info_vcf=None):
+    """
+    Writes a bgzipped and indexed sites VCF of ``(contig, pos, id, ref, alt,
+    info)`` records, with the INFO fields of `info_vcf`.
+    """
+    header = pysam.VariantHeader()
+    with pysam.FastaFile(REFERENCE_FASTA) as fasta:
+        for contig, length in zip(fasta.references, fasta.lengths):
+            header.contigs.add(contig, length=length)
+    if info_vcf:
+        with pysam.VariantFile(info_vcf) as vcf:
+            for header_record in vcf.header.records:
+                if header_record.type == "INFO":
+                    header.add_record(header_record)
+    with pysam.VariantFile(path, "wz", header=header) as out:
+        for contig, pos, vid, ref, alt, values in records:
+            record = out.new_record(
+                contig=contig, start=pos - 1, alleles=(ref, alt), id=vid
+            )
+            for key, value in values.items():
+                record.info[key] = value
+            out.write(record)
+    pysam.tabix_index(path, preset="vcf", force=True)
+    return path
+
+
+@pytest.mark.parametrize(
+    "vcf_format, vcf_tumor_gt, expected",
+    [
+        ("GT:AD:DP", "0/1:10,5:15", 1),
+        ("GT:AD:DP", "0|2:10,0,5:15", 2),
+        ("AD:GT", "10,0,5:2/0", 2),
+        ("GT:AD", "0/0:10,0", 1),
+        ("GT", "./.", 1),
+        ("AD:DP", "10,5:15", 1),
+        (None, None, 1),
+    ],
+)
+def test_get_var_allele_idx(vcf_format, vcf_tumor_gt, expected):
+    assert get_var_allele_idx(vcf_format, vcf_tumor_gt) == expected
+
+
+def test_get_gdc_filters_pass_through():
+    runner = get_runner({})
+    record = get_record(["ndp", "gdc_pon", "some_blacklist_tag"])
+    assert runner.get_gdc_filters(record, None) == [
+        "ndp",
+        "gdc_pon",
+        "some_blacklist_tag",
+    ]
+
+
+def test_get_gdc_filters_recompute():
+    runner = get_runner(
+        {
+            "gdc_pon": FakeFilter(["gdc_pon"], False),
+            "nonexonic": FakeFilter(["NonExonic"], True),
+        }
+    )
+    record = get_record(["ndp", "gdc_pon", "some_blacklist_tag"])
+    assert sorted(runner.get_gdc_filters(record, None)) == [
+        "NonExonic",
+        "ndp",
+        "some_blacklist_tag",
+    ]
+
+
+def test_get_gdc_filters_blacklist():
+    runner = get_runner(
+        {"gdc_blacklist": FakeFilter([], False)}, blacklist_tags=["new_tag"]
+    )
+    record = get_record(["ndp", "multiallelic", "old_tag"])
+    assert sorted(runner.get_gdc_filters(record, None)) == [
+        "multiallelic",
+        "ndp",
+        "new_tag",
+    ]
+
+
+def reannotate(input_maf, output_maf, cosmic_vcf, *args):
+    """Reannotates a raw aliquot MAF with a COSMIC VCF, returning the output."""
+    main(
+        [
+            "ReannotateAliquotMaf",
+            "--input_maf",
+            input_maf,
+            "--output_maf",
+            output_maf,
+            "gdc-2.0.0-aliquot",
+            "--cosmic_vcf",
+            cosmic_vcf,
+        ]
+        + list(args)
+    )
+    return output_maf
+
+
+def get_cosmic_vcf(path, records):
+    """Writes a COSMIC VCF with a COSMIC variant for each of the MAF records."""
+    return write_vcf(
+        path,
+        [
+            (
+                record["Chromosome"],
+                int(record["Start_Position"]),
+                "COSV{0:04d}".format(i + 1),
+                record["Reference_Allele"],
+                record["Tumor_Seq_Allele2"],
+                {},
+            )
+            for i, record in enumerate(records)
+        ],
+    )
+
+
+def test_reannotate_cosmic_gnomad(tmp_path, caller_vcfs, raw_mafs, get_test_file):
+    raw_maf = raw_mafs["MuTect2"]
+    raw = read_maf_dicts(raw_maf)
+    first, second = raw[0], raw[1]
+
+    # A COSMIC variant of the first record, and gnomAD frequencies of the second
+    cosmic_vcf = get_cosmic_vcf(str(tmp_path / "cosmic.vcf.gz"), [first])
+    gnomad_vcf = write_vcf(
+        str(tmp_path / "gnomad.vcf.gz"),
+        [
+            (
+                second["Chromosome"],
+                int(second["Start_Position"]),
+                None,
+                second["Reference_Allele"],
+                second["Tumor_Seq_Allele2"],
+                {"AF_non_cancer": (0.25,)},
+            )
+        ],
+        info_vcf=get_test_file("fake_noncancer_gnomad.vcf.gz"),
+    )
+
+    annotated_maf = reannotate(
+        raw_maf,
+        str(tmp_path / "annotated.maf.gz"),
+        cosmic_vcf,
+        "--gnomad_noncancer_vcf",
+        gnomad_vcf,
+    )
+    annotated = read_maf_dicts(annotated_maf)
+    assert [i["COSMIC"] for i in annotated] == ["COSV0001"] + [""] * (len(raw) - 1)
+    assert [i["dbSNP_RS"] for i in annotated] == [""] + ["novel"] * (len(raw) - 1)
+    assert float(annotated[1]["gnomAD_non_cancer_AF"]) == 0.25
+    assert all(not annotated[i]["gnomAD_non_cancer_AF"] for i in (0, 2, 3, 4))
+
+    # Re-annotating without the COSMIC variant and the gnomAD frequencies
+    # gives back the fresh conversion
+    empty_cosmic = write_vcf(str(tmp_path / "empty_cosmic.vcf.gz"), [])
+    empty_gnomad = write_vcf(
+        str(tmp_path / "empty_gnomad.vcf.gz"),
+        [],
+        info_vcf=get_test_file("fake_noncancer_gnomad.vcf.gz"),
+    )
+    restored_maf = reannotate(
+        annotated_maf,
+        str(tmp_path / "restored.maf.gz"),
+        empty_cosmic,
+        "--gnomad_noncancer_vcf",
+        empty_gnomad,
+        "--input_vcf",
+        caller_vcfs["MuTect2"],
+    )
+    assert read_records(restored_maf) == read_records(raw_maf)
+
+
+def test_reannotate_cosmic_other_database(tmp_path):
+    # The first variant is only known to COSMIC, so it has no dbSNP_RS
+    input_vcf = write_caller_vcf(
+        str(tmp_path / "MuTect2.vcf.gz"),
+        "MuTect2",
+        existing_variation={VARIANTS[0]: "COSV0002"},
+    )
+    raw_maf = str(tmp_path / "MuTect2.maf.gz")
+    main(convert_args(input_vcf, raw_maf, "MuTect2"))
+    raw = read_maf_dicts(raw_maf)
+    assert [i["dbSNP_RS"] for i in raw] == [""] + ["novel"] * (len(raw) - 1)
+
+    cosmic_vcf = get_cosmic_vcf(str(tmp_path / "cosmic.vcf.gz"), raw[:2])
+    annotated_maf = reannotate(raw_maf, str(tmp_path / "annotated.maf.gz"), cosmic_vcf)
+    annotated = read_maf_dicts(annotated_maf)
+    assert [i["COSMIC"] for i in annotated[:3]] == ["COSV0001", "COSV0002", ""]
+    assert [i["dbSNP_RS"] for i in annotated] == ["", ""] + ["novel"] * (len(raw) - 2)
+
+    # Only the novel variant gets its dbSNP_RS back
+    empty_cosmic = write_vcf(str(tmp_path / "empty_cosmic.vcf.gz"), [])
+    restored_maf = reannotate(
+        annotated_maf,
+        str(tmp_path / "restored.maf.gz"),
+        empty_cosmic,
+        "--input_vcf",
+        input_vcf,
+    )
+    assert read_records(restored_maf) == read_records(raw_maf)
+
+    # Without the input VCF, the cleared dbSNP_RS stays empty
+    kept_maf = reannotate(annotated_maf, str(tmp_path / "kept.maf.gz"), empty_cosmic)
+    assert [i["dbSNP_RS"] for i in read_maf_dicts(kept_maf)] == [
+        i["dbSNP_RS"] for i in annotated
+    ]
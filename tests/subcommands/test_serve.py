@@ -0,0 +1,179 @@
+"""
+Tests for the ``aliquotmaf.subcommands.serve`` subcommands.
+"""
+
+import shutil
+import tempfile
+import threading
+
+import pytest
+
+from aliquotmaf.__main__ import main
+from aliquotmaf.subcommands.serve.client import submit_job
+from aliquotmaf.subcommands.serve import server as serve_server
+from aliquotmaf.subcommands.serve.server import JobServer, get_runner, parse_job_args
+from tests.subcommands.conftest import read_records
+
+
+@pytest.fixture
+def server():
+    # Unix socket paths are limited to about 100 characters
+    tmp_dir = tempfile.mkdtemp(prefix="serve_")
+    server = JobServer(tmp_dir + "/serve.sock", workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(tmp_dir)
+
+
+def test_invalid_arguments(server):
+    status = submit_job(server.server_address, ["VcfToAliquotMaf"])
+    assert status["status"] == "failed"
+    assert "required" in status["error"]
+
+
+def test_unsupported_subcommand(server):
+    logs = []
+    status = submit_job(
+        server.server_address,
+        ["serve", "--socket", "fake.sock"],
+        on_log=logs.append,
+    )
+    assert status == {
+        "status": "failed",
+        "error": "ValueError: Serve is not supported by serve",
+    }
+
+
+def test_parse_job_args_paths(tmp_path):
+    (tmp_path / "merged.maf.gz").write_text("")
+    runner_class, options, job = parse_job_args(
+        [
+            "MaskMergedAliquotMaf",
+            "--input_maf",
+            "merged.maf.gz",
+            "--output_maf",
+            "masked.maf.gz",
+            "--regions",
+            "chr1",
+            "gdc-2.0.0-aliquot-merged-masked",
+            "--reference_fasta_index",
+            "fake.fa.fai",
+        ],
+        cwd=str(tmp_path),
+    )
+    # Path options are resolved against the directory of the client
+    assert job["input_maf"] == str(tmp_path / "merged.maf.gz")
+    assert job["output_maf"] == str(tmp_path / "masked.maf.gz")
+    assert options["reference_fasta_index"] == str(tmp_path / "fake.fa.fai")
+    # Regions are only resolved when they name a BED file
+    assert options["regions"] == "chr1"
+
+
+def test_parse_job_args_other_options(tmp_path):
+    # Option values that happen to name a file of the client aren't paths
+    (tmp_path / "MuSE").write_text("")
+    (tmp_path / "regions.bed").write_text("")
+    runner_class, options, job = parse_job_args(
+        [
+            "VcfToAliquotMaf",
+            "--input_vcf",
+            "muse.vcf.gz",
+            "--output_maf",
+            "muse.maf.gz",
+            "--regions",
+            "regions.bed",
+            "gdc-2.0.0-aliquot",
+            "--caller_id",
+            "MuSE",
+            "--src_vcf_uuid",
+            "src",
+            "--case_uuid",
+            "case",
+            "--tumor_submitter_id",
+            "tumor",
+            "--tumor_aliquot_uuid",
+            "tumor_aliquot",
+            "--tumor_bam_uuid",
+            "tumor_bam",
+            "--tumor_only",
+            "--maf_center",
+            "center",
+            "--biotype_priority_file",
+            "biotype.json",
+            "--effect_priority_file",
+            "effect.json",
+            "--reference_fasta",
+            "fake.fa",
+            "--reference_fasta_index",
+            "fake.fa.fai",
+        ],
+        cwd=str(tmp_path),
+    )
+    assert job["caller_id"] == "MuSE"
+    assert job["input_vcf"] == str(tmp_path / "muse.vcf.gz")
+    assert options["regions"] == str(tmp_path / "regions.bed")
+    assert options["biotype_priority_file"] == str(tmp_path / "biotype.json")
+
+
+class FakeRunner:
+    """Runner recording its instances and their shutdown."""
+
+    resource_options = ("reference_fasta",)
+    instances = []
+
+    def __init__(self, options):
+        self.options = options
+        self.shut_down = False
+        self.instances.append(self)
+
+    def shutdown_annotators(self):
+        self.shut_down = True
+
+
+def test_get_runner(monkeypatch):
+    monkeypatch.setattr(serve_server, "_runners", serve_server.OrderedDict())
+    monkeypatch.setattr(serve_server, "_max_runners", 2)
+    monkeypatch.setattr(FakeRunner, "instances", [])
+
+    # Only the resource options select the runner
+    first = get_runner(FakeRunner, {"reference_fasta": "a.fa", "caller_id": "MuSE"})
+    runner = get_runner(FakeRunner, {"reference_fasta": "a.fa", "caller_id": "Pindel"})
+    assert runner is first
+
+    second = get_runner(FakeRunner, {"reference_fasta": "b.fa"})
+    assert get_runner(FakeRunner, {"reference_fasta": "a.fa"}) is first
+
+    # The least recently used runner is shut down
+    third = get_runner(FakeRunner, {"reference_fasta": "c.fa"})
+    assert FakeRunner.instances == [first, second, third]
+    assert second.shut_down
+    assert not first.shut_down and not third.shut_down
+    assert get_runner(FakeRunner, {"reference_fasta": "a.fa"}) is first
+
+
+def test_mask_job(server, tmp_path, merged_maf):
+    args = [
+        "MaskMergedAliquotMaf",
+        "--input_maf",
+        merged_maf,
+        "--output_maf",
+        "masked.maf.gz",
+        "gdc-2.0.0-aliquot-merged-masked",
+    ]
+    local_maf = str(tmp_path / "local.maf.gz")
+    main(args[:3] + ["--output_maf", local_maf] + args[5:])
+
+    logs = []
+    status = submit_job(
+        server.server_address, args, on_log=logs.append, cwd=str(tmp_path)
+    )
+
+    expected = read_records(local_maf)
+    assert read_records(str(tmp_path / "masked.maf.gz")) == expected
+    assert status["status"] == "ok"
+    assert status["records"] == len(read_records(merged_maf)) - 1
+    assert status["masked_records"] == len(expected) - 1
+    assert any("Processing input maf" in message for message in logs)
@@ -2,11 +2,13 @@
 Tests for the ``aliquotmaf.subcommands.vcf_to_aliquot`` subcommands.
 """
 
+import json
 import uuid
 
 import pytest
 
 from aliquotmaf.__main__ import main
+from tests.subcommands.conftest import CASE_UUID, aliquot_args, read_records
 
 
 def test_validation_tumor_only():
@@ -50,3 +52,86 @@ def test_validation_tumor_only():
 
     with pytest.raises(FileNotFoundError):
         main(main_commands + ["--tumor_only"])
+
+
+def test_validation_manifest(tmp_path):
+    fake_uuid = str(uuid.uuid4())
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(
+        "input_vcf\toutput_maf\tcaller_id\n./fake.vcf.gz\t./fake.maf.gz\t\n"
+    )
+    main_commands = [
+        "VcfToAliquotMaf",
+        "--manifest",
+        str(manifest),
+        "gdc-2.0.0-aliquot",
+        "--src_vcf_uuid",
+        fake_uuid,
+        "--case_uuid",
+        fake_uuid,
+        "--tumor_submitter_id",
+        "FAKE-TUMOR",
+        "--tumor_aliquot_uuid",
+        fake_uuid,
+        "--tumor_bam_uuid",
+        fake_uuid,
+        "--maf_center",
+        "FAKE",
+        "--biotype_priority_file",
+        "./fake.json",
+        "--effect_priority_file",
+        "./fake.json",
+        "--reference_fasta",
+        "./fake.fa",
+        "--reference_fasta_index",
+        "./fake.fa.fai",
+        "--tumor_only",
+    ]
+
+    # No caller_id in the manifest or on the command line
+    with pytest.raises(ValueError, match="--caller_id is required"):
+        main(main_commands)
+
+    with pytest.raises(FileNotFoundError):
+        main(main_commands + ["--caller_id", "MuTect2"])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_manifest(tmp_path, caller_vcfs, raw_mafs, processes):
+    outputs = {
+        caller_id: str(tmp_path / "batch.{0}.maf.gz".format(caller_id))
+        for caller_id in caller_vcfs
+    }
+    manifest = tmp_path / "manifest.tsv"
+    manifest.write_text(
+        "input_vcf\toutput_maf\tcaller_id\n"
+        + "".join(
+            "{0}\t{1}\t{2}\n".format(vcf, outputs[caller_id], caller_id)
+            for caller_id, vcf in caller_vcfs.items()
+        )
+    )
+    status_json = tmp_path / "status.json"
+    main(
+        [
+            "VcfToAliquotMaf",
+            "--manifest",
+            str(manifest),
+            "--processes",
+            str(processes),
+            "--status_json",
+            str(status_json),
+            "gdc-2.0.0-aliquot",
+            "--src_vcf_uuid",
+            CASE_UUID,
+        ]
+        + aliquot_args()
+    )
+
+    with open(status_json) as fh:
+        status = json.load(fh)
+    assert status["total"] == len(caller_vcfs)
+    assert status["failed"] == 0
+    assert [job["status"] for job in status["jobs"]] == ["ok"] * len(caller_vcfs)
+    # The same records as converting each VCF on its own
+    for caller_id, raw_maf in raw_mafs.items():
+        assert read_records(outputs[caller_id]) == read_records(raw_maf)
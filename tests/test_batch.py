@@ -0,0 +1,114 @@
+"""
+Tests for the ``aliquotmaf.subcommands.batch`` module.
+"""
+
+import argparse
+import json
+import logging
+import os
+
+import pytest
+
+from aliquotmaf.subcommands.batch import (
+    add_batch_arguments,
+    read_manifest,
+    run_jobs,
+    write_status,
+)
+
+
+class CountingRunner:
+    """Runner counting the jobs it ran, failing on jobs named 'bad'."""
+
+    def __init__(self, options=dict()):
+        self.logger = logging.getLogger("CountingRunner")
+        self.options = options
+        self.runs = 0
+
+    def run_job(self, job):
+        if job["name"] == "bad":
+            raise ValueError("bad job")
+        self.runs += 1
+        return {"runs": self.runs, "pid": os.getpid()}
+
+
+def write_manifest(path, lines):
+    path.write_text("".join("\t".join(line) + "\n" for line in lines))
+    return str(path)
+
+
+def test_add_batch_arguments():
+    parser = argparse.ArgumentParser()
+    add_batch_arguments(parser, "The jobs", "VCF")
+    options = parser.parse_args(["--manifest", "jobs.tsv", "--processes", "2"])
+    assert vars(options) == {
+        "manifest": "jobs.tsv",
+        "processes": 2,
+        "status_json": None,
+    }
+
+
+def test_read_manifest(tmp_path):
+    path = write_manifest(
+        tmp_path / "manifest.tsv",
+        [
+            ["name", "input", "sample"],
+            ["a", "a.vcf", "S1"],
+            ["b", "b.vcf", ""],
+            [],
+        ],
+    )
+    jobs = read_manifest(path, ("name", "input", "sample"), ("name", "input"))
+    assert jobs == [
+        {"name": "a", "input": "a.vcf", "sample": "S1"},
+        {"name": "b", "input": "b.vcf"},
+    ]
+
+
+@pytest.mark.parametrize(
+    "lines, message",
+    [
+        ([["name", "other"], ["a", "x"]], "Unknown manifest columns other"),
+        ([["sample"], ["S1"]], "Missing manifest columns name"),
+        ([["name", "sample"], ["", "S1"]], "Line 2 of the manifest has no name"),
+        ([["name", "sample"], ["a"]], "Line 2 of the manifest has 1 columns"),
+    ],
+)
+def test_read_manifest_invalid(tmp_path, lines, message):
+    path = write_manifest(tmp_path / "manifest.tsv", lines)
+    with pytest.raises(ValueError, match=message):
+        read_manifest(path, ("name", "sample"), ("name",))
+
+
+def test_run_jobs_reuses_runner():
+    runner = CountingRunner()
+    statuses = run_jobs(runner, [{"name": "a"}, {"name": "bad"}, {"name": "c"}])
+
+    assert [i["status"] for i in statuses] == ["ok", "failed", "ok"]
+    assert [i.get("runs") for i in statuses] == [1, None, 2]
+    assert statuses[1]["error"] == "ValueError: bad job"
+    assert all(i["seconds"] >= 0 for i in statuses)
+
+
+def test_run_jobs_processes():
+    runner = CountingRunner({"func": lambda x: x})
+    jobs = [{"name": str(i)} for i in range(8)] + [{"name": "bad"}]
+    statuses = run_jobs(runner, jobs, processes=2)
+
+    assert [i["name"] for i in statuses] == [i["name"] for i in jobs]
+    assert [i["status"] for i in statuses] == ["ok"] * 8 + ["failed"]
+    assert runner.runs == 0
+    assert all(i["pid"] != os.getpid() for i in statuses[:-1])
+
+
+def test_write_status(tmp_path, capsys):
+    statuses = [{"name": "a", "status": "ok"}, {"name": "b", "status": "failed"}]
+    path = str(tmp_path / "status.json")
+
+    assert write_status(path, statuses, command="test") == 1
+    with open(path) as fh:
+        report = json.load(fh)
+    assert report == {"command": "test", "jobs": statuses, "total": 2, "failed": 1}
+
+    assert write_status(None, statuses[:1]) == 0
+    assert json.loads(capsys.readouterr().out)["failed"] == 0
@@ -0,0 +1,76 @@
+"""
+Tests for the ``aliquotmaf.bgzf`` module.
+"""
+
+import gzip
+
+import pytest
+
+from aliquotmaf import bgzf
+
+LINES = [
+    "{0}\tchr1\t{1}\t{2}\n".format(i, i * 10, "A" * (i % 50)) for i in range(20000)
+]
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_bgzf_round_trip(tmp_path, threads):
+    path = str(tmp_path / "out.maf.gz")
+    with bgzf.open(path, "wt", threads=threads) as writer:
+        for line in LINES:
+            writer.write(line)
+
+    assert bgzf.is_bgzf(path)
+    with open(path, "rb") as fh:
+        assert fh.read().endswith(bgzf.EOF_BLOCK)
+
+    # Readable as a regular gzip file
+    with gzip.open(path, "rt") as fh:
+        assert fh.read() == "".join(LINES)
+
+    with bgzf.open(path, "rt", threads=threads) as reader:
+        assert list(reader) == LINES
+
+
+def test_bgzf_block_size(tmp_path):
+    path = str(tmp_path / "out.gz")
+    with bgzf.open(path, "wb") as writer:
+        writer.write(b"A" * (bgzf.BLOCK_SIZE * 2 + 1))
+
+    with open(path, "rb") as fh:
+        blocks = []
+        while True:
+            block = bgzf._read_block(fh)
+            if block is None:
+                break
+            blocks.append(len(bgzf._decompress_block(block)))
+    assert blocks == [bgzf.BLOCK_SIZE, bgzf.BLOCK_SIZE, 1, 0]
+
+
+@pytest.mark.parametrize("threads", [1, 2])
+@pytest.mark.parametrize("offset", [-8, -4])
+def test_bgzf_corrupt_trailer(tmp_path, threads, offset):
+    path = str(tmp_path / "out.gz")
+    with bgzf.open(path, "wt") as writer:
+        writer.write("a\nb\n")
+
+    # Corrupt the CRC32 or the size of the data in the trailer of the first block
+    with open(path, "rb") as fh:
+        data = bytearray(fh.read())
+    data[len(data) - len(bgzf.EOF_BLOCK) + offset] ^= 0xFF
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+    with bgzf.open(path, "rt", threads=threads) as reader:
+        with pytest.raises(ValueError):
+            list(reader)
+
+
+def test_open_plain_gzip(tmp_path):
+    path = str(tmp_path / "plain.gz")
+    with gzip.open(path, "wt") as fh:
+        fh.write("a\nb\n")
+
+    assert not bgzf.is_bgzf(path)
+    with bgzf.open(path, "rt", threads=2) as fh:
+        assert fh.read() == "a\nb\n"
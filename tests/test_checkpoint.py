@@ -0,0 +1,75 @@
+"""
+Tests for the ``aliquotmaf.subcommands.vcf_to_aliquot.checkpoint`` module.
+"""
+
+import gzip
+import os
+
+import pytest
+
+from aliquotmaf.subcommands.vcf_to_aliquot.checkpoint import Checkpoint
+
+HEADER = "#version gdc-1.0.0"
+COLUMNS = ["Hugo_Symbol", "Chromosome", "Start_Position"]
+
+
+def make_checkpoint(directory, fingerprint="abc", interval=2):
+    return Checkpoint(str(directory), fingerprint, HEADER, COLUMNS, interval=interval)
+
+
+def test_fingerprint(tmp_path):
+    vcf = tmp_path / "input.vcf"
+    vcf.write_text("x")
+    options = {"input_vcf": str(vcf), "caller_id": "MuTect2", "func": object()}
+
+    fingerprint = Checkpoint.fingerprint_of(str(vcf), options)
+    assert fingerprint == Checkpoint.fingerprint_of(
+        str(vcf), dict(options, io_threads=4, checkpoint_dir="/tmp")
+    )
+    assert fingerprint != Checkpoint.fingerprint_of(
+        str(vcf), dict(options, caller_id="MuSE")
+    )
+
+
+def test_checkpoint_save_and_resume(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    loci = [("chr1", 10), ("chr1", 20), ("chr1", 30), ("chr2", 5)]
+    for line, (contig, pos) in enumerate(loci, 1):
+        checkpoint.update(line, contig, pos)
+        checkpoint.add("GENE{0}\t{1}\t{2}".format(line, contig, pos))
+
+    # Saved after 2 records and again when chr1 was completed
+    assert checkpoint.line == 3
+    assert (checkpoint.contig, checkpoint.pos) == ("chr1", 30)
+    assert len(checkpoint.chunks) == 2
+    with gzip.open(str(tmp_path / checkpoint.chunks[0]), "rt") as fh:
+        assert fh.read().splitlines() == [
+            HEADER,
+            "\t".join(COLUMNS),
+            "GENE1\tchr1\t10",
+            "GENE2\tchr1\t20",
+        ]
+
+    resumed = make_checkpoint(tmp_path)
+    assert resumed.load()
+    assert resumed.chunks == checkpoint.chunks
+    assert resumed.is_done(2, "chr1", 20)
+    assert resumed.is_done(3, "chr1", 30)
+    assert not resumed.is_done(4, "chr2", 5)
+    with pytest.raises(ValueError):
+        resumed.is_done(3, "chr1", 31)
+
+    resumed.clear()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_checkpoint_fingerprint_mismatch(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    checkpoint.update(1, "chr1", 10)
+    checkpoint.add("GENE1\tchr1\t10")
+    checkpoint.save(1)
+
+    other = make_checkpoint(tmp_path, fingerprint="def")
+    assert not other.load()
+    assert other.line == 0
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,61 @@
+"""
+Tests for the ``aliquotmaf.locus.Locus`` class.
+"""
+
+import dataclasses
+from collections import namedtuple
+
+import pytest
+
+from aliquotmaf.locus import Locus
+
+FakeRecord = namedtuple("FakeRecord", ["chrom", "rid", "pos", "ref", "alts"])
+
+
+@pytest.mark.parametrize(
+    "vcf_region, expected",
+    [
+        ("chr1:11:.:G:C", Locus("chr1", None, 11, 11, "G", ("C",))),
+        ("chr1:10:rs1:C:T,G", Locus("chr1", None, 10, 10, "C", ("T", "G"))),
+        ("chr2:8:.:CTACTT:C", Locus("chr2", None, 8, 13, "CTACTT", ("C",))),
+        (
+            "HLA-A*01:01:01:01:100:.:A:T",
+            Locus("HLA-A*01:01:01:01", None, 100, 100, "A", ("T",)),
+        ),
+        (
+            "chr1:100:.:N:N]chr2:321681]",
+            Locus("chr1", None, 100, 100, "N", ("N]chr2:321681]",)),
+        ),
+        (
+            "HLA-A*01:01:01:01:100:.:A:A[chr2:321682[",
+            Locus("HLA-A*01:01:01:01", None, 100, 100, "A", ("A[chr2:321682[",)),
+        ),
+    ],
+)
+def test_locus_from_vcf_region(vcf_region, expected):
+    assert Locus.from_vcf_region(vcf_region) == expected
+    assert Locus.from_vcf_region(vcf_region, contig=expected.contig) == expected
+
+
+def test_locus_from_vcf_region_invalid():
+    with pytest.raises(ValueError):
+        Locus.from_vcf_region("chr1:.:.:A:T")
+
+
+def test_locus_from_vcf_record():
+    record = FakeRecord(chrom="chr1", rid=0, pos=10, ref="CA", alts=("C", "CAA"))
+    locus = Locus.from_vcf_record(record)
+    assert locus == Locus("chr1", 0, 10, 11, "CA", ("C", "CAA"))
+    assert locus.alleles == ("CA", "C", "CAA")
+
+
+def test_locus_is_immutable():
+    locus = Locus.from_vcf_region("chr1:11:.:G:C")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        locus.pos = 12
+
+
+def test_locus_vcf_record_aliases():
+    locus = Locus.from_vcf_region("chr2:8:.:CTACTT:C")
+    assert locus.chrom == "chr2"
+    assert locus.stop == 13
@@ -0,0 +1,119 @@
+"""
+Tests for the ``aliquotmaf.subcommands.vcf_to_aliquot.pipeline`` module.
+"""
+
+import threading
+import time
+
+import pytest
+
+from aliquotmaf.subcommands.vcf_to_aliquot.pipeline import (
+    ConversionPipeline,
+    PipelineStopped,
+    RecordWriter,
+    StageQueue,
+)
+
+
+def test_stage_queue_stats():
+    stage_queue = StageQueue("test", 2, threading.Event())
+    stage_queue.put(1)
+    stage_queue.put(2)
+    assert stage_queue.get() == 1
+    assert stage_queue.get() == 2
+
+    stats = stage_queue.stats()
+    assert stats["items"] == 2
+    assert stats["max_depth"] == 2
+    assert stats["mean_depth"] == 1.5
+
+
+def test_stage_queue_stopped():
+    stop = threading.Event()
+    stage_queue = StageQueue("test", 1, stop)
+    stop.set()
+    with pytest.raises(PipelineStopped):
+        stage_queue.get()
+    stage_queue.put(1)
+    with pytest.raises(PipelineStopped):
+        stage_queue.put(2)
+
+
+def test_conversion_pipeline_keeps_order():
+    annotated = []
+
+    def convert(item):
+        # Later items finish first
+        time.sleep(0.001 * (item % 3))
+        return item * 10 if item % 5 else None
+
+    def annotate(item, converted):
+        annotated.append(threading.current_thread().name)
+        return None if converted is None else converted + 1
+
+    pipeline = ConversionPipeline(
+        iter(range(1, 101)), convert, annotate, threads=4, queue_size=8
+    )
+    results = list(pipeline)
+
+    assert [item for item, _ in results] == list(range(1, 101))
+    assert [result for _, result in results] == [
+        None if i % 5 == 0 else i * 10 + 1 for i in range(1, 101)
+    ]
+    assert set(annotated) == {"annotator"}
+
+    stats = pipeline.stats()
+    assert stats["threads"] == 4
+    assert stats["queues"]["converting"]["items"] == 101
+    assert stats["queues"]["annotated"]["max_depth"] <= 8
+
+
+@pytest.mark.parametrize("stage", ["read", "convert", "annotate"])
+def test_conversion_pipeline_error(stage):
+    def read():
+        for item in range(1, 10001):
+            if stage == "read" and item == 50:
+                raise IOError("read")
+            yield item
+
+    def convert(item):
+        if stage == "convert" and item == 50:
+            raise ValueError("convert")
+        return item
+
+    def annotate(item, converted):
+        if stage == "annotate" and converted == 50:
+            raise KeyError("annotate")
+        return converted
+
+    pipeline = ConversionPipeline(read(), convert, annotate, threads=2, queue_size=4)
+    with pytest.raises((IOError, ValueError, KeyError), match=stage):
+        list(pipeline)
+
+
+def test_record_writer():
+    class Writer:
+        def __init__(self):
+            self.records = []
+
+        def __iadd__(self, record):
+            self.records.append(record)
+            return self
+
+    writer = Writer()
+    with RecordWriter(writer, queue_size=4) as record_writer:
+        for i in range(100):
+            record_writer.write(i)
+    assert writer.records == list(range(100))
+    assert record_writer.stats()["writing"]["items"] == 101
+
+
+def test_record_writer_error():
+    class Writer:
+        def __iadd__(self, record):
+            raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        with RecordWriter(Writer(), queue_size=2) as record_writer:
+            for i in range(100):
+                record_writer.write(i)
@@ -0,0 +1,159 @@
+"""
+Tests for the ``aliquotmaf.regions`` module.
+"""
+
+import pytest
+
+from aliquotmaf import bgzf
+from aliquotmaf.regions import (
+    MAX_END,
+    MafRegionLines,
+    Region,
+    cluster_regions,
+    fetch_vcf_records,
+    index_maf,
+    merge_regions,
+    parse_region,
+    parse_regions,
+)
+
+MAF_COLUMNS = ["Hugo_Symbol", "Chromosome", "Start_Position", "End_Position"]
+
+
+def test_parse_region():
+    assert parse_region("chr1:100-200") == Region("chr1", 99, 200)
+    assert parse_region("chr1:1,000-2,000") == Region("chr1", 999, 2000)
+    assert parse_region("chr1:100") == Region("chr1", 99, 100)
+    assert parse_region("chr1") == Region("chr1", 0, MAX_END)
+
+    with pytest.raises(ValueError):
+        parse_region("chr1:200-100")
+
+
+def test_parse_regions(tmp_path):
+    assert parse_regions(None) == []
+    assert parse_regions("chr1:1-10,chr2") == [
+        Region("chr1", 0, 10),
+        Region("chr2", 0, MAX_END),
+    ]
+
+    bed = tmp_path / "regions.bed"
+    bed.write_text("track name=x\nchr1\t0\t10\nchr2\t5\t20\tname\n")
+    assert parse_regions(str(bed)) == [Region("chr1", 0, 10), Region("chr2", 5, 20)]
+
+    # Missing BED files aren't parsed as contig names
+    for value in (str(tmp_path / "missing"), "missing.bed", "missing.bed.gz"):
+        with pytest.raises(ValueError, match="does not exist"):
+            parse_regions(value)
+
+
+def test_merge_regions():
+    regions = [
+        Region("chr2", 0, 10),
+        Region("chr1", 50, 60),
+        Region("chr1", 0, 20),
+        Region("chr1", 20, 30),
+        Region("chrM", 0, 10),
+    ]
+    assert merge_regions(regions, ["chr1", "chr2"]) == [
+        Region("chr1", 0, 30),
+        Region("chr1", 50, 60),
+        Region("chr2", 0, 10),
+    ]
+
+
+def test_cluster_regions():
+    regions = [
+        Region("chr1", 100, 102),
+        Region("chr2", 10, 11),
+        Region("chr1", 99, 101),
+        Region("chr1", 150, 151),
+        Region("chr1", 300, 301),
+    ]
+    assert cluster_regions(regions, max_gap=50) == [
+        (Region("chr1", 99, 151), [2, 0, 3]),
+        (Region("chr1", 300, 301), [4]),
+        (Region("chr2", 10, 11), [1]),
+    ]
+    assert len(cluster_regions(regions)) == 4
+    assert cluster_regions([]) == []
+
+
+def test_region_contains():
+    region = Region("chr1", 99, 200)
+    assert not region.contains(99)
+    assert region.contains(100)
+    assert region.contains(200)
+    assert not region.contains(201)
+
+
+def test_fetch_vcf_records(get_test_file):
+    import pysam
+
+    vcf = pysam.VariantFile(get_test_file("ex1.vcf.gz"))
+    try:
+        assert len(list(fetch_vcf_records(vcf))) == len(list(vcf.fetch()))
+        found = list(fetch_vcf_records(vcf, [Region("chr2", 0, 10)]))
+        assert [(i.chrom, i.pos) for i in found] == [("chr2", 10)]
+    finally:
+        vcf.close()
+
+
+def test_fetch_vcf_records_start_position(tmp_path):
+    import pysam
+
+    path = str(tmp_path / "test.vcf.gz")
+    header = pysam.VariantHeader()
+    header.contigs.add("chr1", length=1000)
+    with pysam.VariantFile(path, "wz", header=header) as out:
+        for pos, alleles in [(10, ("AC", "A")), (20, ("G", "T"))]:
+            out.write(out.new_record(contig="chr1", start=pos - 1, alleles=alleles))
+    pysam.tabix_index(path, preset="vcf", force=True)
+
+    # The MAF Start_Position of the deletion is after its padding base
+    def start_position(record):
+        return record.pos + 1 if len(record.ref) > len(record.alts[0]) else record.pos
+
+    vcf = pysam.VariantFile(path)
+    try:
+        regions = [Region("chr1", 10, 20)]
+        assert [i.pos for i in fetch_vcf_records(vcf, regions)] == [20]
+        found = fetch_vcf_records(vcf, regions, start_position)
+        assert [i.pos for i in found] == [10, 20]
+        found = fetch_vcf_records(vcf, [Region("chr1", 0, 10)], start_position)
+        assert list(found) == []
+
+        with pytest.raises(ValueError, match="chr2"):
+            list(fetch_vcf_records(vcf, [Region("chr2", 0, 10)]))
+    finally:
+        vcf.close()
+
+
+def test_maf_region_lines(tmp_path):
+    path = str(tmp_path / "test.maf.gz")
+    records = [
+        ["A", "chr1", "10", "10"],
+        ["B", "chr1", "20", "25"],
+        ["C", "chr1", "30", "30"],
+        ["D", "chr2", "5", "5"],
+    ]
+    with bgzf.open(path, "wt", on_close=index_maf) as fh:
+        fh.write("#version gdc-1.0.0\n")
+        fh.write("\t".join(MAF_COLUMNS) + "\n")
+        for record in records:
+            fh.write("\t".join(record) + "\n")
+
+    regions = [Region("chr1", 21, 30), Region("chr2", 0, 100)]
+    lines = MafRegionLines(path, regions)
+    try:
+        found = list(lines)
+    finally:
+        lines.close()
+
+    # chr1:20-25 overlaps the first region but doesn't start in it
+    assert found == [
+        "#version gdc-1.0.0\n",
+        "\t".join(MAF_COLUMNS) + "\n",
+        "C\tchr1\t30\t30\n",
+        "D\tchr2\t5\t5\n",
+    ]
@@ -0,0 +1,136 @@
+"""
+Tests for the ``aliquotmaf.shared_tables`` module.
+"""
+
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from aliquotmaf.shared_tables import SharedTable, load_table, memory_usage
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    return str(tmp_path / "test.tbl")
+
+
+def lookup_in_child(path, key, queue):
+    queue.put(SharedTable(path).get(key))
+
+
+def test_create_and_lookup(table_path):
+    data = {"TP53": {"R175H": "single residue"}, "KRAS": {"G12D": "x"}, "": [0]}
+    data.update({"ENST{0:011d}".format(i): [i] for i in range(1000)})
+    table = SharedTable.create(table_path, data)
+
+    assert len(table) == len(data)
+    assert dict(table) == data
+    assert table["TP53"] == {"R175H": "single residue"}
+    assert table.get("ENST00000000042") == [42]
+    assert table.get("BRAF", [0]) == [0]
+    assert "" in table
+    assert "KRAS" in table and "KRA" not in table and 1 not in table
+    with pytest.raises(KeyError):
+        table["BRAF"]
+
+
+def test_create_from_set(table_path):
+    table = SharedTable.create(table_path, {"ENST1", "ENST2"})
+    assert "ENST1" in table
+    assert "ENST3" not in table
+    assert sorted(table) == ["ENST1", "ENST2"]
+
+
+def test_map_from_other_process(table_path):
+    SharedTable.create(table_path, {"KRAS": [3845]})
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=lookup_in_child, args=(table_path, "KRAS", queue)
+    )
+    process.start()
+    assert queue.get(timeout=60) == [3845]
+    process.join()
+
+
+def test_not_a_table(table_path):
+    with open(table_path, "wb") as fh:
+        fh.write(b"\0" * SharedTable.HEADER.size)
+    with pytest.raises(ValueError):
+        SharedTable(table_path)
+
+
+def test_load_table(tmp_path):
+    source = tmp_path / "priority.json"
+    source.write_text(json.dumps({"missense_variant": 12}))
+
+    def load(path):
+        with open(path) as fh:
+            return json.load(fh)
+
+    assert load_table(str(source), "test", load) == {"missense_variant": 12}
+
+    table = load_table(str(source), "test", load, shared=True)
+    try:
+        assert isinstance(table, SharedTable)
+        assert os.path.basename(table.path) == SharedTable.table_name(
+            str(source), "test"
+        )
+        assert table.get("missense_variant", 20) == 12
+
+        # A second load maps the same table without loading the file
+        other = load_table(str(source), "test", None, shared=True)
+        assert other.path == table.path
+        assert dict(other) == {"missense_variant": 12}
+    finally:
+        os.unlink(table.path)
+
+
+def test_cached_lookups(table_path):
+    table = SharedTable.create(table_path, {"KRAS": [3845]})
+
+    assert table["KRAS"] is table["KRAS"]
+    assert table.get("BRAF") is None
+    assert "BRAF" not in table and 1 not in table
+    assert set(table._cache) == {"KRAS", "BRAF", 1}
+
+
+def test_remove_stale(tmp_path):
+    source = tmp_path / "hotspots.tsv"
+    source.write_text("KRAS\tG12D\n")
+    other_source = tmp_path / "other.tsv"
+    other_source.write_text("TP53\tR175H\n")
+
+    def load(path):
+        with open(path) as fh:
+            return dict(line.rstrip("\n").split("\t") for line in fh)
+
+    old = SharedTable.from_source(
+        str(source), "hotspots", lambda: load(source), tmp_path
+    )
+    other = SharedTable.from_source(
+        str(other_source), "hotspots", lambda: load(other_source), tmp_path
+    )
+
+    # A new version of the resource file replaces its table only
+    source.write_text("KRAS\tG12D\nNRAS\tQ61K\n")
+    new = SharedTable.from_source(
+        str(source), "hotspots", lambda: load(source), tmp_path
+    )
+
+    assert new.path != old.path
+    assert not os.path.exists(old.path)
+    assert os.path.exists(other.path)
+    assert dict(new) == {"KRAS": "G12D", "NRAS": "Q61K"}
+    # Mapped tables stay readable after their removal
+    assert old["KRAS"] == "G12D"
+
+
+def test_memory_usage():
+    usage = memory_usage()
+    if usage:
+        assert usage["rss"] > 0
+        assert set(usage) <= {"rss", "anon", "file", "shmem"}
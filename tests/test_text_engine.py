@@ -0,0 +1,128 @@
+"""
+Tests for the ``aliquotmaf.subcommands.vcf_to_aliquot.text_engine`` module.
+"""
+
+from types import SimpleNamespace
+
+import pysam
+import pytest
+
+from aliquotmaf.subcommands.vcf_to_aliquot.text_engine import (
+    TextVcfReader,
+    TextVcfRecord,
+)
+
+TYPES = SimpleNamespace(
+    info={
+        "DP": ("Integer", 1),
+        "AF": ("Float", "A"),
+        "SOMATIC": ("Flag", 0),
+        "CSQ": ("String", "."),
+    },
+    formats={
+        "GT": ("String", 1),
+        "AD": ("Integer", "R"),
+        "DP": ("Integer", 1),
+        "AF": ("Float", "A"),
+    },
+    contigs={"chr1": 0, "chr2": 1},
+    samples={"NORMAL": 0, "TUMOR": 1},
+)
+
+LINE = (
+    "chr2\t10\trs1\tA\tT\t.\tPASS\tDP=35;AF=0.500;SOMATIC;CSQ=T|x,T|y\t"
+    "GT:AD:DP:AF\t0/0:20,0:20\t0/1:10,5:15:0.333\n"
+)
+
+
+def test_text_record_fields():
+    record = TextVcfRecord(LINE, TYPES)
+    assert record.chrom == "chr2"
+    assert record.rid == 1
+    assert record.pos == 10
+    assert record.stop == 10
+    assert record.id == "rs1"
+    assert record.alleles == ("A", "T")
+    assert record.filter == ("PASS",)
+
+
+def test_text_record_values():
+    record = TextVcfRecord(LINE, TYPES)
+    assert record.info["DP"] == 35
+    assert record.info["SOMATIC"] is True
+    assert record.info["CSQ"] == ("T|x", "T|y")
+    assert "ANN" not in record.info
+    with pytest.raises(KeyError):
+        record.info["ANN"]
+
+    tumor = record.samples["TUMOR"]
+    assert tumor["GT"] == (0, 1)
+    assert tumor["AD"] == (10, 5)
+    assert tumor["DP"] == 15
+    assert tumor["AF"] == (pytest.approx(0.333),)
+
+    normal = record.samples["NORMAL"]
+    assert normal["AF"] == (None,)
+
+
+def test_text_record_to_fields():
+    record = TextVcfRecord(LINE, TYPES)
+    cols = record.to_fields(["CSQ"])
+    assert cols[7] == "DP=35;AF=0.5;SOMATIC"
+    assert cols[8] == "GT:AD:DP:AF"
+    assert cols[9] == "0/0:20,0:20:."
+    assert cols[10] == "0/1:10,5:15:0.333"
+
+
+@pytest.mark.parametrize("path", ["ex1.vcf.gz", "ex3.vcf.gz"])
+def test_text_engine_matches_pysam(get_test_file, path):
+    vcf_path = get_test_file(path)
+    pysam_vcf = pysam.VariantFile(vcf_path)
+    text_vcf = TextVcfReader(vcf_path)
+    try:
+        for expected, found in zip(pysam_vcf.fetch(), text_vcf.fetch()):
+            assert found.chrom == expected.chrom
+            assert found.rid == expected.rid
+            assert found.pos == expected.pos
+            assert found.stop == expected.stop
+            assert found.alleles == expected.alleles
+            assert list(found.filter) == list(expected.filter)
+            assert found.to_fields() == str(expected).rstrip("\n").split("\t")
+    finally:
+        pysam_vcf.close()
+        text_vcf.close()
+
+
+def test_text_engine_undefined_keys(tmp_path):
+    # htslib types the keys missing from the header as Number=1 strings
+    path = str(tmp_path / "undefined.vcf")
+    with open(path, "wt") as fh:
+        fh.write(
+            "##fileformat=VCFv4.2\n"
+            "##contig=<ID=chr1,length=1000>\n"
+            '##INFO=<ID=DP,Number=1,Type=Integer,Description="Depth">\n'
+            '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n'
+            "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tTUMOR\n"
+            "chr1\t10\t.\tA\tT\t.\t.\tDP;SOMATIC;FOO=a,b;BAR=1.5\t"
+            "GT:XX:YY\t0/1:a,b:3\n"
+            "chr1\t20\t.\tA\tT\t.\t.\tFOO=c\tGT:XX\t0/1:c\n"
+        )
+    vcf_path = pysam.tabix_index(path, preset="vcf", force=True)
+
+    text_vcf = TextVcfReader(vcf_path)
+    found = [
+        ({key: record.info[key] for key in record.info}, record.samples[0])
+        for record in text_vcf.fetch()
+    ]
+    text_vcf.close()
+    assert found[0] == (
+        {"DP": None, "SOMATIC": None, "FOO": ("a", "b"), "BAR": "1.5"},
+        {"GT": (0, 1), "XX": ("a", "b"), "YY": "3"},
+    )
+
+    pysam_vcf = pysam.VariantFile(vcf_path)
+    expected = [
+        (dict(record.info), dict(record.samples[0])) for record in pysam_vcf.fetch()
+    ]
+    pysam_vcf.close()
+    assert found == expected